@@ -0,0 +1,157 @@
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_LEDGER_FILE = 'sent_ledger.db'
+MAX_EXAMPLES = 5
+# Status written to a roster row skipped because its address gets the
+# email from another row (or already got it). It does not count as sent,
+# so the row is checked again on the next run.
+DUPLICATE_STATUS = 'duplicate'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sent (
+    address TEXT NOT NULL,
+    email_type TEXT NOT NULL,
+    campaign TEXT NOT NULL,
+    sent_at REAL NOT NULL,
+    PRIMARY KEY (email_type, campaign, address)
+);
+"""
+
+
+def delivery_address(email):
+    """
+    Returns the address to send to: no whitespace anywhere, no mailto:
+    prefix or angle brackets, and the domain lowercased. The part before
+    the @ keeps its case, since a mail server may treat it as
+    case-sensitive and it shows in the To header.
+    """
+    address = ''.join((email or '').split()).strip('<>')
+    if address[:7].lower() == 'mailto:':
+        address = address[7:]
+    local, at, domain = address.rpartition('@')
+    return f"{local}{at}{domain.lower()}" if at else address
+
+
+def normalize_address(email):
+    """
+    Returns the form of an address used to spot duplicates: the
+    delivery_address lowercased, since mail providers treat
+    'Ana.Cruz@School.edu' and 'ana.cruz@school.edu' as the same mailbox.
+    Dots and +tags are kept; they can be different people. Only use it to
+    compare addresses, never to send to.
+    """
+    return delivery_address(email).lower()
+
+
+class AddressIndex:
+    """
+    Hash index of the addresses in a batch, used to send each one only once.
+
+    It starts with the addresses the SentLedger has sent; mark_sent() adds
+    those of roster rows whose status says sent (also kept in roster_sent so
+    they can be copied to the ledger). admit() is then called for each
+    pending row in order and returns False for a row whose normalized
+    address is already sent or was admitted earlier, counting it so the
+    batch can report what was collapsed.
+    """
+
+    def __init__(self, sent=()):
+        self.sent = set(sent)
+        self.roster_sent = []
+        self.kept = set()
+        self.duplicates = 0
+        self.already_sent = 0
+        self.examples = []
+
+    def mark_sent(self, email):
+        address = normalize_address(email)
+        if address and address not in self.sent:
+            self.sent.add(address)
+            self.roster_sent.append(address)
+
+    def admit(self, email, row_number=None):
+        address = normalize_address(email)
+        if not address:
+            return True
+        if address in self.sent:
+            self.already_sent += 1
+        elif address in self.kept:
+            self.duplicates += 1
+        else:
+            self.kept.add(address)
+            return True
+        if len(self.examples) < MAX_EXAMPLES:
+            self.examples.append((row_number, email, address))
+        return False
+
+    @property
+    def collapsed(self):
+        return self.duplicates + self.already_sent
+
+    def describe(self):
+        """Returns report lines about the collapsed rows, or [] if there were none."""
+        if not self.collapsed:
+            return []
+        rows = 'row' if self.collapsed == 1 else 'rows'
+        lines = [f"Skipped {self.collapsed} {rows} whose address gets this email only once "
+                 f"({self.duplicates} repeated in this batch, {self.already_sent} already sent before):"]
+        for row_number, email, address in self.examples:
+            where = f"row {row_number}: " if row_number is not None else ""
+            lines.append(f"  {where}{email!r} is {address}")
+        if self.collapsed > len(self.examples):
+            lines.append(f"  ... {self.collapsed - len(self.examples)} more ...")
+        return lines
+
+
+class SentLedger:
+    """
+    SQLite record of every (address, email_type, campaign) sent successfully.
+
+    It is shared by every roster, so an address that got an email from one
+    CSV (or one run) is not sent the same email again from another. Each
+    send is its own small WAL commit, like RecipientStore.record.
+    """
+
+    def __init__(self, path=DEFAULT_LEDGER_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def addresses(self, email_type, campaign):
+        cursor = self.connection.execute(
+            'SELECT address FROM sent WHERE email_type = ? AND campaign = ?', (email_type, campaign)
+        )
+        return {row[0] for row in cursor}
+
+    def record(self, email, email_type, campaign):
+        self.record_many([email], email_type, campaign)
+
+    def record_many(self, emails, email_type, campaign):
+        now = time.time()
+        rows = [(normalize_address(email), email_type, campaign, now) for email in emails]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO sent (address, email_type, campaign, sent_at) VALUES (?, ?, ?, ?)',
+                [row for row in rows if row[0]],
+            )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def open_ledger(path):
+    """Returns a SentLedger for path, or None if path is empty (ledger turned off)."""
+    return SentLedger(path) if path else None
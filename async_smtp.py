@@ -0,0 +1,324 @@
+import asyncio
+import base64
+import re
+import smtplib
+import ssl
+import time
+
+import metrics
+
+from smtp_session import DEFAULT_MAX_MESSAGES_PER_CONNECTION, DEFAULT_MAX_CONNECTION_AGE
+
+
+CRLF = b'\r\n'
+LEADING_DOT_PATTERN = re.compile(br'(?m)^\.')
+EOL_PATTERN = re.compile(br'\r\n|\n|\r(?!\n)')
+
+
+def encode_data(msg):
+    """Returns msg as CRLF bytes with leading dots doubled and the DATA terminator."""
+    if isinstance(msg, str):
+        msg = msg.encode('ascii')
+    data = LEADING_DOT_PATTERN.sub(b'..', EOL_PATTERN.sub(CRLF, msg))
+    if not data.endswith(CRLF):
+        data += CRLF
+    return data + b'.' + CRLF
+
+
+class AsyncSmtpSession:
+    """
+    asyncio counterpart of SmtpSession: one authenticated connection reused
+    for many sends, reopened when the server drops it and recycled after
+    max_messages sends or max_age seconds.
+
+    Errors are raised as the usual smtplib exception types so callers can
+    handle both backends the same way.
+    """
+
+    def __init__(self, server, port, username, password,
+                 max_messages=DEFAULT_MAX_MESSAGES_PER_CONNECTION,
+                 max_age=DEFAULT_MAX_CONNECTION_AGE,
+                 use_tls=True, timeout=60, local_hostname='localhost'):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_messages = max_messages
+        self.max_age = max_age
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.local_hostname = local_hostname
+        self.reader = None
+        self.writer = None
+        self.plain_writer = None
+        self.extensions = {}
+        self.opened_at = 0.0
+        self.sent_on_connection = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def read_reply(self):
+        lines = []
+        while True:
+            try:
+                line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+            except asyncio.TimeoutError:
+                raise smtplib.SMTPServerDisconnected('Timed out waiting for the server')
+            if not line:
+                raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+            try:
+                code = int(line[:3])
+            except ValueError:
+                raise smtplib.SMTPServerDisconnected(f'Malformed reply: {line!r}')
+            lines.append(line[4:].strip())
+            if line[3:4] != b'-':
+                return code, b'\n'.join(lines)
+
+    async def command(self, line):
+        self.writer.write(line.encode('ascii') + CRLF)
+        await self.writer.drain()
+        return await self.read_reply()
+
+    async def ehlo(self):
+        code, message = await self.command(f'EHLO {self.local_hostname}')
+        if code != 250:
+            raise smtplib.SMTPHeloError(code, message)
+        self.extensions = {}
+        for item in message.decode('latin-1').split('\n')[1:]:
+            parts = item.split(None, 1)
+            if parts:
+                self.extensions[parts[0].lower()] = parts[1] if len(parts) > 1 else ''
+
+    async def starttls(self):
+        code, message = await self.command('STARTTLS')
+        if code != 220:
+            raise smtplib.SMTPResponseException(code, message)
+        # loop.start_tls() wraps the connection in TLS for a new protocol,
+        # so the session continues on a fresh reader/writer pair. The plain
+        # writer is kept until the connection closes, since dropping it
+        # would close the TCP connection underneath.
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        protocol = asyncio.StreamReaderProtocol(reader)
+        transport = await asyncio.wait_for(
+            loop.start_tls(self.writer.transport, protocol, ssl.create_default_context(),
+                           server_hostname=self.server),
+            self.timeout,
+        )
+        protocol.connection_made(transport)
+        self.plain_writer = self.writer
+        self.reader = reader
+        self.writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+        await self.ehlo()
+
+    async def login(self):
+        mechanisms = self.extensions.get('auth', '').upper().split()
+        if 'PLAIN' in mechanisms or not mechanisms:
+            token = base64.b64encode(f'\0{self.username}\0{self.password}'.encode('utf-8')).decode('ascii')
+            code, message = await self.command(f'AUTH PLAIN {token}')
+        else:
+            code, message = await self.command('AUTH LOGIN')
+            if code == 334:
+                code, message = await self.command(base64.b64encode(self.username.encode('utf-8')).decode('ascii'))
+            if code == 334:
+                code, message = await self.command(base64.b64encode(self.password.encode('utf-8')).decode('ascii'))
+        if code not in (235, 503):
+            raise smtplib.SMTPAuthenticationError(code, message)
+
+    async def connect(self):
+        await self.close()
+        start = time.perf_counter()
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.server, self.port), self.timeout
+        )
+        try:
+            code, message = await self.read_reply()
+            if code != 220:
+                raise smtplib.SMTPConnectError(code, message)
+            await self.ehlo()
+            metrics.observe('connect', time.perf_counter() - start)
+            if self.use_tls:
+                start = time.perf_counter()
+                await self.starttls()
+                metrics.observe('starttls', time.perf_counter() - start)
+            if self.username:
+                start = time.perf_counter()
+                await self.login()
+                metrics.observe('login', time.perf_counter() - start)
+        except BaseException:
+            self.abort()
+            raise
+        self.opened_at = time.monotonic()
+        self.sent_on_connection = 0
+
+    def abort(self):
+        for writer in (self.writer, self.plain_writer):
+            if writer is not None:
+                writer.close()
+        self.reader = None
+        self.writer = None
+        self.plain_writer = None
+
+    async def close(self):
+        if self.writer is None:
+            return
+        try:
+            await asyncio.wait_for(self.command('QUIT'), 5)
+        except Exception:
+            pass
+        finally:
+            self.abort()
+
+    def needs_recycle(self):
+        if self.writer is None:
+            return True
+        if self.max_messages and self.sent_on_connection >= self.max_messages:
+            return True
+        if self.max_age and time.monotonic() - self.opened_at >= self.max_age:
+            return True
+        return False
+
+    async def transaction(self, from_addr, to_addr, data):
+        code, message = await self.command(f'MAIL FROM:<{from_addr}>')
+        if code != 250:
+            await self.command('RSET')
+            raise smtplib.SMTPSenderRefused(code, message, from_addr)
+        code, message = await self.command(f'RCPT TO:<{to_addr}>')
+        if code not in (250, 251):
+            await self.command('RSET')
+            raise smtplib.SMTPRecipientsRefused({to_addr: (code, message)})
+        code, message = await self.command('DATA')
+        if code != 354:
+            await self.command('RSET')
+            raise smtplib.SMTPDataError(code, message)
+        self.writer.write(data)
+        await self.writer.drain()
+        code, message = await self.read_reply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, message)
+        return code, message
+
+    async def sendmail(self, from_addr, to_addr, msg):
+        """Sends one message, reconnecting once if the server dropped the session."""
+        data = encode_data(msg)
+        if self.needs_recycle():
+            await self.connect()
+        try:
+            start = time.perf_counter()
+            try:
+                await self.transaction(from_addr, to_addr, data)
+            except smtplib.SMTPServerDisconnected:
+                await self.connect()
+                start = time.perf_counter()
+                await self.transaction(from_addr, to_addr, data)
+            finally:
+                metrics.observe('sendmail', time.perf_counter() - start)
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            raise
+        except BaseException:
+            self.abort()
+            raise
+        self.sent_on_connection += 1
+        return {}
+
+    async def send_many(self, from_addr, messages):
+        """
+        Sends several (to_addr, msg) pairs back to back on this session.
+
+        When the server advertises PIPELINING each message's MAIL, RCPT and
+        DATA go out in one write, together with the previous message's
+        content, so a message costs one round trip instead of four. Every
+        message still gets its own envelope and DATA, since the bodies are
+        personalized.
+
+        Returns one (code, message) reply per message: the final reply to
+        its DATA, or the first rejection of its envelope. None means no reply
+        was received (e.g. the connection dropped), so the message should be
+        retried on its own. Errors opening the connection are raised, since
+        they say nothing about the individual messages.
+        """
+        results = [None] * len(messages)
+        queue = []
+        for index, (to_addr, msg) in enumerate(messages):
+            try:
+                envelope = f'MAIL FROM:<{from_addr}>\r\nRCPT TO:<{to_addr}>\r\nDATA\r\n'.encode('ascii')
+            except UnicodeEncodeError:
+                continue
+            queue.append((index, envelope, encode_data(msg)))
+        if not queue:
+            return results
+
+        if self.needs_recycle():
+            await self.connect()
+        try:
+            # Each message is timed from the previous message's final reply.
+            mark = time.perf_counter()
+            if 'pipelining' not in self.extensions:
+                for index, _, data in queue:
+                    try:
+                        results[index] = await self.transaction(from_addr, messages[index][0], data)
+                    except smtplib.SMTPRecipientsRefused as e:
+                        results[index] = next(iter(e.recipients.values()))
+                    except smtplib.SMTPResponseException as e:
+                        results[index] = (e.smtp_code, e.smtp_error)
+                    self.sent_on_connection += 1
+                    now = time.perf_counter()
+                    metrics.observe('sendmail', now - mark)
+                    mark = now
+                return results
+
+            self.writer.write(queue[0][1])
+            await self.writer.drain()
+            # Replies still owed for the RSET or empty message that closed the previous envelope.
+            skip = 0
+            for position, (index, _, data) in enumerate(queue):
+                for _ in range(skip):
+                    await self.read_reply()
+                mail, rcpt, data_reply = [await self.read_reply() for _ in range(3)]
+                next_envelope = queue[position + 1][1] if position + 1 < len(queue) else b''
+                # The first rejected step decides the result, as in transaction().
+                if mail[0] != 250:
+                    rejection = mail
+                elif rcpt[0] not in (250, 251):
+                    rejection = rcpt
+                elif data_reply[0] != 354:
+                    rejection = data_reply
+                else:
+                    rejection = None
+                if rejection is None:
+                    self.writer.write(data + next_envelope)
+                    await self.writer.drain()
+                    results[index] = await self.read_reply()
+                    skip = 0
+                else:
+                    results[index] = rejection
+                    if data_reply[0] == 354:
+                        # Some servers open DATA even after rejecting the
+                        # envelope; end it with an empty message (RFC 2920).
+                        self.writer.write(b'.\r\n' + next_envelope)
+                        skip = 1
+                    elif mail[0] == 250:
+                        # MAIL was accepted, so a transaction is still open.
+                        self.writer.write(b'RSET\r\n' + next_envelope)
+                        skip = 1
+                    else:
+                        self.writer.write(next_envelope)
+                        skip = 0
+                    await self.writer.drain()
+                self.sent_on_connection += 1
+                now = time.perf_counter()
+                metrics.observe('sendmail', now - mark)
+                mark = now
+            for _ in range(skip):
+                await self.read_reply()
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # The connection is gone; messages without a reply stay None.
+            self.abort()
+        except BaseException:
+            self.abort()
+            raise
+        return results
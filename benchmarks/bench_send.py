@@ -0,0 +1,283 @@
+"""
+Batch sending benchmark against an in-process fake SMTP server.
+
+Runs process_csv_batch on synthetic rosters for each backend and reports
+messages/sec, p50/p99 per-message SMTP latency, CPU time per message and
+peak RSS. Every case runs in a fresh child process so CPU and memory
+figures belong to the sender alone; the fake server stays in this one.
+
+    python benchmarks/bench_send.py
+    python benchmarks/bench_send.py --sizes 1000 10000 --backends sync async --workers 8 --latency 0.02
+    python benchmarks/bench_send.py --tls --failure-rate 0.01 --json results.json
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from fake_smtp import FakeSmtpServer
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+# Environment variables the sender reads its accounts from, numbered extra
+# accounts included (SENDER_EMAIL_2, SMTP_SERVER_2, RATE_LIMIT_PER_DAY_2, ...).
+ACCOUNT_PREFIXES = ('SMTP_', 'SENDER_', 'RATE_LIMIT_')
+
+BACKENDS = {
+    'sync': {'backend': 'sync', 'pipeline': 0},
+    'async': {'backend': 'async', 'pipeline': 0},
+    'pipeline': {'backend': 'async', 'pipeline': 10},
+}
+
+
+def write_roster(path, size):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['email', 'name'])
+        for i in range(size):
+            writer.writerow([f'student{i}@example.edu', f'Student {i}'])
+
+
+def make_certificate(directory):
+    """Creates a throwaway self-signed certificate for 127.0.0.1 with openssl."""
+    certfile = os.path.join(directory, 'cert.pem')
+    keyfile = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-keyout', keyfile, '-out', certfile, '-subj', '/CN=127.0.0.1',
+         '-addext', 'subjectAltName=IP:127.0.0.1'],
+        check=True, capture_output=True,
+    )
+    return certfile, keyfile
+
+
+def sender_environment(**settings):
+    """
+    Returns os.environ without any account settings, with the ledger and
+    metrics file turned off, plus settings. Together with
+    disable_dotenv() in the child, nothing from the real .env is used.
+    """
+    env = {name: value for name, value in os.environ.items() if not name.startswith(ACCOUNT_PREFIXES)}
+    env.update(SENT_LEDGER='', METRICS_FILE='')
+    env.update(settings)
+    return env
+
+
+def disable_dotenv():
+    """Keeps send.py from loading .env; call before importing send."""
+    import dotenv
+
+    dotenv.load_dotenv = lambda *args, **kwargs: False
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def record_latencies(send, latencies):
+    """Wraps the session send methods to time every SMTP transaction."""
+    sync_sendmail = send.SmtpSession.sendmail
+    async_sendmail = send.AsyncSmtpSession.sendmail
+    async_send_many = send.AsyncSmtpSession.send_many
+
+    def sendmail(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return sync_sendmail(self, *args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    async def sendmail_async(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await async_sendmail(self, *args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    async def send_many(self, from_addr, messages):
+        start = time.perf_counter()
+        try:
+            return await async_send_many(self, from_addr, messages)
+        finally:
+            latencies.extend([time.perf_counter() - start] * len(messages))
+
+    send.SmtpSession.sendmail = sendmail
+    send.AsyncSmtpSession.sendmail = sendmail_async
+    send.AsyncSmtpSession.send_many = send_many
+
+
+def run_child(args):
+    """Sends one roster and prints the measurements as JSON."""
+    sys.path.insert(0, REPO_DIR)
+    disable_dotenv()
+    import send
+
+    send.RETRY_BASE_DELAY = args.retry_delay
+    latencies = []
+    record_latencies(send, latencies)
+    stdout = sys.stdout
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        sys.stdout = devnull
+        try:
+            send.process_csv_batch(
+                args.csv,
+                'ballot_links',
+                delay=0,
+                email_delay=0,
+                workers=args.workers,
+                backend=args.backend,
+                pipeline=args.pipeline,
+                assume_yes=True,
+            )
+        finally:
+            sys.stdout = stdout
+    wall = time.perf_counter() - start_wall
+    cpu = time.process_time() - start_cpu
+
+    with open(args.csv, 'r', encoding='utf-8') as f:
+        statuses = [row.get('ballot_links_emailed') for row in csv.DictReader(f)]
+    sent = sum(1 for status in statuses if status == 'yes')
+    print(json.dumps({
+        'sent': sent,
+        'failed': len(statuses) - sent,
+        'seconds': wall,
+        'cpu_seconds': cpu,
+        'transactions': len(latencies),
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_rss_mb': peak_rss_mb(),
+    }))
+
+
+def run_case(server, roster, size, name, args, certfile):
+    options = BACKENDS[name]
+    env = sender_environment(
+        SMTP_SERVER='127.0.0.1',
+        SMTP_PORT=str(server.port),
+        SMTP_USE_TLS='true' if certfile else 'false',
+        SENDER_EMAIL='bench@example.edu',
+        SENDER_PASSWORD='bench',
+        BALLOT_LINK='https://example.edu/ballot',
+        RATE_LIMIT_PER_MINUTE='0',
+        RATE_LIMIT_PER_HOUR='0',
+        RATE_LIMIT_PER_DAY='0',
+    )
+    if certfile:
+        env['SSL_CERT_FILE'] = certfile
+    server.reset_stats()
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', '--csv', roster,
+         '--workers', str(args.workers), '--backend', options['backend'],
+         '--pipeline', str(options['pipeline']), '--retry-delay', str(args.retry_delay)],
+        env=env, cwd=os.path.dirname(roster), capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{name} x {size} failed:\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result.update({
+        'size': size,
+        'backend': name,
+        'workers': args.workers,
+        'connections': server.connections,
+        'messages_per_second': result['sent'] / result['seconds'] if result['seconds'] else 0.0,
+        'cpu_ms_per_message': result['cpu_seconds'] * 1000 / max(1, size),
+    })
+    return result
+
+
+def print_table(results):
+    header = f"{'rows':>7} {'backend':>9} {'sent':>7} {'failed':>6} {'msgs/s':>9} " \
+             f"{'p50 ms':>8} {'p99 ms':>8} {'cpu ms/msg':>10} {'peak MB':>8} {'conns':>6}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        rss = f"{r['peak_rss_mb']:.1f}" if r['peak_rss_mb'] is not None else 'n/a'
+        print(f"{r['size']:>7} {r['backend']:>9} {r['sent']:>7} {r['failed']:>6} "
+              f"{r['messages_per_second']:>9.1f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+              f"{r['cpu_ms_per_message']:>10.3f} {rss:>8} {r['connections']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch sending against a local fake SMTP server')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Roster sizes to send (default: 1000 10000 100000)')
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS), default=['sync', 'async'],
+                        help='Backends to compare (default: sync async)')
+    parser.add_argument('--workers', type=int, default=4, help='Parallel connections (default: 4)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds the fake server waits before accepting each message')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help='Fraction of messages answered with a temporary failure')
+    parser.add_argument('--retry-delay', type=float, default=0.5,
+                        help='Seconds before the first retry of a failed message (default: 0.5)')
+    parser.add_argument('--tls', action='store_true',
+                        help='Enable STARTTLS with a throwaway certificate (needs openssl)')
+    parser.add_argument('--json', metavar='FILE', help='Also write the results to a JSON file')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--csv', help=argparse.SUPPRESS)
+    parser.add_argument('--backend', default='sync', help=argparse.SUPPRESS)
+    parser.add_argument('--pipeline', type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix='seb_bench_')
+    certfile = keyfile = None
+    if args.tls:
+        certfile, keyfile = make_certificate(work_dir)
+    server = FakeSmtpServer(latency=args.latency, failure_rate=args.failure_rate,
+                            certfile=certfile, keyfile=keyfile, seed=1).start()
+    results = []
+    try:
+        for size in args.sizes:
+            source = os.path.join(work_dir, f'roster_{size}.csv')
+            write_roster(source, size)
+            for name in args.backends:
+                case_dir = os.path.join(work_dir, f'{name}_{size}')
+                os.makedirs(case_dir)
+                roster = os.path.join(case_dir, 'students.csv')
+                shutil.copy(source, roster)
+                print(f"Sending {size} rows with the {name} backend...", flush=True)
+                results.append(run_case(server, roster, size, name, args, certfile))
+                shutil.rmtree(case_dir, ignore_errors=True)
+    finally:
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print()
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Startup benchmark for the GUI (or any module of the app).
+
+Imports the module in fresh interpreters under `python -X importtime` and
+reports the median import time, the wall-clock time of the whole child
+process and the slowest imports, so regressions such as an eager
+`import send` in gui.py show up at once. With --window it also times how
+long it takes until the Tk window has been drawn (needs a display).
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --top 15
+    python benchmarks/bench_startup.py --module send --json startup.json
+    python benchmarks/bench_startup.py --window
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+# Builds the window exactly as gui.main() does, waits until Tk has drawn
+# it, and prints how long that took since the interpreter started.
+WINDOW_SCRIPT = """
+import time, tkinter as tk
+import gui
+root = tk.Tk()
+app = gui.EmailSenderGui(root)
+root.update()
+print(time.perf_counter())
+root.destroy()
+"""
+
+
+def parse_importtime(stderr):
+    """Returns [(module, self_us, cumulative_us)] from -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, timings = line.split(':', 1)
+        self_us, cumulative_us, name = timings.split('|')
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def measure_import(module):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_DIR, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    imports = parse_importtime(result.stderr)
+    total = next((cumulative for name, _, cumulative in imports if name == module), 0)
+    return {'wall_ms': wall * 1000, 'import_ms': total / 1000, 'imports': imports}
+
+
+def measure_window():
+    """Seconds from launching the interpreter until the window is drawn."""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', WINDOW_SCRIPT], cwd=REPO_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    # perf_counter is system-wide on the platforms we run on, so the child's
+    # reading can be compared with ours.
+    return (float(result.stdout.strip().splitlines()[-1]) - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure how long the app takes to start')
+    parser.add_argument('--module', default='gui', help='Module to import (default: gui)')
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters to measure (default: 10)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list (default: 10)')
+    parser.add_argument('--window', action='store_true', help='Also time until the GUI window is drawn')
+    parser.add_argument('--json', metavar='FILE', help='Write the results to FILE as JSON')
+    args = parser.parse_args()
+
+    measure_import(args.module)  # warm the OS file cache and __pycache__
+    runs = [measure_import(args.module) for _ in range(max(1, args.runs))]
+    runs.sort(key=lambda run: run['import_ms'])
+    median = runs[len(runs) // 2]
+
+    print(f"{args.module}: import {median['import_ms']:.1f} ms, process {median['wall_ms']:.1f} ms "
+          f"(median of {len(runs)}; import min {runs[0]['import_ms']:.1f}, max {runs[-1]['import_ms']:.1f})")
+    print(f"\nSlowest imports (cumulative, median run):")
+    print(f"  {'Module':<40} {'Self ms':>9} {'Total ms':>9}")
+    slowest = sorted(
+        (entry for entry in median['imports'] if entry[0] != args.module),
+        key=lambda entry: entry[2], reverse=True,
+    )[:args.top]
+    for name, self_us, cumulative_us in slowest:
+        print(f"  {name:<40} {self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}")
+
+    results = {
+        'module': args.module,
+        'runs': len(runs),
+        'import_ms': statistics.median(run['import_ms'] for run in runs),
+        'process_ms': statistics.median(run['wall_ms'] for run in runs),
+        'slowest': [{'module': name, 'self_ms': s / 1000, 'total_ms': c / 1000} for name, s, c in slowest],
+    }
+
+    if args.window:
+        try:
+            windows = sorted(measure_window() for _ in range(max(1, args.runs)))
+        except RuntimeError as e:
+            print(f"\nCould not open the window: {e}")
+        else:
+            results['window_ms'] = statistics.median(windows)
+            print(f"\nWindow drawn after {results['window_ms']:.0f} ms (median of {len(windows)})")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
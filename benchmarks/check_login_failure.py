@@ -0,0 +1,105 @@
+"""
+Regression check: a batch stops when no account can log in.
+
+Sends a small roster with a fake SMTP server that rejects every login,
+from one account and from two, on both engines, and checks that the batch
+logs in about once per connection instead of once per row and leaves every
+row pending. Then checks that when only the first of two accounts is
+rejected, the second one sends every row.
+
+    python benchmarks/check_login_failure.py
+"""
+import csv
+import os
+import shutil
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from bench_send import disable_dotenv, sender_environment, write_roster
+from fake_smtp import FakeSmtpServer
+
+disable_dotenv()
+
+TOTAL = 20
+WORKERS = 2
+BAD_LOGIN = '535 5.7.8 Username and Password not accepted'
+
+
+def statuses(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [row.get('blast_emailed', '') for row in csv.DictReader(f)]
+
+
+def run(send, work_dir, backend):
+    """Returns (counts, statuses) of a batch of TOTAL rows."""
+    path = os.path.join(work_dir, f'{backend}.csv')
+    write_roster(path, TOTAL)
+    counts = send.process_csv_batch(path, 'blast', email_delay=0, workers=WORKERS, backend=backend,
+                                    assume_yes=True)
+    return counts, statuses(path)
+
+
+def main():
+    bad = FakeSmtpServer(auth_reply=BAD_LOGIN).start()
+    good = FakeSmtpServer().start()
+    os.environ.clear()
+    os.environ.update(sender_environment(
+        SMTP_SERVER='127.0.0.1',
+        SMTP_PORT=str(bad.port),
+        SMTP_USE_TLS='false',
+        SENDER_EMAIL='bench@example.edu',
+        SENDER_PASSWORD='wrong',
+        RATE_LIMIT_PER_MINUTE='0',
+        RATE_LIMIT_PER_HOUR='0',
+        RATE_LIMIT_PER_DAY='0',
+    ))
+    import send
+
+    second_accounts = {
+        'one account': {},
+        'two accounts': {'SENDER_EMAIL_2': 'bench2@example.edu', 'SENDER_PASSWORD_2': 'wrong'},
+    }
+    work_dir = tempfile.mkdtemp(prefix='seb_check_')
+    failed = 0
+    try:
+        for description, extra in second_accounts.items():
+            for backend in send.BACKENDS:
+                os.environ.pop('SENDER_EMAIL_2', None)
+                os.environ.update(extra)
+                bad.reset_stats()
+                counts, status = run(send, work_dir, backend)
+                accounts = 1 + bool(extra)
+                # One login per worker connection, plus one reconnect each at most.
+                allowed = 2 * WORKERS * accounts
+                if counts == (0, 0) and not any(status) and bad.logins <= allowed:
+                    print(f"✅ {description}, {backend}: stopped after {bad.logins} logins, "
+                          f"{len(status)} rows still pending")
+                else:
+                    failed += 1
+                    print(f"❌ {description}, {backend}: expected (0, 0) with every row pending and at most "
+                          f"{allowed} logins; got {counts}, {bad.logins} logins, statuses {sorted(set(status))}")
+
+        os.environ.update(SENDER_EMAIL_2='bench2@example.edu', SENDER_PASSWORD_2='bench',
+                          SMTP_PORT_2=str(good.port))
+        for backend in send.BACKENDS:
+            good.reset_stats()
+            counts, status = run(send, work_dir, backend)
+            if counts == (TOTAL, 0) and status.count('yes') == TOTAL and good.messages == TOTAL:
+                print(f"✅ first account rejected, {backend}: the second account sent all {TOTAL}")
+            else:
+                failed += 1
+                print(f"❌ first account rejected, {backend}: expected ({TOTAL}, 0), got {counts} "
+                      f"with {good.messages} delivered")
+    finally:
+        bad.stop()
+        good.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
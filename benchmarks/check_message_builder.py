@@ -0,0 +1,97 @@
+"""
+Check: MessageBuilder emails parse back like the MIMEMultipart ones.
+
+Builds every email type for ASCII, non-ASCII and 'From '-prefixed names
+both with MessageBuilder (as send.py does) and with MIMEMultipart('related')
++ MIMEText(html, 'html') sent via as_string() (as send.py used to), parses
+both with email.message_from_bytes and compares the headers (boundary
+aside), the part headers and the payloads. Bodies with lines starting with
+'From ' are checked on the builder directly, since no template starts a
+line with the student name.
+
+    python benchmarks/check_message_builder.py
+"""
+import email
+import os
+import re
+import sys
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from bench_send import disable_dotenv, sender_environment
+
+disable_dotenv()
+os.environ.clear()
+os.environ.update(sender_environment(
+    SENDER_EMAIL='bench@example.edu',
+    CONTACT_EMAIL='board@example.edu',
+    ORG_NAME='Student Election Board',
+    BALLOT_LINK='https://example.edu/ballot',
+    ALTERNATIVE_EMAIL_FORM_LINK='https://example.edu/form',
+    PRECINCT_LOCATION='Room 123, Main Building',
+))
+
+import send
+from message_builder import MessageBuilder
+
+
+EMAIL_TYPES = ['blast', 'ballot_links', 'precinct', 'reminder']
+NAMES = ['Juan Dela Cruz', 'José Niño Peña', 'From Manila']
+BOUNDARY_PATTERN = re.compile(r'boundary="[^"]*"')
+
+
+def legacy_message(headers, recipient, html):
+    """The email as send.py built it before MessageBuilder, as sendmail put it on the wire."""
+    msg = MIMEMultipart('related')
+    for name, value in headers[:2] + [('To', recipient)] + headers[2:]:
+        msg[name] = value
+    msg.attach(MIMEText(html, 'html'))
+    return re.sub(r'\r?\n', '\r\n', msg.as_string()).encode('ascii')
+
+
+def describe(raw):
+    """Returns the parts of a message to compare: headers without the boundary, part headers and payloads."""
+    msg = email.message_from_bytes(raw)
+    headers = [(name, BOUNDARY_PATTERN.sub('boundary=""', value)) for name, value in msg.items()]
+    parts = [(part.items(), part.get_payload(), part.get_payload(decode=True)) for part in msg.get_payload()]
+    return headers, parts
+
+
+def compare(label, new, old):
+    if describe(new) == describe(old):
+        print(f"✅ {label}")
+        return True
+    print(f"❌ {label}: the MessageBuilder email differs")
+    print(f"   new: {describe(new)!r:.600}")
+    print(f"   old: {describe(old)!r:.600}")
+    return False
+
+
+def main():
+    ok = True
+    for email_type in EMAIL_TYPES:
+        campaign = send.get_campaign(email_type)
+        if campaign is None:
+            print(f"❌ Could not load the {email_type} email template")
+            return 1
+        for name in NAMES:
+            recipient = 'juan.delacruz@example.edu'
+            html = campaign.render(recipient, name)
+            ok &= compare(f"{email_type}, {name}", campaign.build_message(recipient, name),
+                          legacy_message(campaign.headers, recipient, html))
+
+    headers = send.campaign_headers('Check', '3')
+    builder = MessageBuilder(headers)
+    for name in NAMES:
+        html = f"From {name}\n<p>Dear {name},</p>\nFrom the board\r\n"
+        ok &= compare(f"body starting with 'From ', {name}", builder.build('a@example.edu', html),
+                      legacy_message(headers, 'a@example.edu', html))
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Check: pipelined sends report the right reply for every message.
+
+Sends the same messages with AsyncSmtpSession.send_many to fake servers
+that reject some envelopes, once with PIPELINING and once without, and
+checks that both give every message the reply (and so the failure class)
+of the step that rejected it: MAIL FROM, RCPT TO, DATA or the message.
+
+    python benchmarks/check_pipelining.py
+"""
+import asyncio
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from async_smtp import AsyncSmtpSession
+from fake_smtp import FakeSmtpServer
+from retry_scheduler import classify_code
+
+
+SENDER = 'bench@example.edu'
+RECIPIENTS = ['ok1@example.edu', 'unknown@example.edu', 'full@example.edu', 'ok2@example.edu']
+RCPT_REPLIES = {
+    'unknown@example.edu': '550 5.1.1 No such user',
+    'full@example.edu': '452 4.2.2 Mailbox full',
+}
+
+# (description, server options, expected failure class per recipient; None is sent)
+CASES = [
+    ('rejected recipients', {'rcpt_replies': RCPT_REPLIES},
+     [None, 'permanent', 'temporary', None]),
+    ('rejected recipients, server opens DATA anyway', {'rcpt_replies': RCPT_REPLIES, 'lenient_data': True},
+     [None, 'permanent', 'temporary', None]),
+    ('rejected sender', {'mail_reply': '530 5.7.0 Authentication required'},
+     ['auth'] * 4),
+    ('sender rate limited', {'mail_reply': '451 4.7.1 Too many messages, slow down'},
+     ['throttled'] * 4),
+]
+
+
+def message(recipient):
+    return (f'From: {SENDER}\r\nTo: {recipient}\r\nSubject: Check\r\n\r\n'
+            f'.Leading dot for {recipient}\r\n').encode('ascii')
+
+
+async def send(server, pipelining):
+    session = AsyncSmtpSession('127.0.0.1', server.port, SENDER, 'bench', use_tls=False, timeout=10)
+    await session.connect()
+    if not pipelining:
+        session.extensions.pop('pipelining', None)
+    try:
+        replies = await session.send_many(SENDER, [(recipient, message(recipient)) for recipient in RECIPIENTS])
+    finally:
+        await session.close()
+    return replies
+
+
+def main():
+    failed = 0
+    for description, options, expected in CASES:
+        for pipelining in (True, False):
+            server = FakeSmtpServer(**options).start()
+            try:
+                replies = asyncio.run(send(server, pipelining))
+            finally:
+                server.stop()
+            got = [None if reply is not None and reply[0] == 250
+                   else classify_code(*reply) if reply is not None else classify_code(None)
+                   for reply in replies]
+            sent = expected.count(None)
+            mode = 'pipelined' if pipelining else 'one at a time'
+            if got == expected and server.messages == sent:
+                print(f"✅ {description} ({mode}): {got}")
+            else:
+                failed += 1
+                print(f"❌ {description} ({mode}): expected {expected} with {sent} delivered, "
+                      f"got {got} with {server.messages} delivered; replies {replies}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Regression check: a worker process with retries waiting must not hang.
+
+Runs send_in_processes against a fake SMTP server that answers every
+message with a 451, with one process and a window of two rows, so the
+worker's retries come due while its inbox is empty. Before the fix the
+retry scheduler blocked on the inbox while holding its lock and the batch
+never finished.
+
+    python benchmarks/check_retry_hang.py
+"""
+import os
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from bench_send import disable_dotenv, sender_environment
+from fake_smtp import FakeSmtpServer
+
+# This module is imported again in every spawned worker, so the settings
+# below apply there too: no .env from the repo and quick retries.
+disable_dotenv()
+
+import send
+
+send.RETRY_BASE_DELAY = 0.1
+send.RETRY_MAX_DELAY = 0.2
+
+
+TOTAL = 6
+TIMEOUT = 60
+
+
+def main():
+    server = FakeSmtpServer(failure_rate=1.0, seed=1).start()
+    environment = sender_environment(
+        SMTP_SERVER='127.0.0.1',
+        SMTP_PORT=str(server.port),
+        SMTP_USE_TLS='false',
+        SENDER_EMAIL='bench@example.edu',
+        SENDER_PASSWORD='bench',
+        BALLOT_LINK='https://example.edu/ballot',
+    )
+    os.environ.clear()
+    os.environ.update(environment)
+    rows = [{'email': f'student{i}@example.edu', 'name': f'Student {i}'} for i in range(TOTAL)]
+    results = []
+    counts = []
+    cancel = threading.Event()
+
+    def run():
+        counts.append(send.send_in_processes(
+            iter(rows), 'ballot_links', 'email', 'name',
+            lambda row, result, sender=None: results.append(result),
+            processes=1, total=TOTAL, window=2, cancel_event=cancel,
+            limits=dict(email_delay=0, per_minute=0, per_hour=0, per_day=0,
+                        adaptive=False, sender_usage={}),
+        ))
+
+    start = time.perf_counter()
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(TIMEOUT)
+    elapsed = time.perf_counter() - start
+    server.stop()
+    if thread.is_alive():
+        cancel.set()
+        thread.join(10)
+        print(f"❌ Batch still running after {TIMEOUT}s ({len(results)} of {TOTAL} results)")
+        return 1
+    expected = (0, TOTAL)
+    if counts != [expected] or len(results) != TOTAL:
+        print(f"❌ Expected {expected}, got {counts} with {len(results)} results")
+        return 1
+    print(f"✅ {TOTAL} rows failed after {send.RETRY_MAX_ATTEMPTS} attempts each in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
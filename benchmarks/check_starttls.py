@@ -0,0 +1,81 @@
+"""
+Check: the async engine sends over STARTTLS.
+
+Starts the fake SMTP server with a throwaway certificate (needs openssl)
+and sends with AsyncSmtpSession, one message at a time and pipelined,
+recycling the connection every two messages so STARTTLS runs several
+times. Checks that every message is accepted and that each connection
+really is encrypted.
+
+    python benchmarks/check_starttls.py
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from async_smtp import AsyncSmtpSession
+from bench_send import make_certificate
+from fake_smtp import FakeSmtpServer
+
+
+SENDER = 'bench@example.edu'
+TOTAL = 5
+
+
+def message(recipient):
+    return f'From: {SENDER}\r\nTo: {recipient}\r\nSubject: Check\r\n\r\nHello {recipient}\r\n'.encode('ascii')
+
+
+async def send(port):
+    """Returns (replies, TLS versions seen) for TOTAL single sends and TOTAL pipelined ones."""
+    session = AsyncSmtpSession('127.0.0.1', port, SENDER, 'bench', max_messages=2, use_tls=True, timeout=10)
+    replies = []
+    versions = set()
+    try:
+        for i in range(TOTAL):
+            recipient = f'single{i}@example.edu'
+            await session.sendmail(SENDER, recipient, message(recipient))
+            replies.append((250, b'sent'))
+            versions.add(session.writer.get_extra_info('ssl_object').version())
+        sent = 0
+        while sent < TOTAL:
+            recipients = [f'pipelined{i}@example.edu' for i in range(sent, min(TOTAL, sent + 2))]
+            replies.extend(await session.send_many(SENDER, [(r, message(r)) for r in recipients]))
+            versions.add(session.writer.get_extra_info('ssl_object').version())
+            sent += len(recipients)
+    finally:
+        await session.close()
+    return replies, versions
+
+
+def main():
+    work_dir = tempfile.mkdtemp(prefix='seb_check_')
+    try:
+        certfile, keyfile = make_certificate(work_dir)
+        # ssl.create_default_context() in async_smtp trusts this certificate.
+        os.environ['SSL_CERT_FILE'] = certfile
+        server = FakeSmtpServer(certfile=certfile, keyfile=keyfile).start()
+        try:
+            replies, versions = asyncio.run(send(server.port))
+        finally:
+            server.stop()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    accepted = sum(1 for reply in replies if reply is not None and reply[0] == 250)
+    if accepted != 2 * TOTAL or server.messages != 2 * TOTAL or None in versions:
+        print(f"❌ Expected {2 * TOTAL} messages over TLS; {accepted} accepted, "
+              f"{server.messages} received, TLS versions {versions}, replies {replies}")
+        return 1
+    print(f"✅ {server.messages} messages over {server.connections} STARTTLS connections ({', '.join(sorted(versions))})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import random
+import socket
+import socketserver
+import ssl
+import threading
+import time
+
+
+class FakeSmtpHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        # Replies are small writes; without this Nagle's algorithm delays
+        # pipelined replies by the client's delayed-ACK timer.
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().setup()
+        self.config = self.server.config
+
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode("ascii"))
+        self.wfile.flush()
+
+    def ehlo_lines(self, tls_active):
+        lines = ["fake.smtp.local", "PIPELINING", "8BITMIME", "AUTH PLAIN LOGIN"]
+        if self.config["tls_context"] is not None and not tls_active:
+            lines.append("STARTTLS")
+        return lines
+
+    def handle(self):
+        self.server.stats_connect()
+        self.reply("220 fake.smtp.local ESMTP ready")
+        tls_active = False
+        in_transaction = False
+        recipients = []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            verb = line.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                lines = self.ehlo_lines(tls_active)
+                for item in lines[:-1]:
+                    self.wfile.write(f"250-{item}\r\n".encode("ascii"))
+                self.reply(f"250 {lines[-1]}")
+            elif verb == "STARTTLS" and self.config["tls_context"] is not None:
+                self.reply("220 Ready to start TLS")
+                self.connection = self.config["tls_context"].wrap_socket(self.connection, server_side=True)
+                self.rfile = self.connection.makefile("rb")
+                self.wfile = self.connection.makefile("wb")
+                tls_active = True
+            elif verb == "AUTH":
+                parts = line.split()
+                if len(parts) == 2 and parts[1].upper() == "LOGIN":
+                    self.reply("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                elif len(parts) == 2:
+                    self.reply("334 ")
+                    self.rfile.readline()
+                self.server.stats_login()
+                self.reply(self.config["auth_reply"] or "235 Authentication successful")
+            elif verb == "MAIL":
+                recipients = []
+                reply = self.config["mail_reply"] or "250 OK"
+                in_transaction = reply.startswith("250")
+                self.reply(reply)
+            elif verb in ("RCPT", "DATA") and not in_transaction:
+                self.reply("503 5.5.1 Need MAIL command")
+            elif verb == "RCPT":
+                recipient = line[8:].strip().strip("<>")
+                rejection = self.config["rcpt_replies"].get(recipient)
+                if rejection:
+                    self.reply(rejection)
+                    continue
+                recipients.append(recipient)
+                self.reply("250 OK")
+            elif verb == "DATA":
+                if not recipients and not self.config["lenient_data"]:
+                    self.reply("554 No valid recipients")
+                    continue
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b".\r\n", b".\n"):
+                        break
+                    size += len(chunk)
+                latency = self.config["latency"]
+                if latency:
+                    time.sleep(latency)
+                failure = self.server.pick_failure()
+                recipients, accepted = [], recipients
+                in_transaction = False
+                if not accepted:
+                    self.reply("554 No valid recipients")
+                elif failure:
+                    self.reply(failure)
+                    if failure.startswith("421"):
+                        return
+                else:
+                    self.server.stats_message(accepted, size)
+                    self.reply("250 OK queued")
+            elif verb == "RSET":
+                recipients = []
+                in_transaction = False
+                self.reply("250 OK")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class FakeSmtpServer(socketserver.ThreadingTCPServer):
+    """
+    In-process SMTP stand-in for benchmarks.
+
+    latency delays every DATA reply, failure_rate injects the given failure
+    replies at random (a 421 also drops the connection), and passing
+    certfile/keyfile enables STARTTLS. auth_reply answers every login
+    instead of 235 (e.g. 535 for a wrong password) and mail_reply every
+    MAIL FROM; rcpt_replies maps addresses to the reply their RCPT TO gets instead of
+    250, and lenient_data accepts DATA even without a valid recipient, like
+    some servers do. Messages are counted, not stored.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0,
+                 failure_replies=("451 4.3.0 Temporary failure",), certfile=None,
+                 keyfile=None, seed=None, mail_reply=None, rcpt_replies=None, lenient_data=False,
+                 auth_reply=None):
+        tls_context = None
+        if certfile:
+            tls_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            tls_context.load_cert_chain(certfile, keyfile)
+        self.config = {
+            "latency": latency,
+            "tls_context": tls_context,
+            "mail_reply": mail_reply,
+            "rcpt_replies": dict(rcpt_replies or {}),
+            "lenient_data": lenient_data,
+            "auth_reply": auth_reply,
+        }
+        self.failure_rate = failure_rate
+        self.failure_replies = list(failure_replies)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.logins = 0
+        self.messages = 0
+        self.bytes_received = 0
+        self.thread = None
+        super().__init__((host, port), FakeSmtpHandler)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def pick_failure(self):
+        if not self.failure_rate:
+            return None
+        with self.lock:
+            if self.random.random() < self.failure_rate:
+                return self.random.choice(self.failure_replies)
+        return None
+
+    def stats_connect(self):
+        with self.lock:
+            self.connections += 1
+
+    def stats_login(self):
+        with self.lock:
+            self.logins += 1
+
+    def stats_message(self, recipients, size):
+        with self.lock:
+            self.messages += 1
+            self.bytes_received += size
+
+    def reset_stats(self):
+        with self.lock:
+            self.connections = 0
+            self.logins = 0
+            self.messages = 0
+            self.bytes_received = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
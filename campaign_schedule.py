@@ -0,0 +1,230 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+
+DEFAULT_SCHEDULE_FILE = 'schedule.json'
+# A batch is started this long before its start time; the rest is its
+# countdown, during which it logs in, renders and connects (see BatchWarmup).
+DEFAULT_LEAD = 120
+# A batch whose start time passed longer ago than this while the scheduler
+# was not running is marked missed instead of being sent late.
+DEFAULT_MAX_LATE = 6 * 3600
+POLL_INTERVAL = 30
+
+SCHEDULED = 'scheduled'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+MISSED = 'missed'
+CANCELLED = 'cancelled'
+
+START_FORMATS = ('%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%dT%H:%M:%S')
+
+
+@contextmanager
+def locked_file(path):
+    """
+    Holds an exclusive OS lock on path (created if missing), so only one
+    process at a time runs the block. Other processes wait for it.
+    """
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+
+            f.seek(0)
+            while True:
+                try:
+                    # Gives up with OSError after about ten seconds; keep waiting.
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def parse_start(text):
+    """Parses a local start time such as '2026-03-02 08:00'."""
+    for fmt in START_FORMATS:
+        try:
+            return datetime.strptime(text.strip(), fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Start time must look like 2026-03-02 08:00, not {text!r}")
+
+
+class CampaignSchedule:
+    """
+    Batches to send at set times, kept in a JSON file so they survive restarts.
+
+    Every change re-reads the file and replaces it atomically while holding
+    an OS lock on <file>.lock, so entries can be added or cancelled from
+    another command while the scheduler is running without either losing
+    the other's changes.
+    """
+
+    def __init__(self, path=DEFAULT_SCHEDULE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def locked(self):
+        """Holds the schedule for one read-modify-replace, against threads and other processes."""
+        with self.lock, locked_file(self.path + '.lock'):
+            yield
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self, entries):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix='schedule_', suffix='.json', dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def add(self, email_type, csv_file, start, options=None):
+        """Schedules a batch and returns its entry."""
+        with self.locked():
+            entries = self.load()
+            entry = {
+                'id': max((e['id'] for e in entries), default=0) + 1,
+                'type': email_type,
+                'csv': os.path.abspath(csv_file),
+                'start': start.isoformat(sep=' ', timespec='seconds'),
+                'options': options or {},
+                'status': SCHEDULED,
+            }
+            entries.append(entry)
+            self.save(entries)
+        return entry
+
+    def update(self, entry_id, **changes):
+        with self.locked():
+            entries = self.load()
+            for entry in entries:
+                if entry['id'] == entry_id:
+                    entry.update(changes)
+                    self.save(entries)
+                    return entry
+        return None
+
+    def cancel(self, entry_id):
+        """Cancels a batch that has not started. Returns False if there is none."""
+        with self.locked():
+            entries = self.load()
+            for entry in entries:
+                if entry['id'] == entry_id and entry['status'] == SCHEDULED:
+                    entry['status'] = CANCELLED
+                    self.save(entries)
+                    return True
+        return False
+
+    def upcoming(self):
+        """Entries still to run, interrupted ones first, then by start time."""
+        entries = [entry for entry in self.load() if entry['status'] in (SCHEDULED, RUNNING)]
+        return sorted(entries, key=lambda entry: (entry['status'] != RUNNING, entry['start']))
+
+
+def describe_entry(entry):
+    line = f"#{entry['id']} {entry['start']} {entry['type']} <- {entry['csv']} [{entry['status']}]"
+    if 'sent' in entry:
+        line += f" sent {entry['sent']}, failed {entry['failed']}"
+    if entry.get('error'):
+        line += f" ({entry['error']})"
+    return line
+
+
+def run_scheduler(schedule, run_batch, log=print, lead=DEFAULT_LEAD, max_late=DEFAULT_MAX_LATE,
+                  poll_interval=POLL_INTERVAL, stop_event=None):
+    """
+    Runs scheduled batches one at a time until stop_event is set.
+
+    Each batch is started lead seconds ahead of its start time through
+    run_batch(entry, delay), where delay is the number of seconds left
+    until the start time, and must return (success_count, fail_count),
+    None if it did not run, or CANCELLED if the operator stopped it before
+    it sent anything (Ctrl+C during its countdown), which stops the
+    scheduler and leaves the entry as it was. A batch that was running when
+    the scheduler stopped is started again at once; its CSV or database
+    status makes it send only the emails still pending. The schedule file is re-read at
+    least every poll_interval seconds, so changes are picked up while
+    waiting.
+    """
+    stop_event = stop_event or threading.Event()
+    log(f"Scheduler watching {os.path.abspath(schedule.path)} (Ctrl+C to stop).")
+    announced = None
+    while not stop_event.is_set():
+        upcoming = schedule.upcoming()
+        if not upcoming:
+            if announced != 'idle':
+                log("Nothing scheduled. Waiting for new batches...")
+                announced = 'idle'
+            stop_event.wait(poll_interval)
+            continue
+
+        entry = upcoming[0]
+        start = parse_start(entry['start'])
+        now = datetime.now()
+        if entry['status'] == SCHEDULED:
+            if (now - start).total_seconds() > max_late:
+                schedule.update(entry['id'], status=MISSED)
+                log(f"⚠️ Missed #{entry['id']} ({entry['type']} at {entry['start']}); not sending it this late.")
+                continue
+            wait = (start - now).total_seconds() - lead
+            if wait > 0:
+                if announced != entry['id']:
+                    log(f"Next: #{entry['id']} {entry['type']} at {entry['start']} "
+                        f"(preparing from {(start - timedelta(seconds=lead)).strftime('%H:%M:%S')}).")
+                    announced = entry['id']
+                stop_event.wait(min(wait, poll_interval))
+                continue
+            if start < now:
+                log(f"⚠️ #{entry['id']} was due at {entry['start']}; starting it now.")
+        else:
+            log(f"Resuming #{entry['id']} ({entry['type']}), which was interrupted.")
+
+        announced = None
+        delay = max(0, int((start - now).total_seconds()))
+        schedule.update(entry['id'], status=RUNNING, started_at=now.isoformat(sep=' ', timespec='seconds'))
+        try:
+            result = run_batch(entry, delay)
+        except KeyboardInterrupt:
+            log(f"Scheduler stopped during #{entry['id']}; it resumes with the emails "
+                "still pending when the scheduler starts again.")
+            raise
+        except Exception as e:
+            schedule.update(entry['id'], status=FAILED, error=str(e))
+            log(f"❌ Batch #{entry['id']} failed: {e}")
+            continue
+        if result == CANCELLED:
+            schedule.update(entry['id'], status=entry['status'])
+            log(f"Scheduler stopped before #{entry['id']} sent anything; it stays in the schedule "
+                f"for {entry['start']}.")
+            return
+        finished = datetime.now().isoformat(sep=' ', timespec='seconds')
+        if result is None:
+            schedule.update(entry['id'], status=FAILED, finished_at=finished, error='did not run; see the log')
+            log(f"❌ Batch #{entry['id']} did not run.")
+            continue
+        sent, failed = result
+        schedule.update(entry['id'], status=DONE, finished_at=finished, sent=sent, failed=failed)
+        log(f"✅ Batch #{entry['id']} finished: {sent} sent, {failed} failed.")
@@ -0,0 +1,270 @@
+import csv
+import os
+import threading
+from collections import deque
+
+from address_index import DUPLICATE_STATUS, normalize_address
+from send_journal import SendJournal, journal_path_for
+
+
+DEFAULT_PREVIEW_SIZE = 10
+
+
+def read_header(csv_file):
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def journal_overlays(csv_file):
+    """
+    Returns {status column: {row index: (email, status)}} from a leftover
+    journal, so an interrupted streaming run resumes without a rewrite.
+    A result only applies to its row if the row still has that address
+    (compared normalized).
+    """
+    overlays = {}
+    for record in SendJournal.replay(journal_path_for(csv_file)):
+        if isinstance(record.get('row'), int):
+            overlay = overlays.setdefault(f"{record['type']}_emailed", {})
+            overlay[record['row']] = (record.get('email'), record['status'])
+    return overlays
+
+
+class CsvRowStream:
+    """
+    Yields the pending rows of a CSV one at a time without loading the file.
+
+    scan() makes one cheap pass to count rows and keep a bounded preview;
+    iterating makes a second pass and yields each pending row as a dict.
+    Rows in flight are remembered by identity so a status writer can map
+    them back to their CSV position.
+    """
+
+    def __init__(self, csv_file, fieldnames, email_col, status_col, is_sent, overlays=None):
+        self.csv_file = csv_file
+        self.fieldnames = fieldnames
+        self.email_col = email_col
+        self.status_col = status_col
+        self.is_sent = is_sent
+        self.overlays = overlays if overlays is not None else {}
+        self.overlay = self.overlays.setdefault(status_col, {})
+        self.email_index = fieldnames.index(email_col)
+        self.status_index = fieldnames.index(status_col) if status_col in fieldnames else None
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.iterator = None
+        self.skipped = set()
+
+    def email_of(self, values):
+        return values[self.email_index] if self.email_index < len(values) else ''
+
+    def collapse_duplicates(self, address_index):
+        """
+        Makes two extra passes: one marks the addresses of rows already sent,
+        the other drops pending rows whose address is sent or repeats an
+        earlier pending row (see AddressIndex). Only the address hash sets and
+        the positions of dropped rows are kept in memory, not the rows.
+        """
+        for index, values in self.raw_rows():
+            if not self.row_is_pending(index, values):
+                address_index.mark_sent(self.email_of(values))
+        for index, values in self.raw_rows():
+            if self.row_is_pending(index, values) and not address_index.admit(self.email_of(values), index + 1):
+                self.skipped.add(index)
+
+    def row_is_pending(self, index, values):
+        if index in self.skipped:
+            return False
+        override = self.overlay.get(index)
+        if override is not None and normalize_address(override[0]) == normalize_address(self.email_of(values)):
+            return not self.is_sent(override[1])
+        if self.status_index is None or self.status_index >= len(values):
+            return True
+        return not self.is_sent(values[self.status_index])
+
+    def raw_rows(self):
+        with open(self.csv_file, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            index = 0
+            for values in reader:
+                if values:
+                    yield index, values
+                    index += 1
+
+    def scan(self, preview_size=DEFAULT_PREVIEW_SIZE):
+        """
+        Returns (total, pending, preview) where preview holds (position, row)
+        pairs for the first and last preview_size pending rows.
+        """
+        total = 0
+        pending = 0
+        head = []
+        tail = deque(maxlen=preview_size)
+        for index, values in self.raw_rows():
+            total += 1
+            if not self.row_is_pending(index, values):
+                continue
+            pending += 1
+            if len(head) < preview_size:
+                head.append((pending, values))
+            else:
+                tail.append((pending, values))
+        preview = [(position, self.to_dict(values)) for position, values in head + list(tail)]
+        return total, pending, preview
+
+    def to_dict(self, values):
+        row = dict(zip(self.fieldnames, values))
+        for name in self.fieldnames[len(values):]:
+            row[name] = ''
+        return row
+
+    def __iter__(self):
+        self.iterator = self.iterate()
+        return self.iterator
+
+    def iterate(self):
+        for index, values in self.raw_rows():
+            if self.row_is_pending(index, values):
+                row = self.to_dict(values)
+                with self.lock:
+                    self.in_flight[id(row)] = index
+                yield row
+
+    def release(self, row):
+        with self.lock:
+            return self.in_flight.pop(id(row), None)
+
+    def close(self):
+        """Stops an unfinished pass so the CSV file is no longer held open."""
+        if self.iterator is not None:
+            self.iterator.close()
+            self.iterator = None
+
+
+class StatusCopy:
+    """
+    Copy of a roster written row by row, in order, next to it.
+
+    Each {status column: {row index: (email, status)}} overlay is applied
+    and missing status columns are added to the header; applied counts the
+    results that matched their row. replace() moves the finished copy over
+    the roster.
+    """
+
+    def __init__(self, csv_file, email_col, overlays):
+        self.csv_file = csv_file
+        self.temp_path = csv_file + '.partial'
+        self.src = open(csv_file, 'r', encoding='utf-8', newline='')
+        self.dst = open(self.temp_path, 'w', encoding='utf-8', newline='')
+        self.reader = csv.reader(self.src)
+        self.writer = csv.writer(self.dst)
+        self.header = next(self.reader, [])
+        for status_col in overlays:
+            if status_col not in self.header:
+                self.header.append(status_col)
+        self.email_index = self.header.index(email_col)
+        self.columns = [(self.header.index(status_col), overlay) for status_col, overlay in overlays.items()]
+        self.writer.writerow(self.header)
+        self.index = 0
+        self.applied = 0
+        self.values = self.read()
+
+    def read(self):
+        """Returns the values of the next non-empty source row, or None at the end."""
+        for values in self.reader:
+            if values:
+                return values
+        return None
+
+    def write(self, status_index=None, status=None):
+        """Copies the current row (setting status_index to status if given) and moves to the next."""
+        values = self.values
+        if len(values) < len(self.header):
+            values.extend([''] * (len(self.header) - len(values)))
+        for column, overlay in self.columns:
+            override = overlay.get(self.index)
+            if override is not None and normalize_address(override[0]) == normalize_address(values[self.email_index]):
+                values[column] = override[1]
+                self.applied += 1
+        if status_index is not None:
+            values[status_index] = status
+        self.writer.writerow(values)
+        self.index += 1
+        self.values = self.read()
+
+    def replace(self):
+        self.src.close()
+        self.dst.close()
+        os.replace(self.temp_path, self.csv_file)
+
+    def abort(self):
+        """Drops the copy and leaves the roster as it was."""
+        self.src.close()
+        self.dst.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class StreamingCsvStatusWriter:
+    """
+    Status writer for streamed batches.
+
+    Results go to the same append-only journal as CsvStatusWriter and are
+    written through to a StatusCopy of the roster: rows are copied in order
+    (rows collapse_duplicates skipped with DUPLICATE_STATUS) as soon as
+    every row before them is done, and their results forgotten,
+    so only results that finish ahead of a row still sending or waiting for
+    a retry are held in memory. When the batch ends the rest of the roster
+    is copied and the copy replaces it. Until then the journal alone is what
+    lets an interrupted run resume.
+    """
+
+    def __init__(self, stream, email_type):
+        self.stream = stream
+        self.email_type = email_type
+        self.journal = SendJournal(journal_path_for(stream.csv_file))
+        self.lock = threading.Lock()
+        self.results = {}
+        self.copy = StatusCopy(stream.csv_file, stream.email_col, stream.overlays)
+        self.status_index = self.copy.header.index(stream.status_col)
+
+    def record(self, row, status, sender=None):
+        index = self.stream.release(row)
+        email = row.get(self.stream.email_col)
+        self.journal.append({
+            'row': index,
+            'email': email,
+            'type': self.email_type,
+            'status': status,
+            'sender': sender,
+        })
+        if index is not None:
+            with self.lock:
+                self.results[index] = status
+                self.flush()
+
+    def flush(self, finish=False):
+        """
+        Copies rows up to the first one that may still get a result (or all
+        of them if finish), each with its result if it has one.
+        """
+        copy = self.copy
+        while copy.values is not None:
+            status = self.results.pop(copy.index, None)
+            if status is None and copy.index in self.stream.skipped:
+                status = DUPLICATE_STATUS
+            if status is not None:
+                copy.write(self.status_index, status)
+            elif finish or not self.stream.row_is_pending(copy.index, copy.values):
+                copy.write()
+            else:
+                return
+
+    def close(self):
+        self.stream.close()
+        with self.lock:
+            self.flush(finish=True)
+        self.journal.sync()
+        self.copy.replace()
+        self.journal.close(remove=True)
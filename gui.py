@@ -1,44 +1,450 @@
 import csv
 import os
-import shutil
+import queue
 import sys
-import tempfile
 import threading
 import time
 import tkinter as tk
+from collections import Counter, deque
+from datetime import datetime, timedelta
 from tkinter import filedialog, messagebox, ttk
 
-from dotenv import load_dotenv
-
-import send
+import metrics
+from address_index import DUPLICATE_STATUS, normalize_address
 
+# send (and with it dotenv, smtplib, ssl, asyncio and the email package) is
+# imported inside the functions that use it, so the window opens without
+# waiting for it; preload_send() loads it in the background once it is up.
 ENV_PATH = ".env"
 DEFAULT_SMTP_SERVER = "smtp.gmail.com"
 DEFAULT_SMTP_PORT = "587"
 DEFAULT_ORG_NAME = "Student Election Board"
+DEFAULT_EMAIL_DELAY = 30
+DEFAULT_WORKERS = 1
+DEFAULT_BACKEND = "sync"
+PRELOAD_DELAY_MS = 300
 STATUS_TRUE_VALUES = {"yes", "y", "true", "1", "sent", "done"}
+LOG_MAX_LINES = 2000
+LOG_DRAIN_INTERVAL_MS = 100
+LOG_FILE = "email_sender.log"
+LOG_CLEAR = object()
+PROGRESS_REFRESH_MS = 500
+ETA_REFRESH_SECONDS = 5.0
+CHART_POINTS = 60
+RECIPIENT_STATUSES = ("pending", "sent", "failed", DUPLICATE_STATUS)
+RECIPIENT_FILTERS = ("All", "Pending", "Sent", "Failed", "Duplicate")
+RECIPIENT_REFRESH_MS = 250
+RECIPIENT_ROW_HEIGHT = 20
+RECIPIENT_HEADER_HEIGHT = 26
+RECIPIENT_WHEEL_ROWS = 3
+SEARCH_DELAY_MS = 150
+VIEW_REBUILD_SECONDS = 1.0
 
 
 class UiLogger:
-    def __init__(self, text_widget):
+    """
+    Status log that any thread can write to.
+
+    write() only puts the line on a queue (and appends it to the spill file,
+    if one is open); the Tk main loop drains the queue every
+    LOG_DRAIN_INTERVAL_MS with a single insert and scroll, and keeps only the
+    last max_lines lines in the widget so a long campaign cannot slow the
+    window down.
+    """
+
+    def __init__(self, text_widget, max_lines=LOG_MAX_LINES, spill_path=None):
         self.text_widget = text_widget
-        self.lock = threading.Lock()
+        self.max_lines = max_lines
+        self.queue = queue.SimpleQueue()
+        self.spill_lock = threading.Lock()
+        self.spill_file = None
+        self.set_spill(spill_path)
+        self.text_widget.after(LOG_DRAIN_INTERVAL_MS, self.drain)
 
     def write(self, message):
         if not message:
             return
-        with self.lock:
-            self.text_widget.configure(state="normal")
-            self.text_widget.insert(tk.END, message + "\n")
-            self.text_widget.see(tk.END)
-            self.text_widget.configure(state="disabled")
+        self.queue.put(message)
+        if self.spill_file is not None:
+            with self.spill_lock:
+                if self.spill_file is not None:
+                    self.spill_file.write(message + "\n")
 
     def clear(self):
-        with self.lock:
+        self.queue.put(LOG_CLEAR)
+
+    def set_spill(self, path):
+        """Starts (or with None, stops) appending every log line to path."""
+        with self.spill_lock:
+            if self.spill_file is not None:
+                self.spill_file.close()
+            self.spill_file = open(path, "a", encoding="utf-8") if path else None
+
+    def drain(self):
+        lines = deque(maxlen=self.max_lines)
+        cleared = False
+        while True:
+            try:
+                message = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if message is LOG_CLEAR:
+                lines.clear()
+                cleared = True
+            else:
+                lines.append(message)
+
+        if lines or cleared:
             self.text_widget.configure(state="normal")
-            self.text_widget.delete("1.0", tk.END)
+            if cleared:
+                self.text_widget.delete("1.0", tk.END)
+            if lines:
+                self.text_widget.insert(tk.END, "\n".join(lines) + "\n")
+                # Counted in the widget, since one message can span several lines.
+                # The text ends with a newline, so end-1c is on an empty last line.
+                excess = int(self.text_widget.index("end-1c").split(".")[0]) - 1 - self.max_lines
+                if excess > 0:
+                    self.text_widget.delete("1.0", f"{excess + 1}.0")
+                self.text_widget.see(tk.END)
             self.text_widget.configure(state="disabled")
 
+        with self.spill_lock:
+            if self.spill_file is not None:
+                self.spill_file.flush()
+        self.text_widget.after(LOG_DRAIN_INTERVAL_MS, self.drain)
+
+    def close(self):
+        self.set_spill(None)
+
+
+class ProgressPanel:
+    """
+    Progress bar, sent/failed/pending counters, send rate, ETA and a small
+    chart of recent SMTP send times for the running batch.
+
+    The panel polls the batch's SendMetrics from the Tk main loop every
+    PROGRESS_REFRESH_MS, so sending threads never touch the widgets and the
+    cost does not grow with the send rate.
+    """
+
+    def __init__(self, parent):
+        self.frame = ttk.LabelFrame(parent, text="Progress", padding=10)
+        self.frame.pack(fill=tk.X, pady=(0, 10))
+        self.bar = ttk.Progressbar(self.frame, mode="determinate", maximum=1)
+        self.bar.pack(fill=tk.X)
+        row = ttk.Frame(self.frame)
+        row.pack(fill=tk.X, pady=(6, 0))
+        self.counts_var = tk.StringVar(value="Sent: 0   Failed: 0   Pending: 0")
+        self.rate_var = tk.StringVar(value="Rate: -   ETA: -")
+        ttk.Label(row, textvariable=self.counts_var).pack(side=tk.LEFT)
+        ttk.Label(row, textvariable=self.rate_var).pack(side=tk.LEFT, padx=16)
+        self.chart = tk.Canvas(
+            row, width=240, height=40, background="white", highlightthickness=1, highlightbackground="#cccccc"
+        )
+        self.chart.pack(side=tk.RIGHT)
+        self.batch = None
+        self.finished = False
+        self.schedule_seconds = 0.0
+        self.schedule_checked = None
+        self.frame.after(PROGRESS_REFRESH_MS, self.refresh)
+
+    def start(self, batch_metrics, limiter, pending_count):
+        """Starts following a batch. Safe to call from a sending thread."""
+        self.schedule_checked = None
+        self.finished = False
+        self.batch = (batch_metrics, limiter, pending_count)
+
+    def finish(self):
+        self.finished = True
+
+    def refresh(self):
+        batch = self.batch
+        if batch is not None:
+            self.update(*batch)
+            if self.finished:
+                self.batch = None
+        self.frame.after(PROGRESS_REFRESH_MS, self.refresh)
+
+    def update(self, batch_metrics, limiter, pending_count):
+        snapshot = batch_metrics.snapshot(CHART_POINTS)
+        done = snapshot["sent"] + snapshot["failed"]
+        remaining = max(0, pending_count - done)
+        self.bar.configure(maximum=max(1, pending_count), value=done)
+        self.counts_var.set(f"Sent: {snapshot['sent']}   Failed: {snapshot['failed']}   Pending: {remaining}")
+
+        # The limiter's schedule is the earliest possible finish; the observed
+        # rate takes over when the server is the slower of the two.
+        now = time.monotonic()
+        if self.schedule_checked is None or now - self.schedule_checked >= ETA_REFRESH_SECONDS:
+            self.schedule_seconds = limiter.estimate_duration(remaining)
+            self.schedule_checked = now
+        seconds = max(0.0, self.schedule_seconds - (now - self.schedule_checked))
+        per_minute = snapshot["per_minute"]
+        if per_minute > 0:
+            seconds = max(seconds, remaining * 60.0 / per_minute)
+        if remaining and (per_minute > 0 or self.schedule_seconds):
+            finish = (datetime.now() + timedelta(seconds=seconds)).strftime("%H:%M")
+            hours, rest = divmod(int(seconds), 3600)
+            eta = f"{hours:d}h {rest // 60:02d}m (around {finish})"
+        else:
+            eta = "-"
+        self.rate_var.set(f"Rate: {per_minute:.1f}/min   ETA: {eta}")
+        self.draw_chart(snapshot["latencies"])
+
+    def draw_chart(self, latencies):
+        self.chart.delete("all")
+        if len(latencies) < 2:
+            return
+        width = int(self.chart.cget("width"))
+        height = int(self.chart.cget("height"))
+        top = max(latencies) or 1.0
+        step = (width - 4) / (CHART_POINTS - 1)
+        offset = CHART_POINTS - len(latencies)
+        points = []
+        for i, value in enumerate(latencies):
+            points.append(2 + (offset + i) * step)
+            points.append(height - 2 - (value / top) * (height - 14))
+        self.chart.create_line(*points, fill="#3367d6")
+        self.chart.create_text(4, 2, anchor="nw", text=f"send max {top * 1000:.0f} ms", font=("TkDefaultFont", 7))
+
+
+class RecipientPanel:
+    """
+    Table of a roster's recipients and their send status.
+
+    The Treeview only holds as many items as fit on screen; scrolling fills
+    those same items with other recipients, so a roster of 100,000 students
+    costs no more widgets than one of 20. Filtering and search run over plain
+    lists (a status and a lowercased "name email" key per recipient), and
+    results reported by sending threads are queued by record() and applied
+    on the Tk main loop every RECIPIENT_REFRESH_MS.
+    """
+
+    def __init__(self, parent, on_load):
+        self.frame = ttk.Frame(parent, padding=10)
+        controls = ttk.Frame(self.frame)
+        controls.pack(fill=tk.X, pady=(0, 6))
+        ttk.Label(controls, text="Show").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar(value=RECIPIENT_FILTERS[0])
+        filter_box = ttk.Combobox(
+            controls, textvariable=self.filter_var, values=RECIPIENT_FILTERS, state="readonly", width=10
+        )
+        filter_box.pack(side=tk.LEFT, padx=6)
+        filter_box.bind("<<ComboboxSelected>>", lambda event: self.apply_filter())
+        ttk.Label(controls, text="Search name or email").pack(side=tk.LEFT, padx=(12, 0))
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
+        ttk.Entry(controls, textvariable=self.search_var, width=32).pack(side=tk.LEFT, padx=6)
+        ttk.Button(controls, text="Load List", command=on_load).pack(side=tk.RIGHT)
+
+        table = ttk.Frame(self.frame)
+        table.pack(fill=tk.BOTH, expand=True)
+        ttk.Style(self.frame).configure("Recipients.Treeview", rowheight=RECIPIENT_ROW_HEIGHT)
+        self.tree = ttk.Treeview(
+            table,
+            columns=("row", "name", "email", "status"),
+            show="headings",
+            selectmode="browse",
+            style="Recipients.Treeview",
+            height=1,
+        )
+        for column, heading, width, stretch in (
+            ("row", "#", 70, False),
+            ("name", "Name", 260, True),
+            ("email", "Email", 320, True),
+            ("status", "Status", 90, False),
+        ):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, stretch=stretch)
+        self.tree.tag_configure("sent", foreground="#2e7d32")
+        self.tree.tag_configure("failed", foreground="#c62828")
+        self.tree.tag_configure(DUPLICATE_STATUS, foreground="#757575")
+        self.scrollbar = ttk.Scrollbar(table, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_wheel)
+        self.tree.bind("<Button-4>", self.on_wheel)
+        self.tree.bind("<Button-5>", self.on_wheel)
+        for key, args in (
+            ("<Up>", ("scroll", -1, "units")),
+            ("<Down>", ("scroll", 1, "units")),
+            ("<Prior>", ("scroll", -1, "pages")),
+            ("<Next>", ("scroll", 1, "pages")),
+            ("<Home>", ("moveto", 0)),
+            ("<End>", ("moveto", 1)),
+        ):
+            self.tree.bind(key, lambda event, args=args: self.on_scroll(*args) or "break")
+
+        self.summary_var = tk.StringVar(value="No list loaded. Click Load List or start a batch.")
+        ttk.Label(self.frame, textvariable=self.summary_var).pack(anchor="w", pady=(6, 0))
+
+        self.names = []
+        self.emails = []
+        self.statuses = []
+        self.keys = []
+        self.positions = {}
+        self.counts = Counter()
+        self.query = ""
+        self.matches = None
+        self.view = range(0)
+        self.first = 0
+        self.items = []
+        self.loaded = None
+        self.updates = queue.SimpleQueue()
+        self.view_stale = False
+        self.view_built = 0.0
+        self.search_job = None
+        self.frame.after(RECIPIENT_REFRESH_MS, self.refresh)
+
+    def show(self, recipients):
+        """
+        Replaces the list with [(name, email, status)]. Safe to call from any
+        thread; the search keys are built here, off the Tk main loop.
+        """
+        names = []
+        emails = []
+        statuses = []
+        keys = []
+        positions = {}
+        for position, (name, email, status) in enumerate(recipients):
+            names.append(name)
+            emails.append(email)
+            statuses.append(status)
+            keys.append(f"{name}\n{email}".lower())
+            positions.setdefault(email.strip().lower(), []).append(position)
+        self.loaded = (names, emails, statuses, keys, positions, Counter(statuses))
+
+    def record(self, email, status):
+        """Marks a recipient sent or failed. Safe to call from any thread."""
+        self.updates.put((email, status))
+
+    def refresh(self):
+        loaded = self.loaded
+        if loaded is not None:
+            self.loaded = None
+            self.names, self.emails, self.statuses, self.keys, self.positions, self.counts = loaded
+            self.matches = None
+            self.query = ""
+            self.first = 0
+            self.search()
+        if self.apply_updates():
+            # Rows that no longer match the status filter drop out on the next
+            # rebuild; until then they are shown with their new status.
+            self.view_stale = self.filter_var.get() != RECIPIENT_FILTERS[0]
+            self.render()
+        if self.view_stale and time.monotonic() - self.view_built >= VIEW_REBUILD_SECONDS:
+            self.build_view()
+        self.frame.after(RECIPIENT_REFRESH_MS, self.refresh)
+
+    def apply_updates(self):
+        changed = False
+        while True:
+            try:
+                email, status = self.updates.get_nowait()
+            except queue.Empty:
+                break
+            for position in self.positions.get((email or "").strip().lower(), ()):
+                previous = self.statuses[position]
+                # A duplicate row shares its address with the row that was sent.
+                if previous != status and previous != DUPLICATE_STATUS:
+                    self.counts[previous] -= 1
+                    self.counts[status] += 1
+                    self.statuses[position] = status
+                    changed = True
+        return changed
+
+    def schedule_search(self):
+        if self.search_job is not None:
+            self.frame.after_cancel(self.search_job)
+        self.search_job = self.frame.after(SEARCH_DELAY_MS, self.search)
+
+    def search(self):
+        self.search_job = None
+        query = self.search_var.get().strip().lower()
+        if not query:
+            self.matches = None
+        else:
+            # Typing more of a query can only narrow it, so only the previous
+            # matches need checking again.
+            if self.matches is not None and self.query in query:
+                candidates = self.matches
+            else:
+                candidates = range(len(self.keys))
+            keys = self.keys
+            self.matches = [position for position in candidates if query in keys[position]]
+        self.query = query
+        self.first = 0
+        self.build_view()
+
+    def apply_filter(self):
+        self.first = 0
+        self.build_view()
+
+    def build_view(self):
+        candidates = self.matches if self.matches is not None else range(len(self.statuses))
+        wanted = self.filter_var.get().lower()
+        if wanted in RECIPIENT_STATUSES:
+            statuses = self.statuses
+            self.view = [position for position in candidates if statuses[position] == wanted]
+        else:
+            self.view = candidates
+        self.view_stale = False
+        self.view_built = time.monotonic()
+        self.scroll_to(self.first)
+
+    def scroll_to(self, first):
+        self.first = max(0, min(int(first), len(self.view) - len(self.items)))
+        self.render()
+
+    def render(self):
+        view = self.view
+        for slot, item in enumerate(self.items):
+            index = self.first + slot
+            if index < len(view):
+                position = view[index]
+                status = self.statuses[position]
+                values = (position + 1, self.names[position], self.emails[position], status)
+                self.tree.item(item, values=values, tags=(status,))
+            else:
+                self.tree.item(item, values=(), tags=())
+        total = len(view)
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + len(self.items)) / total))
+        else:
+            self.scrollbar.set(0, 1)
+        self.summary_var.set(
+            f"Showing {total} of {len(self.statuses)}   Pending: {self.counts['pending']}   "
+            f"Sent: {self.counts['sent']}   Failed: {self.counts['failed']}   "
+            f"Duplicates: {self.counts[DUPLICATE_STATUS]}"
+        )
+
+    def on_resize(self, event):
+        box = self.tree.bbox(self.items[0]) if self.items else ""
+        top, row_height = (box[1], box[3]) if box else (RECIPIENT_HEADER_HEIGHT, RECIPIENT_ROW_HEIGHT)
+        rows = max(1, (event.height - top) // max(1, row_height))
+        while len(self.items) < rows:
+            self.items.append(self.tree.insert("", tk.END, values=()))
+        while len(self.items) > rows:
+            self.tree.delete(self.items.pop())
+        self.scroll_to(self.first)
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * len(self.view))
+        else:
+            step = int(amount)
+            if unit == "pages":
+                step *= max(1, len(self.items) - 1)
+            self.scroll_to(self.first + step)
+
+    def on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self.first - RECIPIENT_WHEEL_ROWS)
+        else:
+            self.scroll_to(self.first + RECIPIENT_WHEEL_ROWS)
+        return "break"
+
 
 class StreamToLogger:
     def __init__(self, logger):
@@ -54,6 +460,8 @@ class StreamToLogger:
 
 
 def load_env_values():
+    from dotenv import load_dotenv
+
     load_dotenv(ENV_PATH, override=True)
     return {
         "SMTP_SERVER": os.getenv("SMTP_SERVER", DEFAULT_SMTP_SERVER),
@@ -68,26 +476,51 @@ def load_env_values():
     }
 
 
+ENV_KEYS = [
+    "SMTP_SERVER",
+    "SMTP_PORT",
+    "SENDER_EMAIL",
+    "SENDER_PASSWORD",
+    "ALTERNATIVE_EMAIL_FORM_LINK",
+    "BALLOT_LINK",
+    "PRECINCT_LOCATION",
+    "ORG_NAME",
+    "CONTACT_EMAIL",
+]
+
+
+def read_extra_env_lines():
+    """Returns settings in .env that the GUI does not manage, e.g. rate limits."""
+    if not os.path.exists(ENV_PATH):
+        return []
+    extra = []
+    with open(ENV_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            key = line.split("=", 1)[0].strip()
+            if "=" in line and not line.lstrip().startswith("#") and key not in ENV_KEYS:
+                extra.append(line)
+    return extra
+
+
 def write_env(values):
     lines = []
-    for key in [
-        "SMTP_SERVER",
-        "SMTP_PORT",
-        "SENDER_EMAIL",
-        "SENDER_PASSWORD",
-        "ALTERNATIVE_EMAIL_FORM_LINK",
-        "BALLOT_LINK",
-        "PRECINCT_LOCATION",
-        "ORG_NAME",
-        "CONTACT_EMAIL",
-    ]:
+    for key in ENV_KEYS:
         val = values.get(key, "")
         lines.append(f"{key}={val}")
+    lines.extend(read_extra_env_lines())
     with open(ENV_PATH, "w", encoding="utf-8") as f:
         f.write("\n".join(lines) + "\n")
 
 
+def preload_send():
+    """Imports send on a background thread so the first Send click does not wait for it."""
+    threading.Thread(target=lambda: __import__("send"), daemon=True).start()
+
+
 def reload_send_config():
+    import send
+
     values = load_env_values()
     send.SMTP_SERVER = values["SMTP_SERVER"]
     try:
@@ -101,10 +534,16 @@ def reload_send_config():
     send.BALLOT_LINK = values["BALLOT_LINK"]
     send.ORG_NAME = values["ORG_NAME"]
     send.CONTACT_EMAIL = values["CONTACT_EMAIL"]
+    send.RATE_LIMIT_PER_MINUTE = send.env_limit("RATE_LIMIT_PER_MINUTE")
+    send.RATE_LIMIT_PER_HOUR = send.env_limit("RATE_LIMIT_PER_HOUR")
+    send.RATE_LIMIT_PER_DAY = send.env_limit("RATE_LIMIT_PER_DAY")
+    send.SENT_LEDGER = os.getenv("SENT_LEDGER", send.DEFAULT_LEDGER_FILE)
     return values
 
 
 def parse_csv(csv_path):
+    import send
+
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV file not found: {csv_path}")
 
@@ -116,24 +555,11 @@ def parse_csv(csv_path):
     if not rows:
         raise ValueError("CSV file is empty.")
 
-    first_row = rows[0]
-    headers = {k.lower().strip(): k for k in first_row.keys()}
-
-    email_col = None
-    name_col = None
-    for key in headers:
-        if key == "email":
-            email_col = headers[key]
-        elif key in {"name", "student_name"}:
-            name_col = headers[key]
-
-    for key in headers:
-        if key.endswith("_emailed"):
-            continue
-        if not email_col and "email" in key:
-            email_col = headers[key]
-        elif not name_col and "name" in key:
-            name_col = headers[key]
+    if not fieldnames:
+        fieldnames = list(rows[0].keys())
+
+    email_col, name_col = send.detect_columns(fieldnames)
+
     missing_cols = []
     if not email_col:
         missing_cols.append("email")
@@ -147,9 +573,6 @@ def parse_csv(csv_path):
             + ". Expected: email,name"
         )
 
-    if not fieldnames:
-        fieldnames = list(rows[0].keys())
-
     return rows, fieldnames, email_col, name_col
 
 
@@ -159,6 +582,54 @@ def status_is_sent(value):
     return str(value).strip().lower() in STATUS_TRUE_VALUES
 
 
+def recipient_status(value):
+    """Maps a *_emailed value to pending, sent, failed or duplicate."""
+    if status_is_sent(value):
+        return "sent"
+    value = str(value or "").strip().lower()
+    if value in ("failed", DUPLICATE_STATUS):
+        return value
+    return "pending"
+
+
+def read_recipients(csv_path, email_type, duplicates=()):
+    """
+    Returns [(name, email, status)] for every row of a roster.
+
+    Only the name, email and status columns are kept, and results left in
+    the journal by an interrupted run are applied, so the list matches what
+    a batch would send. Rows whose 0-based index is in duplicates are shown
+    as duplicate (see CsvRowStream.skipped).
+    """
+    import send
+
+    status_col = f"{email_type}_emailed"
+    overlay = send.journal_overlays(csv_path).get(status_col, {})
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        fieldnames = next(reader, [])
+        email_col, name_col = send.detect_columns(fieldnames)
+        if not email_col or not name_col:
+            raise ValueError("CSV is missing required columns. Expected: email,name")
+        email_index = fieldnames.index(email_col)
+        name_index = fieldnames.index(name_col)
+        status_index = fieldnames.index(status_col) if status_col in fieldnames else len(fieldnames)
+        recipients = []
+        for values in reader:
+            if not values:
+                continue
+            email = values[email_index] if email_index < len(values) else ""
+            status = values[status_index] if status_index < len(values) else ""
+            override = overlay.get(len(recipients))
+            if override is not None and normalize_address(override[0]) == normalize_address(email):
+                status = override[1]
+            if len(recipients) in duplicates:
+                status = DUPLICATE_STATUS
+            name = values[name_index] if name_index < len(values) else ""
+            recipients.append((name, email, recipient_status(status)))
+    return recipients
+
+
 def ensure_status_column(fieldnames, email_type):
     status_col = f"{email_type}_emailed"
     if status_col not in fieldnames:
@@ -166,17 +637,6 @@ def ensure_status_column(fieldnames, email_type):
     return status_col
 
 
-def write_csv_rows(csv_path, fieldnames, rows):
-    directory = os.path.dirname(csv_path) or "."
-    fd, temp_path = tempfile.mkstemp(prefix="emails_", suffix=".csv", dir=directory)
-    with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
-    shutil.move(temp_path, csv_path)
-
-
 class EmailSenderGui:
     def __init__(self, root):
         self.root = root
@@ -184,11 +644,13 @@ class EmailSenderGui:
         self.cancel_event = threading.Event()
 
         self.build_ui()
-        self.load_env_into_fields()
+        # Filled in once the window is drawn; dotenv is not imported before.
+        self.root.after_idle(self.load_env_into_fields)
+        self.root.after(PRELOAD_DELAY_MS, preload_send)
 
     def build_ui(self):
-        self.root.geometry("980x680")
-        self.root.minsize(920, 620)
+        self.root.geometry("980x780")
+        self.root.minsize(920, 700)
 
         main_frame = ttk.Frame(self.root, padding=10)
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -226,7 +688,8 @@ class EmailSenderGui:
         self.mode_var = tk.StringVar(value="batch")
         self.type_var = tk.StringVar(value="blast")
         self.delay_var = tk.StringVar(value="30")
-        self.email_delay_var = tk.StringVar(value=str(send.DEFAULT_DELAY_BETWEEN_EMAILS))
+        self.email_delay_var = tk.StringVar(value=str(DEFAULT_EMAIL_DELAY))
+        self.workers_var = tk.StringVar(value=str(DEFAULT_WORKERS))
 
         mode_row = ttk.Frame(send_frame)
         mode_row.pack(fill=tk.X)
@@ -262,6 +725,21 @@ class EmailSenderGui:
         self.csv_entry.pack(side=tk.LEFT, padx=8)
         self.browse_button = ttk.Button(file_row, text="Browse", command=self.browse_csv)
         self.browse_button.pack(side=tk.LEFT)
+        self.use_store_var = tk.BooleanVar(value=False)
+        self.use_store_check = ttk.Checkbutton(
+            file_row, text="Track status in database (large lists)", variable=self.use_store_var
+        )
+        self.use_store_check.pack(side=tk.LEFT, padx=8)
+
+        campaign_row = ttk.Frame(send_frame)
+        campaign_row.pack(fill=tk.X)
+        self.campaign_var = tk.StringVar()
+        ttk.Label(campaign_row, text="Campaign").pack(side=tk.LEFT)
+        self.campaign_entry = ttk.Entry(campaign_row, textvariable=self.campaign_var, width=24)
+        self.campaign_entry.pack(side=tk.LEFT, padx=8)
+        ttk.Label(
+            campaign_row, text="Optional, e.g. 2026-general: never send an address the same email twice under this name"
+        ).pack(side=tk.LEFT)
 
         single_row = ttk.Frame(send_frame)
         single_row.pack(fill=tk.X, pady=6)
@@ -280,21 +758,48 @@ class EmailSenderGui:
         ttk.Entry(timing_row, textvariable=self.delay_var, width=8).pack(side=tk.LEFT, padx=6)
         ttk.Label(timing_row, text="Delay Between Emails (sec)").pack(side=tk.LEFT, padx=12)
         ttk.Entry(timing_row, textvariable=self.email_delay_var, width=8).pack(side=tk.LEFT)
+        ttk.Label(timing_row, text="Parallel Connections").pack(side=tk.LEFT, padx=12)
+        ttk.Entry(timing_row, textvariable=self.workers_var, width=6).pack(side=tk.LEFT)
+        self.use_async_var = tk.BooleanVar(value=DEFAULT_BACKEND == "async")
+        ttk.Checkbutton(timing_row, text="Async engine", variable=self.use_async_var).pack(side=tk.LEFT, padx=8)
+        self.use_pipeline_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(timing_row, text="Pipelining", variable=self.use_pipeline_var).pack(side=tk.LEFT)
 
         action_row = ttk.Frame(send_frame)
         action_row.pack(fill=tk.X, pady=8)
         ttk.Button(action_row, text="Send", command=self.send_emails).pack(side=tk.LEFT)
         ttk.Button(action_row, text="Cancel", command=self.cancel_send).pack(side=tk.LEFT, padx=6)
 
-        log_frame = ttk.LabelFrame(main_frame, text="Status Log", padding=10)
-        log_frame.pack(fill=tk.BOTH, expand=True)
+        self.progress = ProgressPanel(main_frame)
+
+        tabs = ttk.Notebook(main_frame)
+        tabs.pack(fill=tk.BOTH, expand=True)
+        log_frame = ttk.Frame(tabs, padding=10)
+        tabs.add(log_frame, text="Status Log")
 
         self.log_text = tk.Text(log_frame, height=14, state="disabled", wrap="word")
         self.log_text.pack(fill=tk.BOTH, expand=True)
         self.logger = UiLogger(self.log_text)
+        self.save_log_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            log_frame,
+            text=f"Save full log to {LOG_FILE}",
+            variable=self.save_log_var,
+            command=self.toggle_log_file,
+        ).pack(anchor="w", pady=(6, 0))
+
+        self.recipients = RecipientPanel(tabs, self.load_recipients)
+        tabs.add(self.recipients.frame, text="Recipients")
 
         self.update_mode()
 
+    def toggle_log_file(self):
+        try:
+            self.logger.set_spill(LOG_FILE if self.save_log_var.get() else None)
+        except OSError as exc:
+            self.save_log_var.set(False)
+            messagebox.showerror("Log File", f"Could not open {LOG_FILE}: {exc}")
+
     def _row_entry(self, parent, row, label, var, show=None):
         ttk.Label(parent, text=label).grid(row=row, column=0, sticky="w", pady=2)
         entry = ttk.Entry(parent, textvariable=var, width=60, show=show)
@@ -307,6 +812,8 @@ class EmailSenderGui:
 
         self.csv_entry.configure(state=batch_state)
         self.browse_button.configure(state=batch_state)
+        self.use_store_check.configure(state=batch_state)
+        self.campaign_entry.configure(state=batch_state)
 
         self.single_email_entry.configure(state=single_state)
         self.single_name_entry.configure(state=single_state)
@@ -354,11 +861,44 @@ class EmailSenderGui:
         reload_send_config()
         self.logger.write("Saved .env and reloaded configuration.")
 
+    def load_recipients(self):
+        csv_path = self.csv_path_var.get().strip()
+        if not csv_path:
+            messagebox.showerror("Missing CSV", "Please choose a CSV file.")
+            return
+        threading.Thread(
+            target=self.read_recipient_list,
+            args=(csv_path, self.type_var.get(), self.use_store_var.get(), self.campaign_var.get().strip()),
+            daemon=True,
+        ).start()
+
+    def read_recipient_list(self, csv_path, email_type, use_store, campaign=""):
+        import send
+
+        self.logger.write("Loading recipient list...")
+        try:
+            store_path = send.default_store_path(csv_path)
+            if use_store and os.path.exists(store_path):
+                with send.RecipientStore(store_path) as store:
+                    recipients = [
+                        (name, email, recipient_status(status))
+                        for name, email, status in store.statuses(email_type, campaign or send.DEFAULT_CAMPAIGN)
+                    ]
+            else:
+                recipients = read_recipients(csv_path, email_type)
+        except Exception as exc:
+            self.logger.write(f"Error: {exc}")
+            return
+        self.recipients.show(recipients)
+        self.logger.write(f"Loaded {len(recipients)} recipients into the Recipients tab.")
+
     def cancel_send(self):
         self.cancel_event.set()
         self.logger.write("Cancel requested. Waiting for current email to finish...")
 
     def send_emails(self):
+        import send
+
         self.cancel_event.clear()
         mode = self.mode_var.get()
         email_type = self.type_var.get()
@@ -375,6 +915,12 @@ class EmailSenderGui:
             messagebox.showerror("Invalid Input", "Delay between emails must be a number.")
             return
 
+        try:
+            workers = max(1, int(self.workers_var.get().strip() or "1"))
+        except ValueError:
+            messagebox.showerror("Invalid Input", "Parallel connections must be a number.")
+            return
+
         values = reload_send_config()
         missing = []
         if not values["SMTP_SERVER"]:
@@ -403,7 +949,17 @@ class EmailSenderGui:
                 return
             thread = threading.Thread(
                 target=self.run_batch,
-                args=(csv_path, email_type, delay, email_delay),
+                args=(
+                    csv_path,
+                    email_type,
+                    delay,
+                    email_delay,
+                    workers,
+                    self.use_store_var.get(),
+                    "async" if self.use_async_var.get() else "sync",
+                    send.DEFAULT_PIPELINE_DEPTH if self.use_pipeline_var.get() else 0,
+                    self.campaign_var.get().strip(),
+                ),
                 daemon=True,
             )
         else:
@@ -422,6 +978,8 @@ class EmailSenderGui:
         thread.start()
 
     def run_single(self, email_type, email, name, delay):
+        import send
+
         self.logger.write("Preparing single email...")
         if not self.wait_with_cancel(delay, "Sending will start in"):
             return
@@ -440,75 +998,215 @@ class EmailSenderGui:
         else:
             self.logger.write("Single email failed. Check configuration and try again.")
 
-    def run_batch(self, csv_path, email_type, delay, email_delay):
+    def load_csv_batch(self, csv_path, email_type, ledger=None, campaign=None):
+        import send
+
         self.logger.write("Loading CSV...")
         try:
             rows, fieldnames, email_col, name_col = parse_csv(csv_path)
         except Exception as exc:
             self.logger.write(f"Error: {exc}")
-            return
+            return None
+
+        recovered = send.recover_journal(csv_path, rows, fieldnames, email_col)
+        if recovered:
+            self.logger.write(f"Recovered {recovered} results from an interrupted run.")
 
         status_col = ensure_status_column(fieldnames, email_type)
-        pending_rows = [row for row in rows if not status_is_sent(row.get(status_col))]
-        already_sent = len(rows) - len(pending_rows)
-        self.logger.write(f"Batch size: {len(rows)}")
-        self.logger.write(f"Already emailed: {already_sent}")
-        self.logger.write(f"Pending: {len(pending_rows)}")
-        if not pending_rows:
-            self.logger.write("No pending recipients. Nothing to send.")
-            return
+        address_index = send.new_address_index(ledger, email_type, campaign)
+        pending_rows = send.collapse_duplicate_rows(rows, email_col, status_col, address_index)
+        send.report_collapsed(address_index, ledger, email_type, campaign, log=self.logger.write)
+        self.recipients.show(
+            [(row.get(name_col) or "", row.get(email_col) or "", recipient_status(row.get(status_col))) for row in rows]
+        )
 
-        write_csv_rows(csv_path, fieldnames, rows)
-        if not self.wait_with_cancel(delay, "Batch will start in"):
-            return
+        def open_status_writer():
+            return send.CsvStatusWriter(csv_path, fieldnames, rows, email_col, email_type)
 
-        success_count = 0
-        fail_count = 0
+        return (pending_rows, len(pending_rows), len(rows), email_col, name_col, open_status_writer, None,
+                address_index.collapsed)
 
-        for idx, row in enumerate(pending_rows, 1):
-            if self.cancel_event.is_set():
-                self.logger.write("Batch cancelled by user.")
-                break
+    def load_stream_batch(self, csv_path, email_type, ledger=None, campaign=None):
+        import send
 
-            recipient = row.get(email_col, "").strip()
-            name = row.get(name_col, "").strip()
-            self.logger.write(f"[{idx}/{len(rows)}] Sending to {name} <{recipient}>...")
+        self.logger.write("Scanning large CSV...")
+        try:
+            fieldnames = send.read_header(csv_path)
+            email_col, name_col = send.detect_columns(fieldnames)
+            if not email_col or not name_col:
+                raise ValueError("CSV is missing required columns. Expected: email,name")
+            overlays = send.journal_overlays(csv_path)
+            rows = send.CsvRowStream(
+                csv_path, fieldnames, email_col, f"{email_type}_emailed", status_is_sent, overlays
+            )
+            address_index = send.new_address_index(ledger, email_type, campaign)
+            rows.collapse_duplicates(address_index)
+            total, pending_count, _ = rows.scan()
+            self.recipients.show(read_recipients(csv_path, email_type, rows.skipped))
+        except Exception as exc:
+            self.logger.write(f"Error: {exc}")
+            return None
 
-            if email_type == "blast":
-                result = send.send_blast_email(recipient, name)
-            elif email_type == "ballot_links":
-                result = send.send_ballot_links_email(recipient, name)
-            elif email_type == "precinct":
-                result = send.send_precinct_email(recipient, name)
-            else:
-                result = send.send_reminder_email(recipient, name)
+        if not total:
+            self.logger.write("Error: CSV file is empty.")
+            return None
+        send.report_collapsed(address_index, ledger, email_type, campaign, log=self.logger.write)
+
+        def open_status_writer():
+            return send.StreamingCsvStatusWriter(rows, email_type)
+
+        return rows, pending_count, total, email_col, name_col, open_status_writer, None, address_index.collapsed
 
-            if result:
-                success_count += 1
-                row[status_col] = "yes"
+    def load_store_batch(self, store, csv_path, email_type, ledger=None, campaign=None):
+        import send
+
+        self.logger.write(f"Loading status database {store.path}...")
+        campaign = campaign or send.DEFAULT_CAMPAIGN
+        try:
+            if not send.import_into_store(store, csv_path, campaign):
+                return None
+        except Exception as exc:
+            self.logger.write(f"Error: {exc}")
+            return None
+
+        total, _ = store.counts(email_type, campaign)
+        address_index = send.new_address_index(ledger, email_type, campaign)
+        pending_rows = send.store_pending_rows(store, email_type, campaign, address_index)
+        send.report_collapsed(address_index, ledger, email_type, campaign, log=self.logger.write)
+        self.recipients.show(
+            [(name, email, recipient_status(status)) for name, email, status in store.statuses(email_type, campaign)]
+        )
+        return (pending_rows, len(pending_rows), total, "email", "name",
+                lambda: store.status_writer(email_type, campaign), store.sender_usage(time.time() - 86400),
+                address_index.collapsed)
+
+    def run_batch(self, csv_path, email_type, delay, email_delay, workers=1, use_store=False,
+                  backend=DEFAULT_BACKEND, pipeline=0, campaign=""):
+        import send
+
+        store = None
+        ledger = send.open_campaign_ledger(csv_path, campaign)
+        if ledger is not None:
+            self.logger.write(f"Campaign: {campaign} (addresses already sent are kept in {ledger.path})")
+        try:
+            if use_store:
+                store = send.RecipientStore(send.default_store_path(csv_path))
+                batch = self.load_store_batch(store, csv_path, email_type, ledger, campaign)
+            elif os.path.exists(csv_path) and os.path.getsize(csv_path) > send.STREAM_THRESHOLD_BYTES:
+                batch = self.load_stream_batch(csv_path, email_type, ledger, campaign)
             else:
-                fail_count += 1
-                row[status_col] = "failed"
+                batch = self.load_csv_batch(csv_path, email_type, ledger, campaign)
+            if batch is None:
+                return
+            self.send_batch(*batch, email_type, delay, email_delay, workers, backend, pipeline, ledger, campaign)
+        finally:
+            if store is not None:
+                store.close()
+            if ledger is not None:
+                ledger.close()
+
+    def send_batch(self, pending_rows, pending_count, total, email_col, name_col, open_status_writer, sender_usage,
+                   skipped, email_type, delay, email_delay, workers, backend=DEFAULT_BACKEND, pipeline=0, ledger=None,
+                   campaign=None):
+        import send
+
+        # Every row is pending, skipped as a duplicate or marked sent.
+        already_sent = total - pending_count - skipped
+        self.logger.write(f"Batch size: {total}")
+        self.logger.write(f"Already emailed: {already_sent}")
+        if skipped:
+            self.logger.write(f"Duplicates skipped: {skipped}")
+        self.logger.write(f"Pending: {pending_count}")
+        if not pending_count:
+            if skipped:
+                # Saves the duplicate status of the skipped rows.
+                open_status_writer().close()
+            self.logger.write("No pending recipients. Nothing to send.")
+            return
+
+        # The same limits as the command line: RATE_LIMIT_* from .env, with the
+        # emails each account already sent from the store counted against them.
+        senders = send.build_sender_pool(
+            email_delay, send.RATE_LIMIT_PER_MINUTE, send.RATE_LIMIT_PER_HOUR, send.RATE_LIMIT_PER_DAY,
+            usage=sender_usage,
+        )
+        if len(senders.accounts) > 1:
+            self.logger.write(f"Sending accounts: {', '.join(a.email for a in senders.accounts)}")
+        self.logger.write(send.describe_schedule(senders, pending_count))
+
+        status_writer = open_status_writer()
+        warmup = None
+        if delay > 0:
+            warmup = send.BatchWarmup(
+                pending_rows, email_type, email_col, name_col, senders, workers, pending_count,
+                sessions=backend == 'sync' and pipeline <= 1, log=self.logger.write,
+            )
+        if not self.wait_with_cancel(delay, "Batch will start in", warmup):
+            if warmup is not None:
+                warmup.close()
+            status_writer.close()
+            return
+        if warmup is not None:
+            pending_rows = warmup.rows()
 
-            write_csv_rows(csv_path, fieldnames, rows)
+        def record_result(row, result, sender=None):
+            status_writer.record(row, "yes" if result else "failed", sender)
+            if result and ledger is not None:
+                ledger.record(row.get(email_col), email_type, campaign)
+            self.recipients.record(row.get(email_col), "sent" if result else "failed")
 
-            if idx < len(pending_rows):
-                if not self.wait_with_cancel(email_delay, "Waiting before next email"):
-                    break
+        batch_metrics = metrics.activate(metrics.SendMetrics(send.METRICS_FILE or None))
+        self.progress.start(batch_metrics, senders, pending_count)
+        try:
+            success_count, fail_count = send.send_pending_rows(
+                pending_rows,
+                email_type,
+                email_col,
+                name_col,
+                record_result,
+                workers=workers,
+                senders=senders,
+                cancel_event=self.cancel_event,
+                log=self.logger.write,
+                total=pending_count,
+                backend=backend,
+                pipeline=pipeline,
+                warmup=warmup,
+            )
+        finally:
+            if warmup is not None:
+                warmup.close()
+            status_writer.close()
+            metrics.deactivate()
+            batch_metrics.write()
+            self.progress.finish()
+        if self.cancel_event.is_set():
+            self.logger.write("Batch cancelled by user.")
 
         self.logger.write("Batch complete.")
         self.logger.write(f"Success: {success_count}")
         self.logger.write(f"Failed: {fail_count}")
+        self.logger.write("Time per stage:")
+        for line in batch_metrics.breakdown():
+            self.logger.write(f"  {line}")
 
-    def wait_with_cancel(self, seconds, label):
+    def wait_with_cancel(self, seconds, label, warmup=None):
         if seconds <= 0:
             return True
+        if warmup is not None:
+            warmup.start(seconds)
         for remaining in range(seconds, 0, -1):
             if self.cancel_event.is_set():
                 self.logger.write("Cancelled by user.")
                 return False
+            if warmup is not None and warmup.error:
+                self.logger.write(f"Error: {warmup.error}")
+                return False
             self.logger.write(f"{label} {remaining} sec")
             time.sleep(1)
+        if warmup is not None and not warmup.finish():
+            self.logger.write(f"Error: {warmup.error}")
+            return False
         return True
 
 
@@ -518,7 +1216,12 @@ def main():
     sys.stdout = StreamToLogger(app.logger)
     sys.stderr = StreamToLogger(app.logger)
     root.mainloop()
+    app.logger.close()
 
 
 if __name__ == "__main__":
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+
+        multiprocessing.freeze_support()
     main()
@@ -0,0 +1,93 @@
+import base64
+import random
+import re
+import sys
+from email import policy
+
+
+CRLF = '\r\n'
+HEADER_POLICY = policy.compat32.clone(max_line_length=0, linesep=CRLF)
+EOL_PATTERN = re.compile(r'\r\n|\n|\r(?!\n)')
+
+ASCII_PART_HEADERS = (
+    'Content-Type: text/html; charset="us-ascii"' + CRLF
+    + 'MIME-Version: 1.0' + CRLF
+    + 'Content-Transfer-Encoding: 7bit' + CRLF
+    + CRLF
+).encode('ascii')
+
+UTF8_PART_HEADERS = (
+    'Content-Type: text/html; charset="utf-8"' + CRLF
+    + 'MIME-Version: 1.0' + CRLF
+    + 'Content-Transfer-Encoding: base64' + CRLF
+    + CRLF
+).encode('ascii')
+
+
+def make_boundary():
+    """Returns a boundary in the same format email.generator uses."""
+    token = random.randrange(sys.maxsize)
+    return '=' * 15 + ('%0*d' % (len(repr(sys.maxsize - 1)), token)) + '=='
+
+
+def fold_header(name, value):
+    return HEADER_POLICY.fold(name, value)
+
+
+class MessageBuilder:
+    """
+    Serializes campaign emails straight to the bytes sendmail puts on the wire.
+
+    The result has the same structure as MIMEMultipart('related') holding
+    one MIMEText(html, 'html') part: the same headers in the same order, a
+    us-ascii/7bit part for plain ASCII bodies and a utf-8/base64 part
+    otherwise. Everything except the To header and the body is encoded once
+    per campaign, so each email only costs encoding its own HTML.
+
+    headers is the ordered list of (name, value) pairs; the To header is
+    inserted after the first to_index of them.
+    """
+
+    def __init__(self, headers, to_index=2, boundary=None):
+        self.boundary = boundary or make_boundary()
+        self.head_before_to = self.encode_headers(headers[:to_index], self.boundary, True)
+        self.head_after_to = self.encode_headers(headers[to_index:], self.boundary, False)
+
+    @staticmethod
+    def encode_headers(headers, boundary, with_mime_headers):
+        lines = []
+        if with_mime_headers:
+            lines.append(fold_header('Content-Type', f'multipart/related; boundary="{boundary}"'))
+            lines.append(fold_header('MIME-Version', '1.0'))
+        for name, value in headers:
+            lines.append(fold_header(name, value))
+        return ''.join(lines).encode('ascii')
+
+    def encode_to(self, recipient_email):
+        return fold_header('To', recipient_email).encode('ascii')
+
+    def encode_body(self, html):
+        try:
+            html.encode('ascii')
+        except UnicodeEncodeError:
+            return UTF8_PART_HEADERS + base64.encodebytes(html.encode('utf-8')).replace(b'\n', b'\r\n')
+        return ASCII_PART_HEADERS + EOL_PATTERN.sub(CRLF, html).encode('ascii')
+
+    def build(self, recipient_email, html):
+        """Returns the complete message as CRLF-terminated bytes."""
+        body = self.encode_body(html)
+        boundary = self.boundary
+        head_before_to = self.head_before_to
+        if boundary.encode('ascii') in body:
+            boundary = make_boundary()
+            head_before_to = self.encode_headers([], boundary, True) + head_before_to.split(b'\r\n', 2)[2]
+        delimiter = f'--{boundary}'.encode('ascii')
+        return b''.join((
+            head_before_to,
+            self.encode_to(recipient_email),
+            self.head_after_to,
+            b'\r\n',
+            delimiter, b'\r\n',
+            body,
+            b'\r\n', delimiter, b'--\r\n',
+        ))
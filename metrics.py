@@ -0,0 +1,244 @@
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+STAGES = ('template', 'render', 'build', 'spool', 'connect', 'starttls', 'login', 'sendmail', 'status')
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+DEFAULT_WINDOW = 1000
+DEFAULT_WRITE_INTERVAL = 5.0
+RATE_WINDOW = 60.0
+
+
+class Histogram:
+    """
+    Cumulative bucket counts (for Prometheus) plus the last window
+    observations, which give the rolling p50/p99.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def percentile(self, fraction):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SendMetrics:
+    """
+    Per-stage timings and send counts for one batch.
+
+    Stages are timed wherever they happen (template loading, rendering,
+    message building, SMTP connect/starttls/login/sendmail and status
+    writes) through stage() while this object is active. If path is given
+    the metrics are written there every write_interval seconds and when
+    the batch ends: JSON for a .json path, Prometheus text otherwise.
+    """
+
+    def __init__(self, path=None, write_interval=DEFAULT_WRITE_INTERVAL, window=DEFAULT_WINDOW):
+        self.path = path
+        self.write_interval = write_interval
+        self.window = window
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.sent = 0
+        self.failed = 0
+        self.started = time.time()
+        self.started_monotonic = time.monotonic()
+        self.last_write = self.started_monotonic
+        self.completions = deque(maxlen=window)
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram(self.window)
+            histogram.observe(seconds)
+
+    def merge(self, histograms):
+        """Adds stage timings collected elsewhere (e.g. by a worker process)."""
+        with self.lock:
+            for stage, other in histograms.items():
+                histogram = self.histograms.get(stage)
+                if histogram is None:
+                    histogram = self.histograms[stage] = Histogram(self.window)
+                histogram.buckets = [a + b for a, b in zip(histogram.buckets, other.buckets)]
+                histogram.count += other.count
+                histogram.total += other.total
+                histogram.recent.extend(other.recent)
+
+    def count(self, result):
+        with self.lock:
+            if result:
+                self.sent += 1
+            else:
+                self.failed += 1
+            now = time.monotonic()
+            self.completions.append(now)
+            due = bool(self.path) and now - self.last_write >= self.write_interval
+            if due:
+                self.last_write = now
+        if due:
+            self.write()
+
+    def rate_per_minute(self):
+        """Emails finished per minute over the last RATE_WINDOW seconds."""
+        with self.lock:
+            now = time.monotonic()
+            recent = [t for t in self.completions if now - t <= RATE_WINDOW]
+            if len(recent) == self.completions.maxlen:
+                span = now - recent[0]
+            else:
+                span = min(RATE_WINDOW, now - self.started_monotonic)
+        return len(recent) * 60.0 / span if span > 0 else 0.0
+
+    def snapshot(self, latency_points=60):
+        """
+        Returns the live numbers a progress display needs: sent, failed,
+        per_minute and the latest sendmail latencies in seconds.
+        """
+        per_minute = self.rate_per_minute()
+        with self.lock:
+            histogram = self.histograms.get('sendmail')
+            latencies = list(histogram.recent)[-latency_points:] if histogram else []
+            return {
+                'sent': self.sent,
+                'failed': self.failed,
+                'per_minute': per_minute,
+                'latencies': latencies,
+            }
+
+    def to_dict(self):
+        with self.lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+            return {
+                'started': self.started,
+                'elapsed_seconds': elapsed,
+                'sent': self.sent,
+                'failed': self.failed,
+                'messages_per_second': (self.sent + self.failed) / elapsed,
+                'stages': {
+                    stage: {
+                        'count': histogram.count,
+                        'total_seconds': histogram.total,
+                        'p50_seconds': histogram.percentile(0.50),
+                        'p99_seconds': histogram.percentile(0.99),
+                        'buckets': dict(zip([str(b) for b in BUCKETS] + ['+Inf'], histogram.buckets)),
+                    }
+                    for stage, histogram in self.ordered_histograms()
+                },
+            }
+
+    def to_prometheus(self):
+        lines = [
+            '# HELP seb_stage_seconds Time spent in each stage of sending one email.',
+            '# TYPE seb_stage_seconds histogram',
+        ]
+        with self.lock:
+            for stage, histogram in self.ordered_histograms():
+                cumulative = 0
+                for bound, count in zip([str(b) for b in BUCKETS] + ['+Inf'], histogram.buckets):
+                    cumulative += count
+                    lines.append(f'seb_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'seb_stage_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+                lines.append(f'seb_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            lines += [
+                '# HELP seb_messages_total Emails attempted in this batch by result.',
+                '# TYPE seb_messages_total counter',
+                f'seb_messages_total{{result="sent"}} {self.sent}',
+                f'seb_messages_total{{result="failed"}} {self.failed}',
+            ]
+        return '\n'.join(lines) + '\n'
+
+    def ordered_histograms(self):
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        return sorted(self.histograms.items(), key=lambda item: order.get(item[0], len(order)))
+
+    def write(self):
+        """Replaces the metrics file atomically so readers never see half of it."""
+        if not self.path:
+            return
+        if self.path.endswith('.json'):
+            content = json.dumps(self.to_dict(), indent=2)
+        else:
+            content = self.to_prometheus()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix='metrics_', dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, self.path)
+        with self.lock:
+            self.last_write = time.monotonic()
+
+    def breakdown(self):
+        """Returns the per-stage summary as printable lines."""
+        lines = [f"{'Stage':<10} {'Count':>8} {'Total s':>9} {'Avg ms':>9} {'p50 ms':>9} {'p99 ms':>9}"]
+        with self.lock:
+            for stage, histogram in self.ordered_histograms():
+                average = histogram.total / histogram.count if histogram.count else 0.0
+                lines.append(
+                    f"{stage:<10} {histogram.count:>8} {histogram.total:>9.2f} {average * 1000:>9.2f} "
+                    f"{histogram.percentile(0.50) * 1000:>9.2f} {histogram.percentile(0.99) * 1000:>9.2f}"
+                )
+        return lines
+
+
+_active = None
+
+
+def activate(metrics):
+    """Makes metrics the target of stage() until deactivate() is called."""
+    global _active
+    _active = metrics
+    return metrics
+
+
+def deactivate():
+    global _active
+    _active = None
+
+
+def active():
+    return _active
+
+
+def observe(stage, seconds):
+    metrics = _active
+    if metrics is not None:
+        metrics.observe(stage, seconds)
+
+
+@contextmanager
+def stage(name):
+    """Times the enclosed block as one observation of a stage."""
+    metrics = _active
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(name, time.perf_counter() - start)
+
+
+def count(result):
+    metrics = _active
+    if metrics is not None:
+        metrics.count(result)
@@ -0,0 +1,218 @@
+import multiprocessing
+import queue
+
+import metrics
+from retry_scheduler import NOT_READY
+
+
+# Rows handed to one process before it reports any back. Keeps memory flat
+# for streamed rosters and lets faster processes take more of the work.
+DEFAULT_WINDOW = 200
+# How many times the rows of a process that crashed are given to a new one.
+DEFAULT_MAX_RESTARTS = 2
+
+
+def run_worker(number, inbox, results, cancel_event, options):
+    """
+    Entry point of one worker process: sends the rows arriving on inbox and
+    reports every result on results as ('result', seq, sent, sender).
+    """
+    import send
+
+    sequence = {}
+
+    def rows():
+        # Never blocks: the scheduler reads this under its lock, and retries
+        # that come due must not wait for the parent to send another row.
+        while True:
+            try:
+                message = inbox.get_nowait()
+            except queue.Empty:
+                yield NOT_READY
+                continue
+            if message is None:
+                return
+            seq, row = message
+            sequence[id(row)] = seq
+            yield row
+
+    def on_result(row, result, sender=None):
+        results.put(('result', sequence.pop(id(row)), result, sender))
+
+    def log(message):
+        print(f"[P{number}] {message}", flush=True)
+
+    senders = send.build_sender_pool(
+        options['email_delay'], options['per_minute'], options['per_hour'], options['per_day'],
+        options['adaptive'], options['sender_usage'], share=options['processes'],
+    )
+    batch_metrics = metrics.activate(metrics.SendMetrics())
+    try:
+        send.send_pending_rows(
+            rows(),
+            options['email_type'],
+            options['email_col'],
+            options['name_col'],
+            on_result,
+            workers=options['workers'],
+            cancel_event=cancel_event,
+            log=log,
+            total=options['total'],
+            backend=options['backend'],
+            pipeline=options['pipeline'],
+            senders=senders,
+        )
+    except KeyboardInterrupt:
+        # Ctrl+C reaches every process; the parent decides what happens next.
+        pass
+    finally:
+        metrics.deactivate()
+        results.put(('metrics', batch_metrics.histograms))
+
+
+class WorkerProcess:
+    """A worker process with its own inbox and the rows handed to it but not yet reported."""
+
+    def __init__(self, context, number, results, cancel_event, options):
+        self.number = number
+        self.inbox = context.Queue()
+        self.outstanding = {}
+        self.closed = False
+        self.restarts = 0
+        self.abandoned = False
+        self.process = context.Process(
+            target=run_worker,
+            args=(number, self.inbox, results, cancel_event, options),
+            name=f'sender-{number}',
+            daemon=True,
+        )
+        self.process.start()
+
+    def give(self, seq, row):
+        self.outstanding[seq] = row
+        self.inbox.put((seq, row))
+
+    def close(self):
+        """Tells the process no more rows are coming."""
+        if not self.closed:
+            self.inbox.put(None)
+            self.closed = True
+
+
+def send_in_processes(pending_rows, email_type, email_col, name_col, on_result, processes,
+                      workers=1, total=None, backend='sync', pipeline=0, limits=None,
+                      cancel_event=None, log=print, window=DEFAULT_WINDOW,
+                      max_restarts=DEFAULT_MAX_RESTARTS):
+    """
+    Sends pending rows from several processes so rendering and MIME encoding
+    use more than one CPU core.
+
+    This process reads the rows and hands them out in turn, at most window
+    unreported rows per process, and stays the only one writing status:
+    on_result(row, result, sender) is called here for every result the
+    workers report. Each worker runs send_pending_rows with its own
+    sessions and a 1/processes share of every account's limits, so the
+    combined rate matches a single-process run. limits holds email_delay,
+    per_minute, per_hour, per_day, adaptive and sender_usage as given to
+    build_sender_pool.
+
+    If a worker dies, the rows it had not reported are given to a new
+    process (up to max_restarts times per worker), so the batch still
+    finishes. A row that was sent just before the crash may be sent twice.
+    Rows still unreported at the end stay pending and a later run sends them.
+
+    :return: (success_count, fail_count)
+    """
+    context = multiprocessing.get_context('spawn')
+    cancel = context.Event()
+    results = context.Queue()
+    options = dict(limits or {}, email_type=email_type, email_col=email_col, name_col=name_col,
+                   workers=workers, total=total, backend=backend, pipeline=pipeline, processes=processes)
+    counts = {'success': 0, 'fail': 0}
+    batch_metrics = metrics.active()
+
+    def handle(message):
+        if message[0] == 'metrics':
+            if batch_metrics is not None:
+                # A worker's 'status' time is only handing results over;
+                # the real writes are timed here.
+                batch_metrics.merge({name: histogram for name, histogram in message[1].items()
+                                     if name != 'status'})
+            return
+        _, seq, result, sender = message
+        for worker in pool:
+            row = worker.outstanding.pop(seq, None)
+            if row is not None:
+                break
+        else:
+            return
+        counts['success' if result else 'fail'] += 1
+        metrics.count(result)
+        with metrics.stage('status'):
+            on_result(row, result, sender)
+
+    def drain(timeout):
+        try:
+            handle(results.get(timeout=timeout))
+        except queue.Empty:
+            return False
+        while True:
+            try:
+                handle(results.get_nowait())
+            except queue.Empty:
+                return True
+
+    pool = [WorkerProcess(context, number, results, cancel, options) for number in range(1, processes + 1)]
+    rows = enumerate(pending_rows)
+    rows_left = True
+    try:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                cancel.set()
+            # One row to each process in turn, so small batches use them all.
+            while rows_left and not cancel.is_set():
+                ready = [worker for worker in pool if not worker.closed and len(worker.outstanding) < window]
+                if not ready:
+                    break
+                for worker in ready:
+                    entry = next(rows, None)
+                    if entry is None:
+                        rows_left = False
+                        break
+                    worker.give(*entry)
+            if not rows_left or cancel.is_set():
+                for worker in pool:
+                    worker.close()
+
+            drain(0.2)
+
+            for index, worker in enumerate(pool):
+                if worker.process.is_alive() or worker.process.exitcode == 0 or worker.abandoned:
+                    continue
+                # Results the process sent before dying may still be queued.
+                while drain(0.5):
+                    pass
+                if cancel.is_set() or not worker.outstanding or worker.restarts >= max_restarts:
+                    if worker.outstanding:
+                        log(f"❌ Worker process {worker.number} stopped with {len(worker.outstanding)} "
+                            "emails unreported; they stay pending for the next run.")
+                    worker.abandoned = True
+                    continue
+                log(f"⚠️ Worker process {worker.number} stopped (exit code {worker.process.exitcode}); "
+                    f"giving its {len(worker.outstanding)} unfinished emails to a new process.")
+                replacement = WorkerProcess(context, worker.number, results, cancel, options)
+                replacement.restarts = worker.restarts + 1
+                for seq, row in worker.outstanding.items():
+                    replacement.give(seq, row)
+                pool[index] = replacement
+
+            if not any(worker.process.is_alive() for worker in pool):
+                while drain(0.2):
+                    pass
+                break
+    except KeyboardInterrupt:
+        cancel.set()
+        for worker in pool:
+            worker.process.join()
+        raise
+    return counts['success'], counts['fail']
@@ -0,0 +1,280 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+
+# AIMD tuning for adaptive throttling: halve the rate when the provider
+# pushes back, add back a tenth of the rate it pushed back at after every
+# clean PROBE_INTERVAL, and treat throttle replies within BACKOFF_COOLDOWN
+# of a backoff as the same signal (sends already in flight see it too).
+BACKOFF_FACTOR = 0.5
+PROBE_STEP = 0.1
+PROBE_INTERVAL = 30.0
+BACKOFF_COOLDOWN = 10.0
+MIN_ADAPTIVE_PER_MINUTE = 1.0
+RATE_SAMPLES = 50
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def copy(self):
+        bucket = TokenBucket(self.rate, self.capacity)
+        bucket.tokens = self.tokens
+        bucket.updated = self.updated
+        return bucket
+
+
+class RateLimiter:
+    """
+    Shared send budget built from token buckets.
+
+    min_interval spaces individual sends, per_minute and per_hour cap the
+    sustained rate and per_day is the provider's rolling daily quota (for
+    example 500 for a free Gmail account). Sends are scheduled as soon as
+    every bucket has a token, so time spent inside a slow SMTP transaction
+    counts toward the wait instead of being added to it.
+
+    With adaptive=True an extra bucket follows the provider's feedback
+    (AIMD): throttled() cuts the rate to half of what was actually being
+    sent, and delivered() raises it again step by step while replies stay
+    clean, until the configured limits are the tightest ones again.
+    """
+
+    def __init__(self, min_interval=0, per_minute=None, per_hour=None, per_day=None, burst=1,
+                 adaptive=False):
+        self.lock = threading.Lock()
+        self.buckets = []
+        self.adaptive = adaptive
+        self.adaptive_bucket = None
+        self.probe_step = 0.0
+        self.last_change = 0.0
+        self.last_throttle = 0.0
+        self.granted = deque(maxlen=RATE_SAMPLES)
+        if min_interval and min_interval > 0:
+            self.buckets.append(TokenBucket(1.0 / min_interval, 1))
+        for limit, window in ((per_minute, 60), (per_hour, 3600)):
+            if limit:
+                self.buckets.append(TokenBucket(limit / window, max(1, min(burst, limit))))
+        self.daily_bucket = None
+        if per_day:
+            self.daily_bucket = TokenBucket(per_day / 86400, per_day)
+            self.buckets.append(self.daily_bucket)
+        self.min_interval = min_interval
+        self.per_minute = per_minute
+        self.per_hour = per_hour
+        self.per_day = per_day
+        self.burst = burst
+
+    def describe(self):
+        parts = []
+        if self.min_interval:
+            parts.append(f"1 email every {self.min_interval}s")
+        if self.per_minute:
+            parts.append(f"{self.per_minute:g}/minute")
+        if self.per_hour:
+            parts.append(f"{self.per_hour:g}/hour")
+        if self.per_day:
+            parts.append(f"{self.per_day:g}/day")
+        if self.adaptive_bucket is not None:
+            parts.append(f"slowed to {self.adaptive_bucket.rate * 60:.0f}/minute by the server")
+        return ", ".join(parts) or "unlimited"
+
+    def share(self, parts):
+        """A new limiter with 1/parts of this one's budget, for one of parts processes splitting it."""
+        def part(limit):
+            return limit / parts if limit else limit
+        return RateLimiter(
+            min_interval=self.min_interval * parts,
+            per_minute=part(self.per_minute),
+            per_hour=part(self.per_hour),
+            per_day=part(self.per_day),
+            burst=self.burst,
+            adaptive=self.adaptive,
+        )
+
+    def ceiling(self):
+        """The fastest sustained rate (emails/second) the configured limits allow, or None."""
+        rates = []
+        if self.min_interval:
+            rates.append(1.0 / self.min_interval)
+        for limit, window in ((self.per_minute, 60), (self.per_hour, 3600)):
+            if limit:
+                rates.append(limit / window)
+        return min(rates) if rates else None
+
+    def sending_rate(self, now):
+        """Emails/second granted over the last RATE_SAMPLES sends, or None before any."""
+        if not self.granted:
+            return None
+        # At least a second, or a burst of sends at the start would look
+        # like thousands per minute.
+        return len(self.granted) / max(1.0, now - self.granted[0])
+
+    def throttled(self):
+        """
+        Records a throttle reply from the server. Returns the new rate in
+        emails/minute if it was lowered, otherwise None.
+        """
+        if not self.adaptive:
+            return None
+        with self.lock:
+            now = time.monotonic()
+            self.last_throttle = now
+            if now - self.last_change < BACKOFF_COOLDOWN:
+                return None
+            current = self.sending_rate(now)
+            if self.adaptive_bucket is not None:
+                current = min(current or self.adaptive_bucket.rate, self.adaptive_bucket.rate)
+            if current is None:
+                current = self.ceiling() or 1.0
+            rate = max(MIN_ADAPTIVE_PER_MINUTE / 60, current * BACKOFF_FACTOR)
+            self.probe_step = max(MIN_ADAPTIVE_PER_MINUTE / 60, current * PROBE_STEP)
+            if self.adaptive_bucket is None:
+                self.adaptive_bucket = TokenBucket(rate, 1)
+                self.adaptive_bucket.tokens = 0
+                self.buckets.append(self.adaptive_bucket)
+            else:
+                self.adaptive_bucket.refill(now)
+                self.adaptive_bucket.rate = rate
+            self.last_change = now
+            return rate * 60
+
+    def delivered(self):
+        """
+        Records a clean reply. After PROBE_INTERVAL without throttling the
+        adaptive rate goes up one step; returns the new rate in
+        emails/minute, 0 once the adaptive limit is lifted, otherwise None.
+        """
+        if self.adaptive_bucket is None:
+            return None
+        with self.lock:
+            bucket = self.adaptive_bucket
+            now = time.monotonic()
+            if bucket is None or now - max(self.last_change, self.last_throttle) < PROBE_INTERVAL:
+                return None
+            self.last_change = now
+            bucket.refill(now)
+            bucket.rate += self.probe_step
+            ceiling = self.ceiling()
+            if ceiling is not None and bucket.rate >= ceiling:
+                self.buckets.remove(bucket)
+                self.adaptive_bucket = None
+                return 0
+            return bucket.rate * 60
+
+    def reserve(self):
+        """Claims the next send slot and returns how many seconds until it."""
+        with self.lock:
+            now = time.monotonic()
+            wait = 0.0
+            for bucket in self.buckets:
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_time())
+            for bucket in self.buckets:
+                bucket.tokens -= 1
+            self.granted.append(now + wait)
+            return wait
+
+    def next_wait(self):
+        """Seconds until the next send would be allowed, without claiming it."""
+        with self.lock:
+            now = time.monotonic()
+            wait = 0.0
+            for bucket in self.buckets:
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_time())
+            return wait
+
+    def count_earlier_sends(self, count):
+        """Counts emails sent before this limiter existed (e.g. earlier today) against the daily quota."""
+        if not self.per_day or count <= 0:
+            return
+        with self.lock:
+            self.daily_bucket.tokens -= count
+
+    def try_acquire(self):
+        """Claims a send slot only if one is free right now."""
+        with self.lock:
+            now = time.monotonic()
+            for bucket in self.buckets:
+                bucket.refill(now)
+                if bucket.wait_time() > 0:
+                    return False
+            for bucket in self.buckets:
+                bucket.tokens -= 1
+            self.granted.append(now)
+            return True
+
+    def acquire(self, cancel_event=None, on_wait=None):
+        """
+        Blocks until a send is allowed. Returns False if cancelled first.
+
+        on_wait(seconds) is called once when the wait is long enough to be
+        worth reporting, e.g. when the daily cap is exhausted.
+        """
+        wait = self.reserve()
+        deadline = time.monotonic() + wait
+        if on_wait is not None and wait >= 60:
+            on_wait(wait)
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            time.sleep(min(remaining, 0.5))
+
+    async def acquire_async(self, cancel_event=None, on_wait=None):
+        """Same as acquire(), but sleeps without blocking the event loop."""
+        wait = self.reserve()
+        deadline = time.monotonic() + wait
+        if on_wait is not None and wait >= 60:
+            on_wait(wait)
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            await asyncio.sleep(min(remaining, 0.5))
+
+    def snapshot(self):
+        """Copies of the buckets as of now, for predicting without claiming anything."""
+        with self.lock:
+            buckets = [bucket.copy() for bucket in self.buckets]
+        now = time.monotonic()
+        for bucket in buckets:
+            bucket.refill(now)
+        return buckets
+
+    def estimate_duration(self, count):
+        """Predicts how many seconds it will take to send count emails."""
+        if count <= 0 or not self.buckets:
+            return 0.0
+        buckets = self.snapshot()
+        elapsed = 0.0
+        for _ in range(count):
+            wait = max(bucket.wait_time() for bucket in buckets)
+            elapsed += wait
+            for bucket in buckets:
+                bucket.tokens = min(bucket.capacity, bucket.tokens + wait * bucket.rate) - 1
+        return elapsed
+
+    def estimate_completion(self, count):
+        return datetime.now() + timedelta(seconds=self.estimate_duration(count))
@@ -0,0 +1,191 @@
+import csv
+import os
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_CAMPAIGN = 'default'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipients (
+    id INTEGER PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS send_status (
+    recipient_id INTEGER NOT NULL REFERENCES recipients(id),
+    email_type TEXT NOT NULL,
+    campaign TEXT NOT NULL,
+    status TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    sender TEXT,
+    PRIMARY KEY (email_type, campaign, recipient_id)
+);
+CREATE TABLE IF NOT EXISTS imports (
+    source TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    row_count INTEGER NOT NULL
+);
+"""
+
+
+def default_store_path(csv_file):
+    return os.path.splitext(csv_file)[0] + '.db'
+
+
+class RecipientStore:
+    """
+    SQLite copy of a roster with indexed per-campaign send status.
+
+    The CSV is imported once (and again only if the file changes), recipients
+    are unique by email address, and status is kept per (recipient,
+    email_type, campaign), so finding the pending rows of a large campaign is
+    a single indexed query instead of parsing and rewriting the whole CSV.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.upgrade()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def upgrade(self):
+        """Adds columns that stores created by older versions are missing."""
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(send_status)')]
+        if 'sender' not in columns:
+            with self.connection:
+                self.connection.execute('ALTER TABLE send_status ADD COLUMN sender TEXT')
+
+    def needs_import(self, csv_file):
+        stat = os.stat(csv_file)
+        source = os.path.abspath(csv_file)
+        row = self.connection.execute(
+            'SELECT mtime_ns, size FROM imports WHERE source = ?', (source,)
+        ).fetchone()
+        return row is None or row[0] != stat.st_mtime_ns or row[1] != stat.st_size
+
+    def import_csv(self, csv_file, email_col, name_col, status_columns=None, is_sent=None,
+                   campaign=DEFAULT_CAMPAIGN):
+        """
+        Loads (or refreshes) recipients from a CSV file.
+
+        status_columns maps email types to their *_emailed columns; rows whose
+        value passes is_sent are recorded as already sent so they are not
+        sent again. Returns the number of CSV rows read.
+        """
+        status_columns = status_columns or {}
+        now = time.time()
+        count = 0
+        with self.lock, self.connection:
+            with open(csv_file, 'r', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    email = (row.get(email_col) or '').strip()
+                    if not email:
+                        continue
+                    name = (row.get(name_col) or '').strip()
+                    self.connection.execute(
+                        'INSERT INTO recipients (email, name) VALUES (?, ?) '
+                        'ON CONFLICT(email) DO UPDATE SET name = excluded.name',
+                        (email, name),
+                    )
+                    recipient_id = self.connection.execute(
+                        'SELECT id FROM recipients WHERE email = ?', (email,)
+                    ).fetchone()[0]
+                    for email_type, column in status_columns.items():
+                        if is_sent is not None and is_sent(row.get(column)):
+                            self.connection.execute(
+                                'INSERT OR IGNORE INTO send_status '
+                                '(recipient_id, email_type, campaign, status, updated_at) VALUES (?, ?, ?, ?, ?)',
+                                (recipient_id, email_type, campaign, 'yes', now),
+                            )
+                    count += 1
+            stat = os.stat(csv_file)
+            self.connection.execute(
+                'INSERT OR REPLACE INTO imports VALUES (?, ?, ?, ?)',
+                (os.path.abspath(csv_file), stat.st_mtime_ns, stat.st_size, count),
+            )
+        return count
+
+    def counts(self, email_type, campaign=DEFAULT_CAMPAIGN):
+        """Returns (total recipients, already sent) for a campaign."""
+        total = self.connection.execute('SELECT COUNT(*) FROM recipients').fetchone()[0]
+        sent = self.connection.execute(
+            "SELECT COUNT(*) FROM send_status WHERE email_type = ? AND campaign = ? AND status = 'yes'",
+            (email_type, campaign),
+        ).fetchone()[0]
+        return total, sent
+
+    def pending(self, email_type, campaign=DEFAULT_CAMPAIGN):
+        """Returns the recipients not yet sent as dicts with id, email and name."""
+        cursor = self.connection.execute(
+            'SELECT r.id, r.email, r.name FROM recipients r '
+            'LEFT JOIN send_status s ON s.recipient_id = r.id AND s.email_type = ? AND s.campaign = ? '
+            "WHERE s.status IS NULL OR s.status != 'yes' ORDER BY r.id",
+            (email_type, campaign),
+        )
+        return [{'id': row[0], 'email': row[1], 'name': row[2]} for row in cursor]
+
+    def statuses(self, email_type, campaign=DEFAULT_CAMPAIGN):
+        """Returns (name, email, status) for every recipient; status is None if never sent."""
+        cursor = self.connection.execute(
+            'SELECT r.name, r.email, s.status FROM recipients r '
+            'LEFT JOIN send_status s ON s.recipient_id = r.id AND s.email_type = ? AND s.campaign = ? '
+            'ORDER BY r.id',
+            (email_type, campaign),
+        )
+        return cursor.fetchall()
+
+    def record(self, recipient_id, email_type, status, campaign=DEFAULT_CAMPAIGN, sender=None):
+        """
+        Saves one send result and the sender account it went out from. Each
+        result is its own WAL commit, which is cheap with synchronous=NORMAL
+        and survives the process crashing.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO send_status '
+                '(recipient_id, email_type, campaign, status, updated_at, sender) VALUES (?, ?, ?, ?, ?, ?)',
+                (recipient_id, email_type, campaign, status, time.time(), sender),
+            )
+
+    def sender_usage(self, since):
+        """Returns {sender: emails sent} for every sender account since a time.time() value."""
+        cursor = self.connection.execute(
+            "SELECT sender, COUNT(*) FROM send_status WHERE status = 'yes' AND updated_at >= ? "
+            'AND sender IS NOT NULL GROUP BY sender',
+            (since,),
+        )
+        return dict(cursor.fetchall())
+
+    def status_writer(self, email_type, campaign=DEFAULT_CAMPAIGN):
+        return StoreStatusWriter(self, email_type, campaign)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class StoreStatusWriter:
+    """Same interface as send.CsvStatusWriter, backed by a RecipientStore."""
+
+    def __init__(self, store, email_type, campaign):
+        self.store = store
+        self.email_type = email_type
+        self.campaign = campaign
+
+    def record(self, row, status, sender=None):
+        self.store.record(row['id'], self.email_type, status, self.campaign, sender)
+
+    def close(self):
+        return
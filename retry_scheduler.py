@@ -0,0 +1,171 @@
+import asyncio
+import heapq
+import random
+import smtplib
+import threading
+import time
+from collections import Counter
+
+
+TEMPORARY = 'temporary'
+PERMANENT = 'permanent'
+CONNECTION = 'connection'
+AUTH = 'auth'
+THROTTLED = 'throttled'
+FAILURE_CLASSES = (THROTTLED, TEMPORARY, PERMANENT, CONNECTION, AUTH)
+RETRYABLE = (THROTTLED, TEMPORARY, CONNECTION)
+
+# Replies providers use to say "slow down" (e.g. Gmail's 421 4.7.0 and
+# 454 4.7.0 Too many login attempts), and phrases that mean the same
+# whatever the code.
+THROTTLE_CODES = (421, 450, 454)
+THROTTLE_PHRASES = ('rate limit', 'too many', 'quota exceeded', 'receiving mail at a rate')
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 30.0
+DEFAULT_MAX_DELAY = 600.0
+
+# A row source can yield NOT_READY when it has no row yet but may have more
+# later (e.g. a queue filled by another process). take() then reports a
+# short wait instead of blocking on the source while it holds the lock, so
+# retries that come due in the meantime still go out.
+NOT_READY = object()
+SOURCE_POLL_INTERVAL = 0.05
+END = object()
+
+
+def is_throttle(code, message=b''):
+    """True if a reply asks us to send more slowly."""
+    if code in THROTTLE_CODES:
+        return True
+    if isinstance(message, bytes):
+        message = message.decode('utf-8', 'replace')
+    message = (message or '').lower()
+    return any(phrase in message for phrase in THROTTLE_PHRASES)
+
+
+def classify_code(code, message=b''):
+    """Maps an SMTP reply to a failure class (a code of None means no reply)."""
+    if code is None:
+        return CONNECTION
+    if is_throttle(code, message):
+        return THROTTLED
+    if code in (530, 534, 535):
+        return AUTH
+    if 400 <= code < 500:
+        return TEMPORARY
+    return PERMANENT
+
+
+def classify(error):
+    """Returns the failure class of an exception raised while sending."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        replies = list(error.recipients.values())
+        return classify_code(*replies[0]) if replies else CONNECTION
+    if isinstance(error, smtplib.SMTPResponseException):
+        failure = classify_code(error.smtp_code, error.smtp_error)
+        if failure == PERMANENT and isinstance(error, smtplib.SMTPAuthenticationError):
+            return AUTH
+        return failure
+    if isinstance(error, (smtplib.SMTPServerDisconnected, OSError, asyncio.TimeoutError)):
+        return CONNECTION
+    return PERMANENT
+
+
+def describe_failures(failures):
+    """Returns e.g. 'temporary 3, permanent 1' for a Counter of failure classes."""
+    return ", ".join(f"{name} {failures[name]}" for name in FAILURE_CLASSES if failures[name])
+
+
+class RetryScheduler:
+    """
+    Hands out rows to send, putting failed ones back on a delayed heap.
+
+    take() returns the next retry that is due, otherwise the next fresh
+    row, so one recipient with a temporary problem never holds up the
+    rest. Retry delays grow exponentially from base_delay with +/-50%
+    jitter so rows that failed together do not all come back together.
+    Every taken item must be given back through finish() or retry();
+    take() only reports the batch done once no retry can still appear.
+    rows is read with next() under the lock, so it must never block; a
+    source that has to wait for rows yields NOT_READY instead.
+    """
+
+    def __init__(self, rows, max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, rng=None):
+        self.work = iter(rows)
+        self.taken = 0
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.random = rng or random.Random()
+        self.lock = threading.Lock()
+        self.heap = []
+        self.sequence = 0
+        self.in_progress = 0
+        self.exhausted = False
+        self.done = False
+        self.failures = Counter()
+
+    def take(self):
+        """
+        Returns (item, wait). item is (index, row, attempt) to send now;
+        when it is None, wait is the number of seconds until a retry is due,
+        or None once every row is finished.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.heap and self.heap[0][0] <= now:
+                _, _, item = heapq.heappop(self.heap)
+                self.in_progress += 1
+                return item, None
+            if not self.exhausted:
+                row = next(self.work, END)
+                if row is NOT_READY:
+                    wait = SOURCE_POLL_INTERVAL
+                    if self.heap:
+                        wait = max(0.0, min(wait, self.heap[0][0] - now))
+                    return None, wait
+                if row is not END:
+                    self.taken += 1
+                    self.in_progress += 1
+                    return (self.taken, row, 1), None
+                self.exhausted = True
+            if self.heap:
+                return None, self.heap[0][0] - now
+            if self.in_progress:
+                return None, 0.1
+            self.done = True
+            return None, None
+
+    def finish(self, item, failure=None):
+        """Marks an item done; failure is its failure class if it was not sent."""
+        with self.lock:
+            self.in_progress -= 1
+            if failure is not None:
+                self.failures[failure] += 1
+
+    def should_retry(self, item, failure):
+        return failure in RETRYABLE and item[2] < self.max_attempts
+
+    def retry(self, item):
+        """Requeues a failed item and returns the delay before its next attempt."""
+        index, row, attempt = item
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay *= self.random.uniform(0.5, 1.5)
+        with self.lock:
+            self.in_progress -= 1
+            self.sequence += 1
+            heapq.heappush(self.heap, (time.monotonic() + delay, self.sequence, (index, row, attempt + 1)))
+        return delay
+
+    def requeue(self, item):
+        """Puts an item back to be taken again right away, without using up an attempt."""
+        with self.lock:
+            self.in_progress -= 1
+            self.sequence += 1
+            heapq.heappush(self.heap, (time.monotonic(), self.sequence, item))
+
+    def pending_retries(self):
+        with self.lock:
+            return len(self.heap)
@@ -1,17 +1,66 @@
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.image import MIMEImage
 import os
 import time
 import argparse
 import csv
+import itertools
 import shutil
 import tempfile
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import threading
 import sys
+import asyncio
+import multiprocessing
+
+import metrics
+from rate_limiter import RateLimiter
+from sender_accounts import SenderAccount, SenderPool, load_extra_accounts
+from retry_scheduler import (
+    RetryScheduler,
+    AUTH,
+    PERMANENT,
+    RETRYABLE,
+    THROTTLED,
+    classify,
+    classify_code,
+    describe_failures,
+)
+from csv_stream import (
+    CsvRowStream,
+    StatusCopy,
+    StreamingCsvStatusWriter,
+    DEFAULT_PREVIEW_SIZE,
+    journal_overlays,
+    read_header,
+)
+from recipient_store import RecipientStore, DEFAULT_CAMPAIGN, default_store_path
+from send_journal import SendJournal, journal_path_for
+from message_builder import MessageBuilder
+from templates import TemplateCache
+from smtp_session import (
+    SmtpSession,
+    DEFAULT_MAX_MESSAGES_PER_CONNECTION,
+    DEFAULT_MAX_CONNECTION_AGE,
+)
+from async_smtp import AsyncSmtpSession
+from process_runner import send_in_processes
+from campaign_schedule import (
+    CampaignSchedule,
+    CANCELLED,
+    DEFAULT_SCHEDULE_FILE,
+    describe_entry,
+    parse_start,
+    run_scheduler,
+)
+from spool import Spool, SpoolWriter, EML, PACKED, default_spool_path, is_spool, replace_sender
+from address_index import (
+    AddressIndex,
+    DEFAULT_LEDGER_FILE,
+    DUPLICATE_STATUS,
+    delivery_address,
+    normalize_address,
+    open_ledger,
+)
 
 load_dotenv()
 
@@ -26,6 +75,7 @@ try:
     SMTP_PORT = int(_smtp_port)
 except ValueError:
     SMTP_PORT = 587
+SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').strip().lower() not in ('0', 'false', 'no', 'off')
 SENDER_EMAIL = os.getenv('SENDER_EMAIL')
 SENDER_PASSWORD = os.getenv('SENDER_PASSWORD')
 ALTERNATIVE_EMAIL_FORM_LINK = os.getenv('ALTERNATIVE_EMAIL_FORM_LINK', '')
@@ -33,6 +83,14 @@ PRECINCT_LOCATION = os.getenv('PRECINCT_LOCATION', 'TBA')
 BALLOT_LINK = os.getenv('BALLOT_LINK', '')
 ORG_NAME = os.getenv('ORG_NAME', 'Student Election Board')
 CONTACT_EMAIL = os.getenv('CONTACT_EMAIL', SENDER_EMAIL or '')
+try:
+    SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', DEFAULT_MAX_MESSAGES_PER_CONNECTION))
+except ValueError:
+    SMTP_MAX_MESSAGES_PER_CONNECTION = DEFAULT_MAX_MESSAGES_PER_CONNECTION
+try:
+    SMTP_MAX_CONNECTION_AGE = int(os.getenv('SMTP_MAX_CONNECTION_AGE', DEFAULT_MAX_CONNECTION_AGE))
+except ValueError:
+    SMTP_MAX_CONNECTION_AGE = DEFAULT_MAX_CONNECTION_AGE
 
 BLAST_TEMPLATE_PATH = resource_path('email_blast.html')
 BALLOT_LINKS_TEMPLATE_PATH = resource_path('email_ballot_links.html')
@@ -45,6 +103,28 @@ SUBJECT_REMINDER = 'Election Reminder - 2 Days Left'
 
 DEFAULT_DELAY_BETWEEN_EMAILS = 30
 
+TEMPLATE_CACHE = TemplateCache()
+
+
+def env_limit(name):
+    try:
+        return int(os.getenv(name, '0')) or None
+    except ValueError:
+        return None
+
+
+RATE_LIMIT_PER_MINUTE = env_limit('RATE_LIMIT_PER_MINUTE')
+RATE_LIMIT_PER_HOUR = env_limit('RATE_LIMIT_PER_HOUR')
+RATE_LIMIT_PER_DAY = env_limit('RATE_LIMIT_PER_DAY')
+METRICS_FILE = os.getenv('METRICS_FILE', '')
+ADAPTIVE_THROTTLE = os.getenv('ADAPTIVE_THROTTLE', 'true').strip().lower() not in ('0', 'false', 'no', 'off')
+SCHEDULE_FILE = os.getenv('SCHEDULE_FILE', DEFAULT_SCHEDULE_FILE)
+# Ledger of every address sent successfully in a named campaign, so it never
+# gets the same email twice (across re-runs and rosters). Only used when a
+# campaign name is given; a file name without a folder is kept next to the
+# CSV. An empty value turns the ledger off.
+SENT_LEDGER = os.getenv('SENT_LEDGER', DEFAULT_LEDGER_FILE)
+
 cancel_scheduled_send = False
 
 STATUS_TRUE_VALUES = {"yes", "y", "true", "1", "sent", "done"}
@@ -74,300 +154,1058 @@ def write_csv_rows(csv_file, fieldnames, rows):
     shutil.move(temp_path, csv_file)
 
 
-def read_file_content(filepath):
-    """Reads the content of a file."""
+JOURNAL_CHECKPOINT_EVERY = 200
+STREAM_THRESHOLD_BYTES = 5 * 1024 * 1024
+JOURNAL_CHECKPOINT_INTERVAL = 30
+
+
+def recover_journal(csv_file, rows, fieldnames, email_col):
+    """
+    Applies results left in the send journal by an interrupted run.
+
+    Rows are matched by position and normalized email address, falling back
+    to the address alone if the CSV was edited in between (except for
+    DUPLICATE_STATUS, which belongs to one of several rows with the address).
+    Returns the number of results recovered.
+    """
+    records = SendJournal.replay(journal_path_for(csv_file))
+    by_email = None
+    recovered = 0
+    for record in records:
+        status_col = ensure_status_column(fieldnames, record['type'])
+        index = record.get('row')
+        email = normalize_address(record.get('email'))
+        if isinstance(index, int) and 0 <= index < len(rows) and normalize_address(rows[index].get(email_col)) == email:
+            row = rows[index]
+        elif record['status'] == DUPLICATE_STATUS:
+            continue
+        else:
+            if by_email is None:
+                by_email = {}
+                for candidate in rows:
+                    by_email.setdefault(normalize_address(candidate.get(email_col)), candidate)
+            row = by_email.get(email)
+            if row is None:
+                continue
+        row[status_col] = record['status']
+        recovered += 1
+    return recovered
+
+
+class CsvStatusWriter:
+    """
+    Records per-row send results without rewriting the CSV after every email.
+
+    Each result is appended to a journal next to the CSV; the status column
+    is compacted back into the CSV every checkpoint_every results or
+    checkpoint_interval seconds, and once more on close. After a crash,
+    recover_journal restores any results that were not yet compacted.
+    """
+
+    def __init__(self, csv_file, fieldnames, rows, email_col, email_type,
+                 checkpoint_every=JOURNAL_CHECKPOINT_EVERY, checkpoint_interval=JOURNAL_CHECKPOINT_INTERVAL):
+        self.csv_file = csv_file
+        self.fieldnames = fieldnames
+        self.rows = rows
+        self.email_col = email_col
+        self.email_type = email_type
+        self.status_col = ensure_status_column(fieldnames, email_type)
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.row_index = {id(row): i for i, row in enumerate(rows)}
+        self.pending_checkpoint = 0
+        self.last_checkpoint = time.monotonic()
+        write_csv_rows(csv_file, fieldnames, rows)
+        self.journal = SendJournal(journal_path_for(csv_file))
+        self.journal.reset()
+
+    def record(self, row, status, sender=None):
+        row[self.status_col] = status
+        self.journal.append({
+            'row': self.row_index.get(id(row)),
+            'email': row.get(self.email_col),
+            'type': self.email_type,
+            'status': status,
+            'sender': sender,
+        })
+        self.pending_checkpoint += 1
+        if (self.pending_checkpoint >= self.checkpoint_every
+                or time.monotonic() - self.last_checkpoint >= self.checkpoint_interval):
+            self.checkpoint()
+
+    def checkpoint(self):
+        if self.pending_checkpoint:
+            write_csv_rows(self.csv_file, self.fieldnames, self.rows)
+            self.journal.reset()
+        self.pending_checkpoint = 0
+        self.last_checkpoint = time.monotonic()
+
+    def close(self):
+        self.checkpoint()
+        self.journal.close(remove=True)
+
+
+class SpoolStatusWriter:
+    """
+    Status writer for deliver_spool.
+
+    Each result goes to the spool's index.csv (through a CsvStatusWriter)
+    and, under the roster row it was rendered from, to the journal of the
+    roster the spool was rendered from. close() copies those results into
+    the roster's status column, together with the duplicate marks
+    render_spool left in that journal, so a later batch of the roster skips
+    the emails the spool sent. If the roster cannot be rewritten then, the
+    journal stays and the roster's next run recovers it.
+    """
+
+    def __init__(self, spool, fieldnames, rows):
+        self.index_writer = CsvStatusWriter(spool.index_path, fieldnames, rows, 'email', spool.email_type)
+        self.email_type = spool.email_type
+        roster = spool.manifest.get('roster')
+        self.roster = roster if roster and os.path.exists(roster) else None
+        if roster and self.roster is None:
+            print(f"⚠️ The roster {roster} is gone; results are only kept in the spool's index.csv.")
+        self.journal = SendJournal(journal_path_for(self.roster)) if self.roster else None
+        # Rows collapse_duplicate_rows skipped at delivery are marked in the roster too.
+        for row in rows:
+            if row.get(self.index_writer.status_col) == DUPLICATE_STATUS:
+                self.add_to_roster(row, DUPLICATE_STATUS)
+
+    def record(self, row, status, sender=None):
+        self.index_writer.record(row, status, sender)
+        self.add_to_roster(row, status, sender)
+
+    def add_to_roster(self, row, status, sender=None):
+        if self.journal is None or not str(row.get('row', '')).isdigit():
+            return
+        self.journal.append({
+            'row': int(row['row']),
+            'email': row.get('email'),
+            'type': self.email_type,
+            'status': status,
+            'sender': sender,
+        })
+
+    def close(self):
+        self.index_writer.close()
+        if self.journal is None:
+            return
+        self.journal.sync()
+        overlays = journal_overlays(self.roster)
+        if not overlays:
+            self.journal.close(remove=True)
+            return
+        expected = sum(len(overlay) for overlay in overlays.values())
+        copy = None
+        try:
+            email_col, _ = detect_columns(read_header(self.roster))
+            if email_col is None:
+                raise ValueError("it has no email column")
+            copy = StatusCopy(self.roster, email_col, overlays)
+            while copy.values is not None:
+                copy.write()
+            copy.replace()
+        except (OSError, ValueError) as e:
+            if copy is not None:
+                copy.abort()
+            self.journal.close()
+            print(f"⚠️ Could not write the results into {self.roster} ({e}). "
+                  "They are kept in its journal and added on its next run.")
+            return
+        self.journal.close(remove=True)
+        if copy.applied < expected:
+            print(f"⚠️ {expected - copy.applied} results did not match their row in {self.roster}, "
+                  "which changed since the render; they are only in the spool's index.csv.")
+        else:
+            print(f"Results written to {self.roster}.")
+
+
+def load_template(filepath):
+    """
+    Returns the compiled template for filepath, or None if it cannot be read.
+
+    Templates are cached and only re-read when the file changes on disk.
+    """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return f.read()
+        with metrics.stage('template'):
+            template = TEMPLATE_CACHE.get(filepath)
     except FileNotFoundError:
         print(f"Error: File not found at {filepath}")
         return None
     except Exception as e:
         print(f"Error reading file {filepath}: {e}")
         return None
+    if not template.text:
+        return None
+    return template
+
+
+def primary_sender():
+    """The SENDER_EMAIL account from .env as a SenderAccount."""
+    return SenderAccount(SENDER_EMAIL, SENDER_PASSWORD, SMTP_SERVER, SMTP_PORT,
+                         use_tls=SMTP_USE_TLS, username=SENDER_EMAIL)
+
+
+def configured_senders():
+    """Every sending account in .env: SENDER_EMAIL first, then SENDER_EMAIL_2, _3, ..."""
+    primary = primary_sender()
+    return [primary] + load_extra_accounts(primary)
+
+
+def open_smtp_session(account=None):
+    """Creates an SmtpSession for a sender account (default: the SMTP configuration in .env)."""
+    account = account or primary_sender()
+    return SmtpSession(
+        account.server,
+        account.port,
+        account.username,
+        account.password,
+        max_messages=SMTP_MAX_MESSAGES_PER_CONNECTION,
+        max_age=SMTP_MAX_CONNECTION_AGE,
+        use_tls=account.use_tls,
+    )
+
+
+def open_async_smtp_session(account=None):
+    """Creates an AsyncSmtpSession for a sender account (default: the SMTP configuration in .env)."""
+    account = account or primary_sender()
+    return AsyncSmtpSession(
+        account.server,
+        account.port,
+        account.username,
+        account.password,
+        max_messages=SMTP_MAX_MESSAGES_PER_CONNECTION,
+        max_age=SMTP_MAX_CONNECTION_AGE,
+        use_tls=account.use_tls,
+    )
+
+
+def report_failure(error, failure, log=print):
+    if failure == AUTH:
+        log("❌ Error: Authentication failed. Please check your SENDER_EMAIL and SENDER_PASSWORD.")
+    else:
+        log(f"❌ Error sending email ({failure}): {error}")
 
-def send_blast_email(recipient_email, student_name, max_retries=3):
-    """
-    Sends a customized HTML blast notification email.
 
-    :param recipient_email: The student's whitelisted email address.
-    :param student_name: The name of the student.
+def attempt_delivery(msg, recipient_email, label, session, attempt=1, max_attempts=1, from_addr=None,
+                     log=print):
     """
+    Makes one attempt to send a built message over session, from from_addr
+    (default: SENDER_EMAIL), reporting progress through log.
 
-    html_template = read_file_content(BLAST_TEMPLATE_PATH)
-    if not html_template:
-        return False
-    
-    html_content = html_template
-
-    precinct_location = (PRECINCT_LOCATION or "").strip()
-    if precinct_location:
-        precinct_location_message = precinct_location
-    else:
-        precinct_location_message = "To be announced. You will be notified later."
-    
-    replacements = {
-        '[STUDENT NAME]': student_name,
-        '[WHITELISTED EMAIL]': recipient_email,
-        '[ALTERNATIVE EMAIL FORM LINK]': ALTERNATIVE_EMAIL_FORM_LINK,
-        '[PRECINCT LOCATION MESSAGE]': precinct_location_message,
-        '[ORG NAME]': ORG_NAME,
-        '[CONTACT EMAIL]': CONTACT_EMAIL
-    }
+    Returns None if it was sent, otherwise its failure class (throttled,
+    temporary, permanent, connection or auth; see retry_scheduler.classify).
+    """
+    log(f"Attempting to send {label} email to {recipient_email} (Attempt {attempt}/{max_attempts})...")
+    try:
+        session.sendmail(from_addr or SENDER_EMAIL, recipient_email, msg)
+    except Exception as e:
+        failure = classify(e)
+        report_failure(e, failure, log)
+        return failure
+    log(f"Success: {label.capitalize()} email sent to {recipient_email}")
+    return None
 
-    for placeholder, value in replacements.items():
-        html_content = html_content.replace(placeholder, value)
 
-    msg = MIMEMultipart('related')
-    msg['Subject'] = SUBJECT_BLAST
-    msg['From'] = SENDER_EMAIL
-    msg['To'] = recipient_email
-    msg['Reply-To'] = CONTACT_EMAIL
-    msg['X-Priority'] = '3'
-    msg['X-Mailer'] = 'VSU Election System'
-    msg['Organization'] = ORG_NAME
-    msg['List-Unsubscribe'] = f'<mailto:{CONTACT_EMAIL}?subject=Unsubscribe>'
+async def attempt_delivery_async(msg, recipient_email, label, session, attempt=1, max_attempts=1,
+                                 from_addr=None, log=print):
+    """attempt_delivery() for the async backend, over an AsyncSmtpSession."""
+    log(f"Attempting to send {label} email to {recipient_email} (Attempt {attempt}/{max_attempts})...")
+    try:
+        await session.sendmail(from_addr or SENDER_EMAIL, recipient_email, msg)
+    except Exception as e:
+        failure = classify(e)
+        report_failure(e, failure, log)
+        return failure
+    log(f"Success: {label.capitalize()} email sent to {recipient_email}")
+    return None
 
-    msg.attach(MIMEText(html_content, 'html'))
 
-    for attempt in range(max_retries):
-        try:
-            print(f"Attempting to send ballot email to {recipient_email} (Attempt {attempt + 1}/{max_retries})...")
-            
-            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-            server.starttls()
-            server.login(SENDER_EMAIL, SENDER_PASSWORD)
-            server.sendmail(SENDER_EMAIL, recipient_email, msg.as_string())
-            server.quit()
+def deliver_message(msg, recipient_email, label, max_retries=3, session=None):
+    """
+    Sends a built message (bytes or an email.message.Message), retrying
+    temporary and connection failures in place.
 
-            print(f"Success: Ballot email sent to {recipient_email}")
-            return True
+    This is for single sends; batches requeue failed rows through a
+    RetryScheduler instead of waiting here. When no session is given a
+    temporary one is opened for this message only.
+    """
+    if not isinstance(msg, bytes):
+        msg = msg.as_string()
 
-        except smtplib.SMTPAuthenticationError:
-            print("❌ Error: Authentication failed. Please check your SENDER_EMAIL and SENDER_PASSWORD.")
-            break 
+    own_session = session is None
+    if own_session:
+        session = open_smtp_session()
 
-        except Exception as e:
-            print(f"❌ Error sending email: {e}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {2 ** attempt} seconds...")
-                time.sleep(2 ** attempt) 
+    try:
+        for attempt in range(1, max_retries + 1):
+            failure = attempt_delivery(msg, recipient_email, label, session, attempt, max_retries)
+            if failure is None:
+                return True
+            if failure not in RETRYABLE:
+                break
+            if attempt < max_retries:
+                print(f"Retrying in {2 ** (attempt - 1)} seconds...")
+                time.sleep(2 ** (attempt - 1))
             else:
                 print(f"Failed to send email to {recipient_email} after {max_retries} attempts.")
-                break
-    
+    finally:
+        if own_session:
+            session.close()
+
     return False
 
 
-def send_ballot_links_email(recipient_email, student_name, max_retries=3):
+def campaign_settings(email_type):
     """
-    Sends a customized HTML email with ballot link.
-
-    :param recipient_email: The student's whitelisted email address.
-    :param student_name: The name of the student.
+    Returns the template, subject, priority, log label and campaign-wide
+    placeholder values for an email type.
     """
+    if email_type == 'blast':
+        precinct_location = (PRECINCT_LOCATION or "").strip()
+        if precinct_location:
+            precinct_location_message = precinct_location
+        else:
+            precinct_location_message = "To be announced. You will be notified later."
+        return BLAST_TEMPLATE_PATH, SUBJECT_BLAST, '3', 'blast', {
+            '[ALTERNATIVE EMAIL FORM LINK]': ALTERNATIVE_EMAIL_FORM_LINK,
+            '[PRECINCT LOCATION MESSAGE]': precinct_location_message,
+            '[ORG NAME]': ORG_NAME,
+            '[CONTACT EMAIL]': CONTACT_EMAIL
+        }
+    if email_type == 'ballot_links':
+        return BALLOT_LINKS_TEMPLATE_PATH, SUBJECT_BALLOT_LINKS, '1', 'ballot links', {
+            '[SPECIAL ELECTION LINK]': BALLOT_LINK,
+            '[ELECTION LINK]': BALLOT_LINK,
+            '[PRECINCT LOCATION]': PRECINCT_LOCATION,
+            '[ORG NAME]': ORG_NAME,
+            '[CONTACT EMAIL]': CONTACT_EMAIL
+        }
+    if email_type == 'precinct':
+        return PRECINCT_TEMPLATE_PATH, SUBJECT_PRECINCT, '3', 'precinct', {
+            '[PRECINCT LOCATION]': PRECINCT_LOCATION,
+            '[ORG NAME]': ORG_NAME,
+            '[CONTACT EMAIL]': CONTACT_EMAIL
+        }
+    if email_type == 'reminder':
+        return REMINDER_TEMPLATE_PATH, SUBJECT_REMINDER, '3', 'reminder', {
+            '[ALTERNATIVE EMAIL FORM LINK]': ALTERNATIVE_EMAIL_FORM_LINK,
+            '[PRECINCT LOCATION]': PRECINCT_LOCATION,
+            '[ORG NAME]': ORG_NAME,
+            '[CONTACT EMAIL]': CONTACT_EMAIL
+        }
+    raise ValueError(f"Unknown email type: {email_type}")
+
+
+def campaign_headers(subject, priority, sender=None):
+    """Returns the headers shared by every email of a campaign, in order."""
+    return [
+        ('Subject', subject),
+        ('From', sender or SENDER_EMAIL),
+        ('Reply-To', CONTACT_EMAIL),
+        ('X-Priority', priority),
+        ('X-Mailer', 'VSU Election System'),
+        ('Organization', ORG_NAME),
+        ('List-Unsubscribe', f'<mailto:{CONTACT_EMAIL}?subject=Unsubscribe>'),
+    ]
+
+
+def campaign_key(source, values, headers):
+    return source, tuple(values.items()), tuple(headers)
+
+
+class Campaign:
+    """
+    One email type with every campaign-wide value already applied.
 
-    html_template = read_file_content(BALLOT_LINKS_TEMPLATE_PATH)
-    if not html_template:
-        return False
-    
-    html_content = html_template
-    
-    replacements = {
-        '[STUDENT NAME]': student_name,
-        '[WHITELISTED EMAIL]': recipient_email,
-        '[SPECIAL ELECTION LINK]': BALLOT_LINK,
-        '[ELECTION LINK]': BALLOT_LINK,
-        '[PRECINCT LOCATION]': PRECINCT_LOCATION,
-        '[ORG NAME]': ORG_NAME,
-        '[CONTACT EMAIL]': CONTACT_EMAIL
-    }
-
-    for placeholder, value in replacements.items():
-        html_content = html_content.replace(placeholder, value)
-
-    msg = MIMEMultipart('related')
-    msg['Subject'] = SUBJECT_BALLOT_LINKS
-    msg['From'] = SENDER_EMAIL
-    msg['To'] = recipient_email
-    msg['Reply-To'] = CONTACT_EMAIL
-    msg['X-Priority'] = '1'
-    msg['X-Mailer'] = 'VSU Election System'
-    msg['Organization'] = ORG_NAME
-    msg['List-Unsubscribe'] = f'<mailto:{CONTACT_EMAIL}?subject=Unsubscribe>'
+    The template has ORG NAME, CONTACT EMAIL, links and precinct details
+    baked in and the shared headers are encoded once, so each recipient
+    only costs filling [STUDENT NAME] and [WHITELISTED EMAIL] and encoding
+    the resulting body.
+    """
 
-    msg.attach(MIMEText(html_content, 'html'))
+    def __init__(self, email_type, source, label, values, headers):
+        self.email_type = email_type
+        self.source = source
+        self.label = label
+        self.values = values
+        self.headers = headers
+        self.template = source.partial(values)
+        self.builder = MessageBuilder(headers)
+        self.key = campaign_key(source, values, headers)
 
-    for attempt in range(max_retries):
-        try:
-            print(f"Attempting to send ballot links email to {recipient_email} (Attempt {attempt + 1}/{max_retries})...")
-            
-            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-            server.starttls()
-            server.login(SENDER_EMAIL, SENDER_PASSWORD)
-            server.sendmail(SENDER_EMAIL, recipient_email, msg.as_string())
-            server.quit()
+    def render(self, recipient_email, student_name):
+        with metrics.stage('render'):
+            return self.template.render({
+                '[STUDENT NAME]': student_name,
+                '[WHITELISTED EMAIL]': recipient_email,
+            })
 
-            print(f"Success: Ballot links email sent to {recipient_email}")
-            return True
+    def build_message(self, recipient_email, student_name):
+        """Returns the email for one recipient as bytes ready for sendmail."""
+        html = self.render(recipient_email, student_name)
+        with metrics.stage('build'):
+            return self.builder.build(recipient_email, html)
 
-        except smtplib.SMTPAuthenticationError:
-            print("❌ Error: Authentication failed. Please check your SENDER_EMAIL and SENDER_PASSWORD.")
-            break 
 
-        except Exception as e:
-            print(f"❌ Error sending email: {e}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {2 ** attempt} seconds...")
-                time.sleep(2 ** attempt) 
-            else:
-                print(f"Failed to send email to {recipient_email} after {max_retries} attempts.")
-                break
-    
-    return False
+_campaigns = {}
+_campaigns_lock = threading.Lock()
 
 
-def send_precinct_email(recipient_email, student_name, max_retries=3):
+def get_campaign(email_type, sender=None):
     """
-    Sends a customized HTML email with physical precinct details.
+    Returns the prepared Campaign for an email type sent from sender
+    (default: SENDER_EMAIL), or None if its template cannot be read.
+
+    The campaign is rebuilt only when the template file or the configuration
+    it depends on changes, so repeated sends reuse the partial render.
     """
+    template_path, subject, priority, label, values = campaign_settings(email_type)
+    source = load_template(template_path)
+    if not source:
+        return None
 
-    html_template = read_file_content(PRECINCT_TEMPLATE_PATH)
-    if not html_template:
-        return False
+    headers = campaign_headers(subject, priority, sender)
+    campaign = _campaigns.get((email_type, sender))
+    if campaign is None or campaign.key != campaign_key(source, values, headers):
+        with _campaigns_lock:
+            campaign = Campaign(email_type, source, label, values, headers)
+            _campaigns[(email_type, sender)] = campaign
+    return campaign
 
-    html_content = html_template
 
-    replacements = {
-        '[STUDENT NAME]': student_name,
-        '[WHITELISTED EMAIL]': recipient_email,
-        '[PRECINCT LOCATION]': PRECINCT_LOCATION,
-        '[ORG NAME]': ORG_NAME,
-        '[CONTACT EMAIL]': CONTACT_EMAIL
-    }
+def send_campaign_email(email_type, recipient_email, student_name, max_retries=3, session=None):
+    campaign = get_campaign(email_type)
+    if not campaign:
+        return False
 
-    for placeholder, value in replacements.items():
-        html_content = html_content.replace(placeholder, value)
+    msg = campaign.build_message(recipient_email, student_name)
+    return deliver_message(msg, recipient_email, campaign.label, max_retries=max_retries, session=session)
 
-    msg = MIMEMultipart('related')
-    msg['Subject'] = SUBJECT_PRECINCT
-    msg['From'] = SENDER_EMAIL
-    msg['To'] = recipient_email
-    msg['Reply-To'] = CONTACT_EMAIL
-    msg['X-Priority'] = '3'
-    msg['X-Mailer'] = 'VSU Election System'
-    msg['Organization'] = ORG_NAME
-    msg['List-Unsubscribe'] = f'<mailto:{CONTACT_EMAIL}?subject=Unsubscribe>'
 
-    msg.attach(MIMEText(html_content, 'html'))
+def send_blast_email(recipient_email, student_name, max_retries=3, session=None):
+    """
+    Sends a customized HTML blast notification email.
 
-    for attempt in range(max_retries):
-        try:
-            print(f"Attempting to send precinct email to {recipient_email} (Attempt {attempt + 1}/{max_retries})...")
+    :param recipient_email: The student's whitelisted email address.
+    :param student_name: The name of the student.
+    :param session: Optional SmtpSession to reuse across a batch.
+    """
+    return send_campaign_email('blast', recipient_email, student_name, max_retries, session)
 
-            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-            server.starttls()
-            server.login(SENDER_EMAIL, SENDER_PASSWORD)
-            server.sendmail(SENDER_EMAIL, recipient_email, msg.as_string())
-            server.quit()
 
-            print(f"Success: Precinct email sent to {recipient_email}")
-            return True
+def send_ballot_links_email(recipient_email, student_name, max_retries=3, session=None):
+    """
+    Sends a customized HTML email with ballot link.
 
-        except smtplib.SMTPAuthenticationError:
-            print("❌ Error: Authentication failed. Please check your SENDER_EMAIL and SENDER_PASSWORD.")
-            break
+    :param recipient_email: The student's whitelisted email address.
+    :param student_name: The name of the student.
+    :param session: Optional SmtpSession to reuse across a batch.
+    """
+    return send_campaign_email('ballot_links', recipient_email, student_name, max_retries, session)
 
-        except Exception as e:
-            print(f"❌ Error sending email: {e}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {2 ** attempt} seconds...")
-                time.sleep(2 ** attempt)
-            else:
-                print(f"Failed to send email to {recipient_email} after {max_retries} attempts.")
-                break
 
-    return False
+def send_precinct_email(recipient_email, student_name, max_retries=3, session=None):
+    """
+    Sends a customized HTML email with physical precinct details.
+    """
+    return send_campaign_email('precinct', recipient_email, student_name, max_retries, session)
 
 
-def send_reminder_email(recipient_email, student_name, max_retries=3):
+def send_reminder_email(recipient_email, student_name, max_retries=3, session=None):
     """
     Sends a reminder email for the upcoming election.
     """
+    return send_campaign_email('reminder', recipient_email, student_name, max_retries, session)
 
-    html_template = read_file_content(REMINDER_TEMPLATE_PATH)
-    if not html_template:
-        return False
 
-    html_content = html_template
+EMAIL_SENDERS = {
+    'blast': send_blast_email,
+    'ballot_links': send_ballot_links_email,
+    'precinct': send_precinct_email,
+    'reminder': send_reminder_email,
+}
 
-    replacements = {
-        '[STUDENT NAME]': student_name,
-        '[WHITELISTED EMAIL]': recipient_email,
-        '[ALTERNATIVE EMAIL FORM LINK]': ALTERNATIVE_EMAIL_FORM_LINK,
-        '[PRECINCT LOCATION]': PRECINCT_LOCATION,
-        '[ORG NAME]': ORG_NAME,
-        '[CONTACT EMAIL]': CONTACT_EMAIL
-    }
+DEFAULT_WORKERS = 1
+BACKENDS = ('sync', 'async')
+DEFAULT_BACKEND = 'sync'
+DEFAULT_PIPELINE_DEPTH = 10
+RETRY_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 600
+WARMUP_PRERENDER = 50
+WARMUP_LEAD = 30
 
-    for placeholder, value in replacements.items():
-        html_content = html_content.replace(placeholder, value)
 
-    msg = MIMEMultipart('related')
-    msg['Subject'] = SUBJECT_REMINDER
-    msg['From'] = SENDER_EMAIL
-    msg['To'] = recipient_email
-    msg['Reply-To'] = CONTACT_EMAIL
-    msg['X-Priority'] = '3'
-    msg['X-Mailer'] = 'VSU Election System'
-    msg['Organization'] = ORG_NAME
-    msg['List-Unsubscribe'] = f'<mailto:{CONTACT_EMAIL}?subject=Unsubscribe>'
+def build_rate_limiter(email_delay=DEFAULT_DELAY_BETWEEN_EMAILS, per_minute=None, per_hour=None, per_day=None,
+                       adaptive=None):
+    """
+    Creates the shared send budget for a batch.
+
+    Limits that are not given fall back to the RATE_LIMIT_* settings in .env.
+    adaptive (default: ADAPTIVE_THROTTLE in .env) lets the limiter slow down
+    when the server starts throttling and speed back up when it stops.
+    """
+    return RateLimiter(
+        min_interval=email_delay,
+        per_minute=per_minute if per_minute is not None else RATE_LIMIT_PER_MINUTE,
+        per_hour=per_hour if per_hour is not None else RATE_LIMIT_PER_HOUR,
+        per_day=per_day if per_day is not None else RATE_LIMIT_PER_DAY,
+        adaptive=ADAPTIVE_THROTTLE if adaptive is None else adaptive,
+    )
 
-    msg.attach(MIMEText(html_content, 'html'))
 
-    for attempt in range(max_retries):
+def build_sender_pool(email_delay=DEFAULT_DELAY_BETWEEN_EMAILS, per_minute=None, per_hour=None, per_day=None,
+                      adaptive=None, usage=None, share=1):
+    """
+    Creates the SenderPool for a batch, one RateLimiter per configured account.
+
+    An account's own RATE_LIMIT_*_n settings win; otherwise the batch limits
+    apply to each account separately. usage maps sender addresses to emails
+    they already sent in the last 24 hours, which count against their
+    daily quota. With share > 1 every limit (and the usage) is divided by
+    share, for one of that many processes sending the same batch.
+    """
+    accounts = configured_senders()
+    for account in accounts:
+        account.limiter = build_rate_limiter(
+            email_delay,
+            account.per_minute or per_minute,
+            account.per_hour or per_hour,
+            account.per_day or per_day,
+            adaptive,
+        )
+        if share > 1:
+            account.limiter = account.limiter.share(share)
+        if usage:
+            account.limiter.count_earlier_sends(usage.get(account.email, 0) / share)
+    return SenderPool(accounts)
+
+
+def describe_schedule(limiter, count):
+    """Returns a one-line summary of the send budget and predicted finish time."""
+    duration = int(limiter.estimate_duration(count))
+    finish = limiter.estimate_completion(count).strftime('%Y-%m-%d %H:%M')
+    hours, rest = divmod(duration, 3600)
+    mins, secs = divmod(rest, 60)
+    return f"Rate limit: {limiter.describe()} | Estimated time: {hours:d}h {mins:02d}m {secs:02d}s (done around {finish})"
+
+
+def send_pending_rows(pending_rows, email_type, email_col, name_col, on_result,
+                      workers=DEFAULT_WORKERS, limiter=None, cancel_event=None, log=print, total=None,
+                      backend=DEFAULT_BACKEND, pipeline=0, senders=None, spool=None, warmup=None):
+    """
+    Sends every pending row, optionally over several parallel SMTP sessions.
+
+    senders is a SenderPool (see build_sender_pool); without one the batch
+    sends from SENDER_EMAIL under limiter. Every account gets workers
+    connections of its own, each holding an SmtpSession, and the connections
+    of an account share its RateLimiter, so each account stays within its
+    own budget regardless of the worker count. Rows come from one
+    RetryScheduler shared by all accounts: a temporary or connection failure
+    puts the row back on a delayed retry heap while the workers carry on
+    with other rows, an account that fails to log in hands its rows to the
+    others (the batch stops, leaving them pending, once no account can log
+    in), and a failure summary by class is logged at the end.
+    on_result(row, result, sender) is called once per row when it is finally
+    sent or given up on, serialized under a lock so callers can update
+    shared state safely. pending_rows may be any iterable (e.g. a streamed
+    CSV); pass total when it has no len(). backend='async' runs the workers
+    as asyncio tasks instead of threads (see send_pending_rows_async);
+    pipeline > 1 implies it. With a spool (see deliver_spool) the rows are
+    index.csv entries and their emails are read from it instead of rendered.
+    A BatchWarmup that ran during the countdown hands over its open sessions
+    and pre-rendered emails; pending_rows should then be warmup.rows().
+
+    :return: (success_count, fail_count)
+    """
+    if backend == 'async' or pipeline > 1:
+        return asyncio.run(send_pending_rows_async(
+            pending_rows, email_type, email_col, name_col, on_result,
+            workers=workers, limiter=limiter, cancel_event=cancel_event, log=log, total=total,
+            pipeline=pipeline, senders=senders, spool=spool, warmup=warmup,
+        ))
+
+    cancel_event = cancel_event or threading.Event()
+    senders = senders or single_sender_pool(limiter)
+    result_lock = threading.Lock()
+    counts = {'success': 0, 'fail': 0}
+    if total is None:
+        total = len(pending_rows)
+    scheduler = new_retry_scheduler(pending_rows)
+    report_wait, prepare, complete = batch_helpers(
+        scheduler, senders, email_type, email_col, name_col, on_result, counts, log, total, spool, warmup
+    )
+
+    def worker(account):
+        session = (warmup and warmup.take_session(account)) or open_smtp_session(account)
         try:
-            print(f"Attempting to send reminder email to {recipient_email} (Attempt {attempt + 1}/{max_retries})...")
+            while not cancel_event.is_set() and account.disabled is None:
+                if senders.yield_to_others(account):
+                    if scheduler.done:
+                        break
+                    cancel_event.wait(1.0)
+                    continue
+                item, wait = scheduler.take()
+                if item is None:
+                    if wait is None:
+                        break
+                    cancel_event.wait(min(wait, 0.5))
+                    continue
+                if not account.limiter.acquire(cancel_event, on_wait=report_wait):
+                    scheduler.finish(item)
+                    break
+
+                recipient, msg, label = prepare(item, account)
+                failure = PERMANENT
+                if msg is not None:
+                    try:
+                        failure = attempt_delivery(msg, recipient, label, session, item[2],
+                                                   scheduler.max_attempts, account.email, log)
+                    except Exception as e:
+                        log(f"❌ Error processing row: {e}")
+
+                with result_lock:
+                    complete(item, recipient, failure, account)
+        finally:
+            session.close()
+
+    jobs = worker_accounts(senders, workers, total)
+    if len(jobs) == 1:
+        worker(jobs[0])
+    else:
+        threads = [threading.Thread(target=worker, args=(account,), daemon=True) for account in jobs]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            cancel_event.set()
+            for thread in threads:
+                thread.join()
+            raise
 
-            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-            server.starttls()
-            server.login(SENDER_EMAIL, SENDER_PASSWORD)
-            server.sendmail(SENDER_EMAIL, recipient_email, msg.as_string())
-            server.quit()
+    report_failures(scheduler, senders, log)
+    return counts['success'], counts['fail']
 
-            print(f"Success: Reminder email sent to {recipient_email}")
-            return True
 
-        except smtplib.SMTPAuthenticationError:
-            print("❌ Error: Authentication failed. Please check your SENDER_EMAIL and SENDER_PASSWORD.")
-            break
+def single_sender_pool(limiter=None):
+    account = primary_sender()
+    account.limiter = limiter or RateLimiter()
+    return SenderPool([account])
+
+
+def worker_accounts(senders, workers, total):
+    """Returns the account of each worker to start: workers per account, no more than there are rows."""
+    per_account = max(1, min(workers, total or 1))
+    return [account for account in senders.active() for _ in range(per_account)]
+
+
+def new_retry_scheduler(pending_rows):
+    return RetryScheduler(
+        pending_rows,
+        max_attempts=RETRY_MAX_ATTEMPTS,
+        base_delay=RETRY_BASE_DELAY,
+        max_delay=RETRY_MAX_DELAY,
+    )
+
+
+def batch_helpers(scheduler, senders, email_type, email_col, name_col, on_result, counts, log, total,
+                  spool=None, warmup=None):
+    """
+    Returns the (report_wait, prepare, complete) callbacks shared by the
+    thread and asyncio batch runners.
+    """
 
+    def report_wait(seconds):
+        resume_at = (datetime.now() + timedelta(seconds=seconds)).strftime('%H:%M:%S')
+        log(f"Sending limit reached. Next email at {resume_at}.")
+
+    def prepare(item, account):
+        """Returns (recipient, message bytes, label); the message is None if it cannot be built."""
+        idx, row, attempt = item
+        # The roster's address, tidied but with its case kept; the duplicate
+        # check and the ledger compare it normalized.
+        recipient = delivery_address(row.get(email_col))
+        name = (row.get(name_col) or '').strip()
+        retry_note = f" (retry {attempt - 1})" if attempt > 1 else ""
+        via = f" via {account.email}" if len(senders.accounts) > 1 else ""
+        log(f"[{idx}/{total}] Sending to {name} <{recipient}>{via}{retry_note}...")
+        try:
+            if warmup is not None and attempt == 1:
+                prepared = warmup.take_message(row, account.email)
+                if prepared is not None:
+                    return recipient, prepared, warmup.label
+            if spool is not None:
+                with metrics.stage('spool'):
+                    return recipient, spool.message(row, account.email), spool.label
+            campaign = get_campaign(email_type, account.email)
+            if campaign:
+                return recipient, campaign.build_message(recipient, name), campaign.label
+        except Exception as e:
+            log(f"❌ Error processing row: {e}")
+        return recipient, None, None
+
+    def complete(item, recipient, failure, account):
+        """Records a row's result, or requeues it if the failure is worth retrying."""
+        adjust_rate(account.limiter, failure, log)
+        if failure == AUTH:
+            # The row stays pending: another account sends it, or a later run
+            # does if none can log in. The account's workers stop either way.
+            was_active = account.disabled is None
+            others_left = senders.disable(account, "login failed")
+            scheduler.requeue(item)
+            if was_active and others_left:
+                log(f"❌ {account.email} could not log in; sending its emails from the other accounts.")
+            elif was_active:
+                log(f"❌ {account.email} could not log in and no other account can send; stopping the batch.")
+            return
+        if failure is not None and scheduler.should_retry(item, failure):
+            delay = scheduler.retry(item)
+            log(f"Will retry {recipient} in {delay:.0f} seconds ({failure} failure).")
+            return
+        scheduler.finish(item, failure)
+        result = failure is None
+        senders.record(account, result)
+        counts['success' if result else 'fail'] += 1
+        metrics.count(result)
+        with metrics.stage('status'):
+            on_result(item[1], result, account.email)
+
+    return report_wait, prepare, complete
+
+
+def adjust_rate(limiter, failure, log):
+    """Feeds a send result to the limiter's adaptive throttling and logs rate changes."""
+    if failure == THROTTLED:
+        rate = limiter.throttled()
+        if rate is not None:
+            log(f"⚠️ The server is throttling us; slowing down to {rate:.0f} emails/minute.")
+    elif failure is None:
+        rate = limiter.delivered()
+        if rate == 0:
+            log("Server throttling has eased; back to the configured sending limits.")
+        elif rate is not None:
+            log(f"No throttling for a while; speeding up to {rate:.0f} emails/minute.")
+
+
+def report_failures(scheduler, senders, log):
+    if scheduler.failures:
+        log(f"Failures by type: {describe_failures(scheduler.failures)}")
+    if not senders.active():
+        log("❌ No sending account could log in. The emails not sent yet stay pending; check "
+            "SENDER_EMAIL and SENDER_PASSWORD and run the batch again.")
+    elif scheduler.pending_retries():
+        log(f"{scheduler.pending_retries()} rows were waiting to be retried and are still pending.")
+    if len(senders.accounts) > 1:
+        log("Emails per account:")
+        for line in senders.usage_lines():
+            log(f"  {line}")
+
+
+async def send_pending_rows_async(pending_rows, email_type, email_col, name_col, on_result,
+                                  workers=DEFAULT_WORKERS, limiter=None, cancel_event=None, log=print,
+                                  total=None, pipeline=0, senders=None, spool=None, warmup=None):
+    """
+    asyncio version of send_pending_rows.
+
+    Every worker is a task on one event loop holding its own
+    AsyncSmtpSession, so many concurrent sessions cost no threads and time
+    spent waiting on the server overlaps across sessions. Rows come from the
+    same RetryScheduler, accounts and limiters work as in send_pending_rows,
+    and cancel_event (a threading.Event, e.g. the GUI's Cancel button) is
+    checked before each send and while waiting for a send slot; a send
+    already in progress is allowed to finish.
+
+    With pipeline > 1, each worker sends up to that many rows back to back
+    with AsyncSmtpSession.send_many whenever the rate limit already allows
+    them. Each row keeps its own result from the server's reply to it, and
+    rows the server did not accept go through the retry scheduler.
+
+    :return: (success_count, fail_count)
+    """
+    cancel_event = cancel_event or threading.Event()
+    senders = senders or single_sender_pool(limiter)
+    counts = {'success': 0, 'fail': 0}
+    if total is None:
+        total = len(pending_rows)
+    scheduler = new_retry_scheduler(pending_rows)
+    report_wait, prepare, complete = batch_helpers(
+        scheduler, senders, email_type, email_col, name_col, on_result, counts, log, total, spool, warmup
+    )
+
+    async def send_one(session, item, account):
+        recipient, msg, label = prepare(item, account)
+        failure = PERMANENT
+        if msg is not None:
+            try:
+                failure = await attempt_delivery_async(msg, recipient, label, session, item[2],
+                                                       scheduler.max_attempts, account.email, log)
+            except Exception as e:
+                log(f"❌ Error processing row: {e}")
+        complete(item, recipient, failure, account)
+
+    async def send_pipelined(session, batch, account):
+        prepared = [(item, *prepare(item, account)) for item in batch]
+        ready = [entry for entry in prepared if entry[2] is not None]
+        try:
+            replies = await session.send_many(account.email, [(recipient, msg) for _, recipient, msg, _ in ready])
         except Exception as e:
-            print(f"❌ Error sending email: {e}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {2 ** attempt} seconds...")
-                time.sleep(2 ** attempt)
+            failure = classify(e)
+            report_failure(e, failure, log)
+            for item, recipient, msg, label in prepared:
+                complete(item, recipient, failure if msg is not None else PERMANENT, account)
+            return
+        for item, recipient, msg, label in prepared:
+            if msg is None:
+                complete(item, recipient, PERMANENT, account)
+        for (item, recipient, msg, label), reply in zip(ready, replies):
+            if reply is not None and reply[0] == 250:
+                log(f"Success: {label.capitalize()} email sent to {recipient}")
+                complete(item, recipient, None, account)
+                continue
+            failure = classify_code(*reply) if reply is not None else classify_code(None)
+            if reply is not None:
+                log(f"❌ Server rejected {recipient} ({failure}): {reply[0]} {reply[1].decode('utf-8', 'replace')}")
             else:
-                print(f"Failed to send email to {recipient_email} after {max_retries} attempts.")
-                break
+                log(f"❌ No reply from the server for {recipient} ({failure})")
+            complete(item, recipient, failure, account)
 
-    return False
+    async def worker(account):
+        session = open_async_smtp_session(account)
+        limiter = account.limiter
+        carried = None
+        try:
+            while not cancel_event.is_set() and account.disabled is None:
+                if carried is not None:
+                    item, carried = carried, None
+                else:
+                    if senders.yield_to_others(account):
+                        if scheduler.done:
+                            break
+                        await asyncio.sleep(1.0)
+                        continue
+                    item, wait = scheduler.take()
+                    if item is None:
+                        if wait is None:
+                            break
+                        await asyncio.sleep(min(wait, 0.5))
+                        continue
+                if not await limiter.acquire_async(cancel_event, on_wait=report_wait):
+                    scheduler.finish(item)
+                    break
+
+                batch = [item]
+                while len(batch) < pipeline:
+                    item, _ = scheduler.take()
+                    if item is None:
+                        break
+                    if not limiter.try_acquire():
+                        carried = item
+                        break
+                    batch.append(item)
+
+                if len(batch) == 1:
+                    await send_one(session, batch[0], account)
+                else:
+                    await send_pipelined(session, batch, account)
+        finally:
+            if carried is not None:
+                scheduler.requeue(carried)
+            await session.close()
+
+    await asyncio.gather(*(worker(account) for account in worker_accounts(senders, workers, total)))
+    report_failures(scheduler, senders, log)
+    return counts['success'], counts['fail']
+
+
+class BatchWarmup:
+    """
+    Gets a batch ready to send while its start countdown runs.
+
+    start() begins in the background by logging in to every account, so a
+    wrong password stops the countdown instead of the first send. It then
+    compiles the campaign for each account and renders the first prerender
+    emails. lead seconds before the start it opens the connections the
+    workers will use, late enough that the server does not drop them as
+    idle. send_pending_rows takes the open sessions (take_session) and
+    prepared emails (take_message) instead of starting cold, and must be
+    given rows() since the first rows were already read from pending_rows.
+
+    Only the sync engine in this process can reuse the connections; for the
+    async engine and worker processes pass sessions=False and prerender=0,
+    and the warm-up just checks the logins and templates.
+    """
 
+    def __init__(self, pending_rows, email_type, email_col, name_col, senders, workers=DEFAULT_WORKERS,
+                 total=None, sessions=True, prerender=WARMUP_PRERENDER, spool=None, lead=WARMUP_LEAD, log=print):
+        self.pending = iter(pending_rows)
+        self.email_type = email_type
+        self.email_col = email_col
+        self.name_col = name_col
+        self.senders = senders
+        self.workers = workers
+        self.total = total
+        self.open_sessions = sessions
+        self.prerender = 0 if spool is not None else prerender
+        self.spool = spool
+        self.lead = lead
+        self.log = log
+        self.sender = SENDER_EMAIL
+        self.label = spool.label if spool is not None else None
+        self.first_rows = []
+        self.messages = {}
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.error = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self, delay):
+        self.deadline = time.monotonic() + delay
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            if not self.check_logins() or self.stopped.is_set():
+                return
+            self.prepare_campaigns()
+            if self.open_sessions and not self.stopped.wait(max(0.0, self.deadline - self.lead - time.monotonic())):
+                self.connect_workers()
+        except Exception as e:
+            self.log(f"⚠️ Warm-up stopped early ({e}); the batch will start without it.")
+
+    def check_logins(self):
+        """Logs in once per account. Returns False if no account can send."""
+        for account in self.senders.active():
+            session = open_smtp_session(account)
+            try:
+                session.connect()
+            except Exception as e:
+                failure = classify(e)
+                if failure != AUTH:
+                    self.log(f"⚠️ Could not reach {account.server} for {account.email} yet ({e}); "
+                             "will try again when sending starts.")
+                    continue
+                if not self.senders.disable(account, "login failed"):
+                    self.error = f"{account.email} could not log in. Check SENDER_EMAIL and SENDER_PASSWORD."
+                    return False
+                self.log(f"❌ {account.email} could not log in; its emails will go out from the other accounts.")
+                continue
+            self.log(f"✅ Logged in as {account.username or account.email}.")
+            if not self.open_sessions:
+                session.close()
+                continue
+            with self.lock:
+                self.sessions.setdefault(account.email, []).append(session)
+        return True
 
-def countdown_timer(delay_seconds):
+    def prepare_campaigns(self):
+        if self.spool is not None:
+            return
+        # The prerendered emails below are built from SENDER_EMAIL (sender None).
+        for sender in [account.email for account in self.senders.active()] + [None]:
+            campaign = get_campaign(self.email_type, sender)
+            if campaign is None:
+                self.log(f"❌ Error: Could not load the {self.email_type} email template")
+                return
+            self.label = campaign.label
+        for row in itertools.islice(self.pending, self.prerender):
+            self.first_rows.append(row)
+            recipient = delivery_address(row.get(self.email_col))
+            name = (row.get(self.name_col) or '').strip()
+            with self.lock:
+                self.messages[id(row)] = campaign.build_message(recipient, name)
+            if self.stopped.is_set():
+                return
+
+    def connect_workers(self):
+        """Opens (or refreshes) one connection for each worker that will start."""
+        opened = 0
+        for account in worker_accounts(self.senders, self.workers, self.total):
+            with self.lock:
+                ready = self.sessions.setdefault(account.email, [])
+                fresh = [session for session in ready if session.connection is not None
+                         and time.monotonic() - session.opened_at < self.lead]
+                stale = [session for session in ready if session not in fresh]
+            if stale:
+                stale[0].connect()
+            elif len(ready) < self.workers:
+                session = open_smtp_session(account)
+                session.connect()
+                with self.lock:
+                    ready.append(session)
+            else:
+                continue
+            opened += 1
+            if self.stopped.is_set():
+                return
+        if opened:
+            self.log(f"Opened {opened} connections ahead of the start.")
+
+    def rows(self):
+        """The pending rows, starting with the ones read for pre-rendering."""
+        return itertools.chain(self.first_rows, self.pending)
+
+    def take_session(self, account):
+        with self.lock:
+            ready = self.sessions.get(account.email)
+            return ready.pop() if ready else None
+
+    def take_message(self, row, sender):
+        """Returns the email pre-rendered for row (From changed to sender), or None."""
+        with self.lock:
+            message = self.messages.pop(id(row), None)
+        if message is not None and sender != self.sender:
+            message = replace_sender(message, self.sender, sender)
+        return message
+
+    def finish(self):
+        """Waits for the warm-up to complete. Returns False if the batch should not start."""
+        if self.thread is not None:
+            self.thread.join()
+        return self.error is None
+
+    def close(self):
+        """Stops the warm-up and closes any connection no worker took."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        with self.lock:
+            sessions = [session for ready in self.sessions.values() for session in ready]
+            self.sessions = {}
+        for session in sessions:
+            session.close()
+
+
+def countdown_timer(delay_seconds, warmup=None):
     """
     Displays a countdown timer and checks for cancellation.
     Returns True if cancelled, False if timer completed.
+
+    A BatchWarmup passed in is started with the countdown; if it finds that
+    no account can log in, the countdown stops and counts as cancelled.
+    Ctrl+C also sets cancel_scheduled_send, so callers can tell the two apart.
     """
     global cancel_scheduled_send
     
     print(f"\nEmail will be sent in {delay_seconds} seconds...")
     print("Press Ctrl+C to cancel the scheduled send.\n")
+    if warmup is not None:
+        # Warm-up messages overwrite the timer line; the next tick redraws it.
+        warmup.log = lambda message: print(f"\r{message:<22}")
+        warmup.start(delay_seconds)
     
     try:
         for remaining in range(delay_seconds, 0, -1):
             if cancel_scheduled_send:
                 return True
+            if warmup is not None and warmup.error:
+                print(f"\n❌ {warmup.error}")
+                return True
             
             mins, secs = divmod(remaining, 60)
             timer = f'{mins:02d}:{secs:02d}'
@@ -375,43 +1213,24 @@ def countdown_timer(delay_seconds):
             time.sleep(1)
         
         print('\n')
+        if warmup is not None and not warmup.finish():
+            print(f"❌ {warmup.error}")
+            return True
         return False
     
     except KeyboardInterrupt:
         print("\n\n❌ Send cancelled by user!")
+        cancel_scheduled_send = True
         return True
 
 
-def process_csv_batch(csv_file, email_type, delay=0, email_delay=DEFAULT_DELAY_BETWEEN_EMAILS):
+def detect_columns(fieldnames):
     """
-    Process batch emails from CSV file.
-    
-    CSV format for all email types:
-    email,name
-    
-    :param email_delay: Delay in seconds between each email (default: 3 seconds)
+    Finds the email and name columns in a CSV header (case-insensitive and
+    flexible). Returns (email_col, name_col); either may be None.
     """
-    global cancel_scheduled_send
-    
-    if not os.path.exists(csv_file):
-        print(f"❌ Error: CSV file not found at {csv_file}")
-        return
-    
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-        fieldnames = list(reader.fieldnames or [])
-    
-    # Check if CSV is empty
-    if not rows:
-        print("❌ Error: CSV file is empty")
-        return
-    
-    # Detect column names (case-insensitive and flexible)
-    first_row = rows[0]
-    headers = {k.lower().strip(): k for k in first_row.keys()}
-    
-    # Map expected columns to actual CSV columns
+    headers = {k.lower().strip(): k for k in fieldnames}
+
     email_col = None
     name_col = None
     for key in headers:
@@ -427,108 +1246,661 @@ def process_csv_batch(csv_file, email_type, delay=0, email_delay=DEFAULT_DELAY_B
             email_col = headers[key]
         elif not name_col and 'name' in key:
             name_col = headers[key]
-    
-    # Validate required columns exist
+
+    return email_col, name_col
+
+
+def report_missing_columns(email_col, name_col, fieldnames):
+    """Prints an error and returns True if a required column is missing."""
     missing_cols = []
     if not email_col:
         missing_cols.append('email')
     if not name_col:
         missing_cols.append('name')
-    
+
     if missing_cols:
         print(f"❌ Error: CSV is missing required columns: {', '.join(missing_cols)}")
-        print(f"Available columns: {', '.join(first_row.keys())}")
+        print(f"Available columns: {', '.join(fieldnames)}")
         print(f"\nExpected format: email,name")
-        return
-    
-    if not fieldnames:
-        fieldnames = list(rows[0].keys())
+        return True
+    return False
+
+
+def preview_entries(pending_rows, preview_size=DEFAULT_PREVIEW_SIZE):
+    """Returns (position, row) pairs for the first and last preview_size rows."""
+    if len(pending_rows) <= preview_size * 2:
+        return list(enumerate(pending_rows, 1))
+    head = list(enumerate(pending_rows[:preview_size], 1))
+    start = len(pending_rows) - preview_size + 1
+    return head + list(enumerate(pending_rows[-preview_size:], start))
+
+
+def print_preview(preview, pending_count, email_col, name_col):
+    last_position = 0
+    for position, row in preview:
+        if position > last_position + 1:
+            print(f"  ... {position - last_position - 1} more ...")
+        print(f"  {position}. {row[name_col]} - {row[email_col]}")
+        last_position = position
+    if pending_count > last_position:
+        print(f"  ... {pending_count - last_position} more ...")
 
-    status_col = ensure_status_column(fieldnames, email_type)
-    pending_rows = [row for row in rows if not status_is_sent(row.get(status_col))]
-    already_sent = len(rows) - len(pending_rows)
+
+def ledger_path(roster, ledger_file):
+    """Returns where the ledger of a roster is kept: a bare file name goes next to the roster."""
+    if os.path.dirname(ledger_file):
+        return ledger_file
+    return os.path.join(os.path.dirname(os.path.abspath(roster)), ledger_file)
+
+
+def open_campaign_ledger(roster, campaign, ledger_file=None):
+    """
+    Returns the SentLedger for a batch, or None if it does not use one.
+
+    The ledger is only used for a named campaign (not None or
+    DEFAULT_CAMPAIGN), so a new election simply gets a new name instead of
+    being skipped silently. ledger_file defaults to SENT_LEDGER; '' turns
+    the ledger off.
+    """
+    if not campaign or campaign == DEFAULT_CAMPAIGN:
+        return None
+    ledger_file = SENT_LEDGER if ledger_file is None else ledger_file
+    return open_ledger(ledger_path(roster, ledger_file) if ledger_file else None)
+
+
+def new_address_index(ledger, email_type, campaign=DEFAULT_CAMPAIGN):
+    """Returns an AddressIndex that already knows the addresses the ledger has sent this email to."""
+    return AddressIndex(ledger.addresses(email_type, campaign) if ledger is not None else ())
+
+
+def collapse_duplicate_rows(rows, email_col, status_col, address_index):
+    """
+    Returns the pending rows of a loaded roster, one per normalized address.
+
+    Rows whose status column says sent mark their address as sent, so a
+    pending copy of it elsewhere in the roster is skipped as well. Skipped
+    rows get DUPLICATE_STATUS, which is saved with the other results.
+    """
+    for row in rows:
+        if status_is_sent(row.get(status_col)):
+            address_index.mark_sent(row.get(email_col))
+    pending_rows = []
+    for number, row in enumerate(rows, 1):
+        if status_is_sent(row.get(status_col)):
+            continue
+        if address_index.admit(row.get(email_col), number):
+            pending_rows.append(row)
+        else:
+            row[status_col] = DUPLICATE_STATUS
+    return pending_rows
+
+
+def store_pending_rows(store, email_type, campaign, address_index):
+    """store.pending() with each normalized address only once (see collapse_duplicate_rows)."""
+    for _, email, status in store.statuses(email_type, campaign):
+        if status_is_sent(status):
+            address_index.mark_sent(email)
+    pending_rows = []
+    for row in store.pending(email_type, campaign):
+        if address_index.admit(row['email']):
+            pending_rows.append(row)
+        else:
+            store.record(row['id'], email_type, DUPLICATE_STATUS, campaign)
+    return pending_rows
+
+
+def report_collapsed(address_index, ledger, email_type, campaign=DEFAULT_CAMPAIGN, log=print):
+    """
+    Logs the rows the address index skipped and copies the addresses the
+    roster marks as sent into the ledger, so other rosters skip them too.
+    """
+    for line in address_index.describe():
+        log(line)
+    if ledger is not None and address_index.roster_sent:
+        ledger.record_many(address_index.roster_sent, email_type, campaign)
+
+
+def run_batch_send(pending_rows, total, email_type, email_col, name_col, open_status_writer,
+                   delay=0, email_delay=DEFAULT_DELAY_BETWEEN_EMAILS, workers=DEFAULT_WORKERS,
+                   per_minute=None, per_hour=None, per_day=None, pending_count=None, preview=None,
+                   backend=DEFAULT_BACKEND, pipeline=0, assume_yes=False, metrics_file=None, adaptive=None,
+                   sender_usage=None, processes=1, spool=None, ledger=None, campaign=DEFAULT_CAMPAIGN,
+                   skipped=0):
+    """
+    Shows the batch preview, asks for confirmation and sends the pending rows.
+
+    open_status_writer() is called once the user confirms and must return an
+    object with record(row, status) and close(). For streamed rows, pass
+    pending_count and a ready-made preview since they cannot be re-read.
+    skipped is the number of rows left out as duplicates (see
+    AddressIndex.collapsed); the rest of total are already sent.
+    assume_yes skips the confirmation prompt for unattended runs.
+    metrics_file (default: METRICS_FILE in .env) receives per-stage timings
+    while the batch runs; a breakdown is printed at the end either way.
+    sender_usage maps sender addresses to emails sent in the last 24 hours
+    (see build_sender_pool). processes > 1 spreads the sending over that
+    many worker processes (see process_runner.send_in_processes), except
+    with a spool, whose emails are already rendered and are sent from this
+    process. spool is passed on to send_pending_rows. A BatchWarmup runs during the
+    start countdown (delay seconds). Each address sent successfully is
+    added to ledger (a SentLedger) under email_type and campaign.
+
+    :return: (success_count, fail_count), or None if the batch did not start
+    """
+    if pending_count is None:
+        pending_count = len(pending_rows)
+    if preview is None:
+        preview = preview_entries(pending_rows)
+    # Every row is pending, skipped as a duplicate or marked sent.
+    already_sent = total - pending_count - skipped
 
     print(f"\nBatch Email Preview:")
     print(f"Type: {email_type.upper()}")
-    print(f"Total recipients: {len(rows)}")
+    print(f"Total recipients: {total}")
     print(f"Already emailed: {already_sent}")
-    print(f"Pending: {len(pending_rows)}")
+    if skipped:
+        print(f"Duplicates skipped: {skipped}")
+    print(f"Pending: {pending_count}")
     print(f"Delay between emails: {email_delay} seconds")
-
-    for i, row in enumerate(pending_rows, 1):
-        print(f"  {i}. {row[name_col]} - {row[email_col]}")
+    if pipeline > 1:
+        backend = 'async'
+    if processes > 1 and spool is not None:
+        print("⚠️ --processes is ignored when delivering a spool: its emails are already rendered, "
+              "so they are sent from this process.")
+        processes = 1
+    print(f"Parallel connections: {workers} ({backend} backend)")
+    if processes > 1:
+        print(f"Worker processes: {processes} ({workers} connections each)")
+    if pipeline > 1:
+        print(f"Pipelining: up to {pipeline} emails per round trip")
+    senders = build_sender_pool(email_delay, per_minute, per_hour, per_day, adaptive, sender_usage)
+    if len(senders.accounts) > 1:
+        print(f"Sending accounts: {len(senders.accounts)} ({', '.join(a.email for a in senders.accounts)})")
+    print(describe_schedule(senders, pending_count))
+    if senders.accounts[0].limiter.adaptive:
+        print("Adaptive throttling: on (slows down automatically if the server pushes back)")
+
+    print_preview(preview, pending_count, email_col, name_col)
     
-    confirm = input(f"\nDo you want to proceed with sending {len(pending_rows)} emails? (yes/no): ").strip().lower()
-    if confirm not in ['yes', 'y']:
-        print("❌ Batch send cancelled.")
-        return
+    if not assume_yes:
+        confirm = input(f"\nDo you want to proceed with sending {pending_count} emails? (yes/no): ").strip().lower()
+        if confirm not in ['yes', 'y']:
+            print("❌ Batch send cancelled.")
+            return
 
-    if pending_rows:
-        write_csv_rows(csv_file, fieldnames, rows)
-    else:
+    if not pending_count:
+        if skipped:
+            # Saves the duplicate status of the skipped rows.
+            open_status_writer().close()
         print("✅ No pending recipients. Nothing to send.")
-        return
-    
+        return 0, 0
+
+    status_writer = open_status_writer()
+
+    warmup = None
     if delay > 0:
-        if countdown_timer(delay):
+        in_process = processes == 1
+        warmup = BatchWarmup(
+            pending_rows, email_type, email_col, name_col, senders, workers, pending_count,
+            sessions=in_process and backend == 'sync', prerender=WARMUP_PRERENDER if in_process else 0,
+            spool=spool,
+        )
+        if countdown_timer(delay, warmup):
+            warmup.close()
+            status_writer.close()
             print("❌ Batch send cancelled during countdown.")
             return
+        pending_rows = warmup.rows()
     
-    success_count = 0
-    fail_count = 0
-    
-    for idx, row in enumerate(pending_rows, 1):
-        if cancel_scheduled_send:
-            print("\n❌ Batch send cancelled!")
-            break
-        
-        print(f"\n[{idx}/{len(rows)}] Processing: {row[name_col]} <{row[email_col]}>")
-        
-        try:
-            if email_type == 'blast':
-                result = send_blast_email(
-                    recipient_email=row[email_col],
-                    student_name=row[name_col]
-                )
-            elif email_type == 'ballot_links':
-                result = send_ballot_links_email(
-                    recipient_email=row[email_col],
-                    student_name=row[name_col]
-                )
-            elif email_type == 'precinct':
-                result = send_precinct_email(
-                    recipient_email=row[email_col],
-                    student_name=row[name_col]
-                )
-            elif email_type == 'reminder':
-                result = send_reminder_email(
-                    recipient_email=row[email_col],
-                    student_name=row[name_col]
-                )
-            
-            if result:
-                success_count += 1
-                row[status_col] = "yes"
-            else:
-                fail_count += 1
-                row[status_col] = "failed"
+    def record_result(row, result, sender=None):
+        status_writer.record(row, "yes" if result else "failed", sender)
+        if result and ledger is not None:
+            ledger.record(row.get(email_col), email_type, campaign)
+
+    batch_metrics = metrics.activate(metrics.SendMetrics(metrics_file or METRICS_FILE or None))
+    try:
+        if processes > 1:
+            success_count, fail_count = send_in_processes(
+                pending_rows,
+                email_type,
+                email_col,
+                name_col,
+                record_result,
+                processes,
+                workers=workers,
+                total=pending_count,
+                backend=backend,
+                pipeline=pipeline,
+                limits=dict(email_delay=email_delay, per_minute=per_minute, per_hour=per_hour,
+                            per_day=per_day, adaptive=adaptive, sender_usage=sender_usage),
+            )
+        else:
+            success_count, fail_count = send_pending_rows(
+                pending_rows,
+                email_type,
+                email_col,
+                name_col,
+                record_result,
+                workers=workers,
+                total=pending_count,
+                backend=backend,
+                pipeline=pipeline,
+                senders=senders,
+                spool=spool,
+                warmup=warmup,
+            )
+    finally:
+        if warmup is not None:
+            warmup.close()
+        status_writer.close()
+        metrics.deactivate()
+        batch_metrics.write()
 
-            write_csv_rows(csv_file, fieldnames, rows)
-            
-            if idx < len(pending_rows):
-                print(f"Waiting {email_delay} seconds before next email...")
-                time.sleep(email_delay)
-            
-        except KeyError as e:
-            print(f"❌ Error: Missing required column in CSV: {e}")
-            fail_count += 1
-        except Exception as e:
-            print(f"❌ Error processing row: {e}")
-            fail_count += 1
-    
     print(f"\n--- Batch Processing Complete ---")
     print(f"✅ Successfully sent: {success_count}")
     print(f"❌ Failed: {fail_count}")
+    print(f"\nTime per stage:")
+    for line in batch_metrics.breakdown():
+        print(f"  {line}")
+    if batch_metrics.path:
+        print(f"Metrics written to {batch_metrics.path}")
+    return success_count, fail_count
+
+
+def process_csv_batch(csv_file, email_type, delay=0, email_delay=DEFAULT_DELAY_BETWEEN_EMAILS,
+                      workers=DEFAULT_WORKERS, per_minute=None, per_hour=None, per_day=None,
+                      store=None, campaign=None, stream=None, backend=DEFAULT_BACKEND,
+                      pipeline=0, assume_yes=False, metrics_file=None, adaptive=None, processes=1,
+                      ledger_file=None):
+    """
+    Process batch emails from CSV file.
+    
+    CSV format for all email types:
+    email,name
+    
+    :param email_delay: Delay in seconds between each email (default: 3 seconds)
+    :param workers: Number of parallel SMTP connections per sending account (default: 1)
+    :param per_minute: Optional cap on emails per minute (also per_hour, per_day)
+    :param store: Optional SQLite file used to track status instead of the CSV
+    :param campaign: Campaign name the status is kept under in the store
+                     (default: DEFAULT_CAMPAIGN); naming one also skips the
+                     addresses its sent-address ledger has already sent
+    :param stream: Read the CSV lazily instead of loading it (default: only
+                   for files larger than STREAM_THRESHOLD_BYTES)
+    :param backend: 'sync' (one thread per connection) or 'async' (asyncio)
+    :param pipeline: Send up to this many emails per round trip on each
+                     connection with SMTP PIPELINING (uses the async backend)
+    :param assume_yes: Start without asking for confirmation
+    :param metrics_file: Write per-stage timings here during the run
+                         (.json for JSON, anything else for Prometheus text)
+    :param adaptive: Slow down automatically when the server throttles
+                     (default: ADAPTIVE_THROTTLE in .env)
+    :param processes: Render and send from this many processes, each with
+                      workers connections and an equal share of the limits
+    :param ledger_file: SentLedger file of a named campaign (default:
+                        SENT_LEDGER in .env, next to the CSV; '' turns it off)
+    :return: (success_count, fail_count), or None if the batch did not start
+    """
+    global cancel_scheduled_send
+    
+    if not os.path.exists(csv_file):
+        print(f"❌ Error: CSV file not found at {csv_file}")
+        return
+
+    limits = dict(delay=delay, email_delay=email_delay, workers=workers,
+                  per_minute=per_minute, per_hour=per_hour, per_day=per_day, backend=backend,
+                  pipeline=pipeline, assume_yes=assume_yes, metrics_file=metrics_file, adaptive=adaptive,
+                  processes=processes)
+
+    ledger = open_campaign_ledger(csv_file, campaign, ledger_file)
+    campaign = campaign or DEFAULT_CAMPAIGN
+    try:
+        if store:
+            return process_store_batch(csv_file, store, email_type, campaign, ledger, **limits)
+
+        if stream is None:
+            stream = os.path.getsize(csv_file) > STREAM_THRESHOLD_BYTES
+        if stream:
+            return process_stream_batch(csv_file, email_type, campaign, ledger, **limits)
+        return process_roster_batch(csv_file, email_type, campaign, ledger, **limits)
+    finally:
+        if ledger is not None:
+            ledger.close()
+
+
+def process_roster_batch(csv_file, email_type, campaign=DEFAULT_CAMPAIGN, ledger=None, **limits):
+    """
+    Batch send that loads the whole CSV and writes the status column back to it.
+
+    Pending rows are collapsed to one per normalized address before the
+    preview (see collapse_duplicate_rows).
+    """
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+        fieldnames = list(reader.fieldnames or [])
+    
+    # Check if CSV is empty
+    if not rows:
+        print("❌ Error: CSV file is empty")
+        return
+    
+    if not fieldnames:
+        fieldnames = list(rows[0].keys())
+
+    email_col, name_col = detect_columns(fieldnames)
+    if report_missing_columns(email_col, name_col, fieldnames):
+        return
+
+    recovered = recover_journal(csv_file, rows, fieldnames, email_col)
+    if recovered:
+        print(f"Recovered {recovered} results from an interrupted run.")
+
+    status_col = ensure_status_column(fieldnames, email_type)
+    address_index = new_address_index(ledger, email_type, campaign)
+    pending_rows = collapse_duplicate_rows(rows, email_col, status_col, address_index)
+    report_collapsed(address_index, ledger, email_type, campaign)
+
+    return run_batch_send(
+        pending_rows,
+        len(rows),
+        email_type,
+        email_col,
+        name_col,
+        lambda: CsvStatusWriter(csv_file, fieldnames, rows, email_col, email_type),
+        ledger=ledger,
+        campaign=campaign,
+        skipped=address_index.collapsed,
+        **limits
+    )
+
+
+def process_stream_batch(csv_file, email_type, campaign=DEFAULT_CAMPAIGN, ledger=None, **limits):
+    """
+    Batch send that streams the CSV instead of loading it into memory.
+
+    Columns are detected from the header alone, one quick pass collapses
+    repeated addresses, another counts the pending rows for the preview and
+    a last one feeds them to the sender as they are read, so memory use
+    grows only with the number of distinct addresses, not the rows.
+    """
+    fieldnames = read_header(csv_file)
+    if not fieldnames:
+        print("❌ Error: CSV file is empty")
+        return
+
+    email_col, name_col = detect_columns(fieldnames)
+    if report_missing_columns(email_col, name_col, fieldnames):
+        return
+
+    status_col = f"{email_type}_emailed"
+    overlays = journal_overlays(csv_file)
+    recovered = sum(len(overlay) for overlay in overlays.values())
+    if recovered:
+        print(f"Recovered {recovered} results from an interrupted run.")
+
+    rows = CsvRowStream(csv_file, fieldnames, email_col, status_col, status_is_sent, overlays)
+    address_index = new_address_index(ledger, email_type, campaign)
+    rows.collapse_duplicates(address_index)
+    total, pending_count, preview = rows.scan()
+    if not total:
+        print("❌ Error: CSV file is empty")
+        return
+    report_collapsed(address_index, ledger, email_type, campaign)
+
+    return run_batch_send(
+        rows,
+        total,
+        email_type,
+        email_col,
+        name_col,
+        lambda: StreamingCsvStatusWriter(rows, email_type),
+        pending_count=pending_count,
+        preview=preview,
+        ledger=ledger,
+        campaign=campaign,
+        skipped=address_index.collapsed,
+        **limits
+    )
+
+
+def import_into_store(store, csv_file, campaign=DEFAULT_CAMPAIGN):
+    """
+    Imports csv_file into an open RecipientStore unless it is already there.
+
+    Returns False (after printing why) if the CSV cannot be used.
+    """
+    if not store.needs_import(csv_file):
+        return True
+
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        fieldnames = list(csv.DictReader(f).fieldnames or [])
+    email_col, name_col = detect_columns(fieldnames)
+    if report_missing_columns(email_col, name_col, fieldnames):
+        return False
+
+    status_columns = {
+        column[:-len('_emailed')]: column for column in fieldnames if column.endswith('_emailed')
+    }
+    count = store.import_csv(csv_file, email_col, name_col, status_columns, status_is_sent, campaign)
+    print(f"Imported {count} rows from {csv_file} into {store.path}")
+    return True
+
+
+def process_store_batch(csv_file, store_path, email_type, campaign=DEFAULT_CAMPAIGN, ledger=None, **limits):
+    """
+    Batch send that keeps status in a SQLite RecipientStore.
+
+    The CSV is only read when it has changed since the last import and is
+    never rewritten; resuming just queries the recipients still pending.
+    """
+    with RecipientStore(store_path) as store:
+        if not import_into_store(store, csv_file, campaign):
+            return
+
+        total, _ = store.counts(email_type, campaign)
+        if not total:
+            print("❌ Error: CSV file is empty")
+            return
+
+        print(f"Campaign: {campaign} (status kept in {store_path})")
+        address_index = new_address_index(ledger, email_type, campaign)
+        pending_rows = store_pending_rows(store, email_type, campaign, address_index)
+        report_collapsed(address_index, ledger, email_type, campaign)
+        return run_batch_send(
+            pending_rows,
+            total,
+            email_type,
+            'email',
+            'name',
+            lambda: store.status_writer(email_type, campaign),
+            sender_usage=store.sender_usage(time.time() - 86400),
+            ledger=ledger,
+            campaign=campaign,
+            skipped=address_index.collapsed,
+            **limits
+        )
+
+
+def render_spool(csv_file, email_type, spool_path=None, spool_format=PACKED, campaign=None,
+                 ledger_file=None):
+    """
+    Renders every pending row of a CSV into a spool that deliver_spool sends later.
+
+    The roster is streamed, so memory stays flat. Each email is rendered and
+    encoded once, from SENDER_EMAIL, and stored exactly as it will go on the
+    wire: back to back in one packed file with an offset index (default), or
+    as one .eml file per recipient (spool_format=EML). Each normalized
+    address is rendered once, and not at all if the ledger of a named
+    campaign (see open_campaign_ledger) has already sent it this email; the
+    rows left out are marked duplicate in the roster's journal. The roster
+    itself is not changed until deliver_spool writes the results into it.
+
+    :return: The spool path, or None if nothing was rendered
+    """
+    if not os.path.exists(csv_file):
+        print(f"❌ Error: CSV file not found at {csv_file}")
+        return None
+
+    fieldnames = read_header(csv_file)
+    if not fieldnames:
+        print("❌ Error: CSV file is empty")
+        return None
+
+    email_col, name_col = detect_columns(fieldnames)
+    if report_missing_columns(email_col, name_col, fieldnames):
+        return None
+
+    email_campaign = get_campaign(email_type)
+    if not email_campaign:
+        print(f"❌ Error: Could not load the {email_type} email template")
+        return None
+
+    spool_path = spool_path or default_spool_path(csv_file, email_type)
+    manifest = {
+        'email_type': email_type,
+        'label': email_campaign.label,
+        'sender': SENDER_EMAIL,
+        'roster': os.path.abspath(csv_file),
+        'campaign': campaign,
+    }
+    status_col = f"{email_type}_emailed"
+    rows = CsvRowStream(csv_file, fieldnames, email_col, status_col, status_is_sent, journal_overlays(csv_file))
+    ledger = open_campaign_ledger(csv_file, campaign, ledger_file)
+    try:
+        address_index = new_address_index(ledger, email_type, campaign)
+        rows.collapse_duplicates(address_index)
+        report_collapsed(address_index, ledger, email_type, campaign)
+    finally:
+        if ledger is not None:
+            ledger.close()
+    if rows.skipped:
+        # Applied to the roster by deliver_spool, or by the roster's next batch.
+        journal = SendJournal(journal_path_for(csv_file))
+        for index, values in rows.raw_rows():
+            if index in rows.skipped:
+                journal.append({
+                    'row': index,
+                    'email': rows.email_of(values),
+                    'type': email_type,
+                    'status': DUPLICATE_STATUS,
+                    'sender': None,
+                })
+        journal.close()
+
+    try:
+        writer = SpoolWriter(spool_path, manifest, spool_format)
+    except FileExistsError:
+        print(f"❌ Error: {spool_path} already exists. Deliver it, delete it or choose another --spool.")
+        return None
+
+    started = time.monotonic()
+    skipped = 0
+    print(f"Rendering {email_campaign.label} emails from {csv_file} into {spool_path}...")
+    try:
+        for row in rows:
+            index = rows.release(row)
+            recipient = delivery_address(row.get(email_col))
+            name = (row.get(name_col) or '').strip()
+            if not recipient:
+                skipped += 1
+                continue
+            writer.add(index, recipient, name, email_campaign.build_message(recipient, name))
+            if writer.count % 1000 == 0:
+                print(f"  {writer.count} emails rendered...")
+    except BaseException:
+        rows.close()
+        writer.abort()
+        raise
+    writer.close()
+
+    elapsed = time.monotonic() - started
+    print(f"✅ Rendered {writer.count} emails ({writer.size / 1048576:.1f} MB) in {elapsed:.1f}s.")
+    if skipped:
+        print(f"⚠️ Skipped {skipped} rows without an email address.")
+    print(f"Send them with: python send.py --mode deliver --spool \"{spool_path}\"")
+    return spool_path if writer.count else None
+
+
+def deliver_spool(spool_path, delay=0, resend=False, ledger_file=None, **limits):
+    """
+    Sends the emails of a spool made by render_spool.
+
+    The spool's index.csv works like a roster CSV: its {type}_emailed column
+    records each result, so an interrupted delivery resumes where it
+    stopped and the spool doubles as a record of who was sent what. The
+    results are also written into the roster the spool was rendered from
+    (see SpoolStatusWriter), so a later batch of it does not send them again.
+    If the spool was rendered for a named campaign, addresses its ledger
+    has sent since the render are skipped; resend=True sends every email in
+    the spool again regardless. limits are the
+    sending options of run_batch_send (rate limits, workers, backend, ...).
+    """
+    if not is_spool(spool_path):
+        print(f"❌ Error: No spool found at {spool_path}. Create one with --mode render first.")
+        return
+
+    spool = Spool(spool_path)
+    campaign = spool.manifest.get('campaign')
+    ledger = open_campaign_ledger(spool.manifest.get('roster') or spool_path, campaign, ledger_file)
+    try:
+        with open(spool.index_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+            fieldnames = list(reader.fieldnames or [])
+
+        recovered = recover_journal(spool.index_path, rows, fieldnames, 'email')
+        if recovered:
+            print(f"Recovered {recovered} results from an interrupted delivery.")
+
+        status_col = ensure_status_column(fieldnames, spool.email_type)
+        skipped = 0
+        if resend:
+            pending_rows = rows
+        else:
+            address_index = new_address_index(ledger, spool.email_type, campaign)
+            pending_rows = collapse_duplicate_rows(rows, 'email', status_col, address_index)
+            report_collapsed(address_index, ledger, spool.email_type, campaign)
+            skipped = address_index.collapsed
+
+        manifest = spool.manifest
+        print(f"Spool: {len(rows)} {spool.label} emails rendered {manifest.get('created', '')} "
+              f"from {manifest.get('roster', 'unknown roster')}")
+        run_batch_send(
+            pending_rows,
+            len(rows),
+            spool.email_type,
+            'email',
+            'name',
+            lambda: SpoolStatusWriter(spool, fieldnames, rows),
+            delay=delay,
+            spool=spool,
+            ledger=ledger,
+            campaign=campaign,
+            skipped=skipped,
+            **limits
+        )
+    finally:
+        if ledger is not None:
+            ledger.close()
+        spool.close()
+
+
+def run_scheduled_batch(entry, delay):
+    """
+    Sends a CampaignSchedule entry, counting down the delay seconds left until its start time.
+
+    Returns CANCELLED if Ctrl+C stopped the countdown, so the scheduler
+    stops too instead of moving on to the next entry.
+    """
+    global cancel_scheduled_send
+
+    cancel_scheduled_send = False
+    result = process_csv_batch(entry['csv'], entry['type'], delay=delay, assume_yes=True, **entry['options'])
+    if result is None and cancel_scheduled_send:
+        return CANCELLED
+    return result
+
 
 def send_single_with_delay(email_func, delay, **kwargs):
     """
@@ -554,10 +1926,14 @@ def send_single_with_delay(email_func, delay, **kwargs):
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     parser = argparse.ArgumentParser(description='USSC Email Sender - Special Election and Plebiscite')
     
-    parser.add_argument('--mode', choices=['single', 'batch'], default='single',
-                        help='Send mode: single email or batch from CSV')
+    parser.add_argument('--mode', choices=['single', 'batch', 'render', 'deliver', 'schedule', 'scheduler'],
+                        default='single',
+                        help='Send mode: single email, batch from CSV, render a CSV into a spool, '
+                             'deliver a rendered spool, schedule a batch for later (or list the schedule), '
+                             'or run the scheduler that sends scheduled batches')
     
     parser.add_argument('--type', choices=['blast', 'ballot_links', 'precinct', 'reminder'], default='blast',
                         help='Type of email to send')
@@ -573,9 +1949,70 @@ if __name__ == '__main__':
     parser.add_argument('--email-delay', type=int, default=DEFAULT_DELAY_BETWEEN_EMAILS,
                         help=f'Delay in seconds between each email in batch mode (default: {DEFAULT_DELAY_BETWEEN_EMAILS})')
     
+    parser.add_argument('--per-minute', type=int,
+                        help='Maximum emails per minute across all connections (default: RATE_LIMIT_PER_MINUTE in .env)')
+    parser.add_argument('--per-hour', type=int,
+                        help='Maximum emails per hour across all connections (default: RATE_LIMIT_PER_HOUR in .env)')
+    parser.add_argument('--per-day', type=int,
+                        help='Daily sending cap, e.g. 500 for Gmail (default: RATE_LIMIT_PER_DAY in .env)')
+    
+    parser.add_argument('--stream', action='store_true', default=None,
+                        help='Read the CSV row by row instead of loading it (automatic for files over 5 MB)')
+    parser.add_argument('--store', nargs='?', const='', default=None, metavar='DB',
+                        help='Track batch status in a SQLite database instead of the CSV '
+                             '(default file: next to the CSV with a .db extension)')
+    parser.add_argument('--spool', metavar='DIR',
+                        help='Spool directory for --mode render/deliver '
+                             '(default for render: next to the CSV, e.g. students_blast.spool)')
+    parser.add_argument('--eml', action='store_true',
+                        help='Render one .eml file per recipient instead of a single packed spool file')
+    parser.add_argument('--resend', action='store_true',
+                        help='Deliver every email in the spool again, including those already sent')
+    parser.add_argument('--at', metavar='"YYYY-MM-DD HH:MM"',
+                        help='Start time for --mode schedule (local time)')
+    parser.add_argument('--cancel', type=int, metavar='ID',
+                        help='Cancel a scheduled batch (with --mode schedule)')
+    parser.add_argument('--schedule-file', default=SCHEDULE_FILE, metavar='FILE',
+                        help=f'Where scheduled batches are kept (default: SCHEDULE_FILE in .env or {DEFAULT_SCHEDULE_FILE})')
+    parser.add_argument('--campaign', metavar='NAME',
+                        help='Name of this election, e.g. 2026-general. Status kept with --store is kept '
+                             'under it, and an address sent an email type under it is never sent that '
+                             'type again from any CSV in that folder '
+                             f'(default: {DEFAULT_CAMPAIGN}, without that check)')
+    parser.add_argument('--ledger', metavar='FILE',
+                        help='Where --campaign keeps the addresses already sent; a name without a folder is '
+                             f'kept next to the CSV (default: SENT_LEDGER in .env or {DEFAULT_LEDGER_FILE})')
+    parser.add_argument('--no-ledger', action='store_true',
+                        help='Use --campaign without checking or updating the sent-address ledger '
+                             '(duplicates within the CSV are still skipped)')
+    
+    parser.add_argument('--yes', action='store_true',
+                        help='Start the batch without asking for confirmation')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='Write per-stage send timings to FILE during the batch '
+                             '(.json for JSON, otherwise Prometheus text; default: METRICS_FILE in .env)')
+    
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Number of parallel SMTP connections per sending account in batch mode (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help='Batch sending engine: sync uses one thread per connection, async runs all '
+                             f'connections on one asyncio event loop (default: {DEFAULT_BACKEND})')
+    parser.add_argument('--pipeline', type=int, nargs='?', const=DEFAULT_PIPELINE_DEPTH, default=0, metavar='N',
+                        help='Send up to N emails per round trip on each connection when the server supports '
+                             f'SMTP PIPELINING; implies --backend async (default N: {DEFAULT_PIPELINE_DEPTH})')
+    parser.add_argument('--processes', type=int, default=1, metavar='N',
+                        help='Render and send from N processes to use more CPU cores; the sending limits '
+                             'are split between them (default: 1)')
+    parser.add_argument('--fixed-rate', action='store_true',
+                        help="Keep the configured sending rate even if the server starts throttling "
+                             "(default: slow down automatically; see ADAPTIVE_THROTTLE in .env)")
+    
     args = parser.parse_args()
+    ledger_file = '' if args.no_ledger else args.ledger
     
     print("--- USSC Email Sender - Special Election and Plebiscite ---\n")
+    if args.ledger and not args.campaign:
+        print("⚠️ --ledger is only used together with --campaign NAME; sending without it.")
     
     try:
         if args.mode == 'single':
@@ -619,8 +2056,98 @@ if __name__ == '__main__':
                     csv_file=args.csv,
                     email_type=args.type,
                     delay=args.delay,
-                    email_delay=args.email_delay
+                    email_delay=args.email_delay,
+                    workers=max(1, args.workers),
+                    per_minute=args.per_minute,
+                    per_hour=args.per_hour,
+                    per_day=args.per_day,
+                    store=(args.store or default_store_path(args.csv)) if args.store is not None else None,
+                    campaign=args.campaign,
+                    stream=args.stream,
+                    backend=args.backend,
+                    pipeline=max(0, args.pipeline),
+                    assume_yes=args.yes,
+                    metrics_file=args.metrics,
+                    adaptive=False if args.fixed_rate else None,
+                    processes=max(1, args.processes),
+                    ledger_file=ledger_file
                 )
+        elif args.mode == 'render':
+            if not args.csv:
+                print("❌ Error: --csv is required for render mode")
+                parser.print_help()
+            else:
+                if args.processes > 1:
+                    print("⚠️ --processes is ignored in render mode; the spool is rendered in this process.")
+                render_spool(args.csv, args.type, args.spool, EML if args.eml else PACKED, args.campaign, ledger_file)
+        elif args.mode == 'deliver':
+            if not args.spool:
+                print("❌ Error: --spool is required for deliver mode")
+                parser.print_help()
+            else:
+                deliver_spool(
+                    args.spool,
+                    delay=args.delay,
+                    resend=args.resend,
+                    ledger_file=ledger_file,
+                    email_delay=args.email_delay,
+                    workers=max(1, args.workers),
+                    per_minute=args.per_minute,
+                    per_hour=args.per_hour,
+                    per_day=args.per_day,
+                    backend=args.backend,
+                    pipeline=max(0, args.pipeline),
+                    assume_yes=args.yes,
+                    metrics_file=args.metrics,
+                    adaptive=False if args.fixed_rate else None,
+                    processes=max(1, args.processes)
+                )
+        elif args.mode == 'schedule':
+            schedule = CampaignSchedule(args.schedule_file)
+            if args.cancel is not None:
+                if schedule.cancel(args.cancel):
+                    print(f"✅ Cancelled scheduled batch #{args.cancel}.")
+                else:
+                    print(f"❌ Error: No scheduled batch #{args.cancel} waiting to start.")
+            elif args.at:
+                try:
+                    start = parse_start(args.at)
+                except ValueError as e:
+                    print(f"❌ Error: {e}")
+                    start = None
+                if not args.csv or not os.path.exists(args.csv):
+                    print("❌ Error: --csv with an existing file is required to schedule a batch")
+                elif start is not None and start <= datetime.now():
+                    print("❌ Error: --at must be in the future")
+                elif start is not None:
+                    entry = schedule.add(args.type, args.csv, start, {
+                        'email_delay': args.email_delay,
+                        'workers': max(1, args.workers),
+                        'per_minute': args.per_minute,
+                        'per_hour': args.per_hour,
+                        'per_day': args.per_day,
+                        'store': (os.path.abspath(args.store or default_store_path(args.csv))
+                                  if args.store is not None else None),
+                        'campaign': args.campaign,
+                        'stream': args.stream,
+                        'backend': args.backend,
+                        'pipeline': max(0, args.pipeline),
+                        'metrics_file': args.metrics,
+                        'adaptive': False if args.fixed_rate else None,
+                        'processes': max(1, args.processes),
+                        'ledger_file': (os.path.abspath(ledger_file) if ledger_file and os.path.dirname(ledger_file)
+                                        else ledger_file),
+                    })
+                    print(f"✅ Scheduled {describe_entry(entry)}")
+                    print("The scheduler must be running at that time: python send.py --mode scheduler")
+            else:
+                entries = schedule.load()
+                if not entries:
+                    print(f"Nothing scheduled in {args.schedule_file}.")
+                for entry in entries:
+                    print(describe_entry(entry))
+        elif args.mode == 'scheduler':
+            run_scheduler(CampaignSchedule(args.schedule_file), run_scheduled_batch)
     
     except KeyboardInterrupt:
         print("\n\n❌ Program interrupted by user.")
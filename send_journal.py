@@ -0,0 +1,71 @@
+import json
+import os
+import time
+
+
+DEFAULT_FSYNC_EVERY = 20
+DEFAULT_FSYNC_INTERVAL = 1.0
+
+
+def journal_path_for(csv_file):
+    return csv_file + '.journal'
+
+
+class SendJournal:
+    """
+    Append-only log of per-row send results, one JSON object per line.
+
+    Every record is flushed to the OS immediately, so a crashed process
+    loses nothing; fsync is batched (every fsync_every records or
+    fsync_interval seconds) so a power loss can drop at most that window.
+    """
+
+    def __init__(self, path, fsync_every=DEFAULT_FSYNC_EVERY, fsync_interval=DEFAULT_FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.file = open(path, 'a', encoding='utf-8')
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    @staticmethod
+    def replay(path):
+        """Returns the records in an existing journal, skipping a torn last line."""
+        if not os.path.exists(path):
+            return []
+        records = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+        return records
+
+    def append(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+        self.unsynced += 1
+        if self.unsynced >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self.unsynced:
+            os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def reset(self):
+        """Empties the journal once its records are safely in the CSV."""
+        self.file.truncate(0)
+        self.file.seek(0)
+        self.sync()
+
+    def close(self, remove=False):
+        self.sync()
+        self.file.close()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
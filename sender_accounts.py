@@ -0,0 +1,159 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+
+# An account whose next send is further away than this (usually because
+# its daily quota is used up) leaves the rows to accounts that can send now.
+QUOTA_WAIT = 60.0
+
+
+def env_number(environ, name):
+    try:
+        return int(environ.get(name, '') or 0) or None
+    except ValueError:
+        return None
+
+
+class SenderAccount:
+    """
+    One sending account or SMTP relay with its own credentials and limits.
+
+    per_minute/per_hour/per_day of None mean "use the batch's limits". A
+    relay that needs no login has no password. limiter is the account's own
+    RateLimiter, set when a batch starts.
+    """
+
+    def __init__(self, email, password, server, port, use_tls=True, username=None,
+                 per_minute=None, per_hour=None, per_day=None):
+        self.email = email
+        self.password = password
+        self.server = server
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username if username is not None else (email if password else None)
+        self.per_minute = per_minute
+        self.per_hour = per_hour
+        self.per_day = per_day
+        self.limiter = None
+        self.sent = 0
+        self.failed = 0
+        self.disabled = None
+
+    def __repr__(self):
+        return f"SenderAccount({self.email!r}, {self.server}:{self.port})"
+
+
+def load_extra_accounts(primary, environ=os.environ):
+    """
+    Reads the numbered sender accounts from the environment.
+
+    Account 2 is SENDER_EMAIL_2/SENDER_PASSWORD_2, account 3 is
+    SENDER_EMAIL_3/..., and so on until one is missing. Each may set its
+    own SMTP_SERVER_n, SMTP_PORT_n, SMTP_USE_TLS_n, SMTP_USERNAME_n and
+    RATE_LIMIT_PER_{MINUTE,HOUR,DAY}_n; the server settings default to the
+    primary account's.
+    """
+    accounts = []
+    n = 2
+    while environ.get(f'SENDER_EMAIL_{n}'):
+        use_tls = environ.get(f'SMTP_USE_TLS_{n}')
+        accounts.append(SenderAccount(
+            environ[f'SENDER_EMAIL_{n}'].strip(),
+            environ.get(f'SENDER_PASSWORD_{n}', ''),
+            environ.get(f'SMTP_SERVER_{n}') or primary.server,
+            env_number(environ, f'SMTP_PORT_{n}') or primary.port,
+            use_tls=primary.use_tls if not use_tls else use_tls.strip().lower() not in ('0', 'false', 'no', 'off'),
+            username=environ.get(f'SMTP_USERNAME_{n}'),
+            per_minute=env_number(environ, f'RATE_LIMIT_PER_MINUTE_{n}'),
+            per_hour=env_number(environ, f'RATE_LIMIT_PER_HOUR_{n}'),
+            per_day=env_number(environ, f'RATE_LIMIT_PER_DAY_{n}'),
+        ))
+        n += 1
+    return accounts
+
+
+class SenderPool:
+    """
+    The accounts a batch sends from.
+
+    Every account gets its own connections and RateLimiter, and they all
+    take rows from the same queue, so each account sends as fast as its own
+    limits allow and a batch finishes about len(accounts) times sooner.
+    An account that cannot send for a while (yield_to_others) or whose
+    login fails (disable) leaves its rows to the others. describe() and
+    estimate_duration() match RateLimiter's so the schedule and progress
+    displays work with either.
+    """
+
+    def __init__(self, accounts):
+        self.accounts = list(accounts)
+        self.lock = threading.Lock()
+
+    def active(self):
+        return [account for account in self.accounts if account.disabled is None]
+
+    def disable(self, account, reason):
+        """
+        Stops using an account for the rest of the batch. Returns False if
+        no other account is still working, so the batch cannot go on.
+        """
+        with self.lock:
+            if account.disabled is None:
+                account.disabled = reason
+            return any(other.disabled is None for other in self.accounts)
+
+    def yield_to_others(self, account):
+        """True if account would wait long for its next send while another account could send now."""
+        if len(self.accounts) < 2 or account.limiter.next_wait() < QUOTA_WAIT:
+            return False
+        return any(
+            other.limiter.next_wait() < QUOTA_WAIT
+            for other in self.active() if other is not account
+        )
+
+    def record(self, account, result):
+        with self.lock:
+            if result:
+                account.sent += 1
+            else:
+                account.failed += 1
+
+    def describe(self):
+        if len(self.accounts) == 1:
+            return self.accounts[0].limiter.describe()
+        return "; ".join(f"{account.email}: {account.limiter.describe()}" for account in self.accounts)
+
+    def estimate_duration(self, count):
+        """Predicts how many seconds count emails take with each one going to the first account free."""
+        accounts = self.active()
+        if count <= 0 or not accounts:
+            return 0.0
+        if len(accounts) == 1:
+            return accounts[0].limiter.estimate_duration(count)
+        states = [account.limiter.snapshot() for account in accounts]
+        elapsed = 0.0
+        for _ in range(count):
+            waits = [max((bucket.wait_time() for bucket in buckets), default=0.0) for buckets in states]
+            first = waits.index(min(waits))
+            wait = waits[first]
+            elapsed += wait
+            for buckets in states:
+                for bucket in buckets:
+                    bucket.tokens = min(bucket.capacity, bucket.tokens + wait * bucket.rate)
+            for bucket in states[first]:
+                bucket.tokens -= 1
+        return elapsed
+
+    def estimate_completion(self, count):
+        return datetime.now() + timedelta(seconds=self.estimate_duration(count))
+
+    def usage_lines(self):
+        """Per-account results as printable lines."""
+        lines = []
+        for account in self.accounts:
+            line = f"{account.email}: sent {account.sent}, failed {account.failed}"
+            if account.disabled:
+                line += f" (stopped: {account.disabled})"
+            lines.append(line)
+        return lines
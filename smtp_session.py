@@ -0,0 +1,110 @@
+import smtplib
+import socket
+import time
+
+import metrics
+
+
+DEFAULT_MAX_MESSAGES_PER_CONNECTION = 100
+DEFAULT_MAX_CONNECTION_AGE = 300
+
+
+class SmtpSession:
+    """
+    Keeps one authenticated SMTP connection open across many sends.
+
+    The connection is opened lazily on the first send, reopened transparently
+    when the server drops it, and recycled after max_messages sends or
+    max_age seconds so long batches do not hit server-side session limits.
+    """
+
+    def __init__(self, server, port, username, password,
+                 max_messages=DEFAULT_MAX_MESSAGES_PER_CONNECTION,
+                 max_age=DEFAULT_MAX_CONNECTION_AGE,
+                 use_tls=True, timeout=60):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_messages = max_messages
+        self.max_age = max_age
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.connection = None
+        self.opened_at = 0.0
+        self.sent_on_connection = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def connect(self):
+        """Opens and authenticates a fresh connection, dropping any old one."""
+        self.close()
+        with metrics.stage('connect'):
+            connection = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            # A message larger than one TLS record is written in two pieces;
+            # with Nagle's algorithm on, the second waits for the server's
+            # delayed ACK (about 40 ms per email).
+            connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if self.use_tls:
+                with metrics.stage('starttls'):
+                    connection.starttls()
+            if self.username:
+                with metrics.stage('login'):
+                    connection.login(self.username, self.password)
+        except Exception:
+            connection.close()
+            raise
+        self.connection = connection
+        self.opened_at = time.monotonic()
+        self.sent_on_connection = 0
+        return connection
+
+    def close(self):
+        connection = self.connection
+        self.connection = None
+        if connection is None:
+            return
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+
+    def needs_recycle(self):
+        if self.connection is None:
+            return True
+        if self.max_messages and self.sent_on_connection >= self.max_messages:
+            return True
+        if self.max_age and time.monotonic() - self.opened_at >= self.max_age:
+            return True
+        return False
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        """
+        Sends one message over the shared connection.
+
+        A connection the server has already closed is reopened and the message
+        is sent once more; any other error is left to the caller. Socket-level
+        errors drop the connection so the next send starts from a clean one.
+        """
+        if self.needs_recycle():
+            self.connect()
+        try:
+            try:
+                with metrics.stage('sendmail'):
+                    result = self.connection.sendmail(from_addr, to_addrs, msg)
+            except smtplib.SMTPServerDisconnected:
+                self.connect()
+                with metrics.stage('sendmail'):
+                    result = self.connection.sendmail(from_addr, to_addrs, msg)
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            raise
+        except Exception:
+            self.close()
+            raise
+        self.sent_on_connection += 1
+        return result
@@ -0,0 +1,157 @@
+import csv
+import json
+import mmap
+import os
+import shutil
+import threading
+from datetime import datetime
+
+from message_builder import fold_header
+
+
+PACKED = 'packed'
+EML = 'eml'
+FORMATS = (PACKED, EML)
+MANIFEST = 'manifest.json'
+INDEX = 'index.csv'
+PACKED_FILE = 'messages.spool'
+INDEX_FIELDS = ['row', 'email', 'name', 'file', 'offset', 'length']
+
+
+def default_spool_path(csv_file, email_type):
+    return f"{os.path.splitext(csv_file)[0]}_{email_type}.spool"
+
+
+def is_spool(path):
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+def replace_sender(message, old_sender, new_sender):
+    """Swaps the From header of a rendered message without touching the rest of it."""
+    head, separator, body = message.partition(b'\r\n\r\n')
+    old = b'\r\n' + fold_header('From', old_sender).encode('ascii')
+    new = b'\r\n' + fold_header('From', new_sender).encode('ascii')
+    return head.replace(old, new, 1) + separator + body
+
+
+class SpoolWriter:
+    """
+    Writes rendered emails into a new spool directory.
+
+    A spool holds manifest.json (what was rendered, from which roster and
+    for which sender), index.csv (one line per email: the recipient, the
+    roster row and where the email's bytes are) and either messages.spool,
+    every email back to back, or one NNNNNN.eml file per email. It is
+    written under a .partial name and only renamed into place by close(),
+    so an interrupted render never leaves a spool that looks complete.
+    """
+
+    def __init__(self, path, manifest, spool_format=PACKED):
+        if spool_format not in FORMATS:
+            raise ValueError(f"Unknown spool format: {spool_format}")
+        if os.path.exists(path):
+            raise FileExistsError(f"{path} already exists")
+        self.path = path
+        self.temp_path = path + '.partial'
+        shutil.rmtree(self.temp_path, ignore_errors=True)
+        os.makedirs(self.temp_path)
+        self.manifest = dict(manifest, format=spool_format, created=datetime.now().isoformat(timespec='seconds'))
+        self.index_file = open(os.path.join(self.temp_path, INDEX), 'w', encoding='utf-8', newline='')
+        self.index = csv.writer(self.index_file)
+        self.index.writerow(INDEX_FIELDS)
+        self.packed = None
+        if spool_format == PACKED:
+            self.packed = open(os.path.join(self.temp_path, PACKED_FILE), 'wb')
+        self.offset = 0
+        self.count = 0
+        self.size = 0
+
+    def add(self, row, email, name, message):
+        self.count += 1
+        self.size += len(message)
+        if self.packed is not None:
+            self.packed.write(message)
+            self.index.writerow([row, email, name, PACKED_FILE, self.offset, len(message)])
+            self.offset += len(message)
+            return
+        filename = f"{self.count:06d}.eml"
+        with open(os.path.join(self.temp_path, filename), 'wb') as f:
+            f.write(message)
+        self.index.writerow([row, email, name, filename, 0, len(message)])
+
+    def close_files(self):
+        self.index_file.close()
+        if self.packed is not None:
+            self.packed.close()
+
+    def close(self):
+        self.close_files()
+        self.manifest['count'] = self.count
+        with open(os.path.join(self.temp_path, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        self.close_files()
+        shutil.rmtree(self.temp_path, ignore_errors=True)
+
+
+class Spool:
+    """
+    A rendered campaign on disk, opened for delivery.
+
+    message(row) returns one email exactly as it was rendered. In a packed
+    spool it is sliced out of a memory map of messages.spool (or read with
+    seek when use_mmap is False), so delivering costs no rendering or
+    encoding. Nothing in the spool changes except the status column in
+    index.csv, so it can be delivered again or inspected later.
+    """
+
+    def __init__(self, path, use_mmap=True):
+        self.path = path
+        self.index_path = os.path.join(path, INDEX)
+        with open(os.path.join(path, MANIFEST), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.email_type = self.manifest['email_type']
+        self.label = self.manifest['label']
+        self.sender = self.manifest['sender']
+        self.lock = threading.Lock()
+        self.file = None
+        self.map = None
+        packed_path = os.path.join(path, PACKED_FILE)
+        if os.path.exists(packed_path):
+            self.file = open(packed_path, 'rb')
+            if use_mmap and os.path.getsize(packed_path):
+                self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self, entry):
+        offset = int(entry['offset'])
+        length = int(entry['length'])
+        if entry['file'] == PACKED_FILE:
+            if self.map is not None:
+                data = self.map[offset:offset + length]
+            else:
+                with self.lock:
+                    self.file.seek(offset)
+                    data = self.file.read(length)
+        else:
+            with open(os.path.join(self.path, os.path.basename(entry['file'])), 'rb') as f:
+                data = f.read()
+        if len(data) != length:
+            raise ValueError(f"Spooled email for {entry.get('email')} is incomplete")
+        return data
+
+    def message(self, entry, sender=None):
+        """Returns the email of an index.csv row, with its From header changed to sender if given."""
+        data = self.read(entry)
+        if sender and sender != self.sender:
+            data = replace_sender(data, self.sender, sender)
+        return data
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
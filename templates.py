@@ -0,0 +1,82 @@
+import os
+import re
+import threading
+import time
+
+
+PLACEHOLDER_PATTERN = re.compile(r'(\[[A-Z][A-Z ]*\])')
+
+
+class CompiledTemplate:
+    """
+    An HTML template pre-split on its [PLACEHOLDER] tokens.
+
+    parts alternates literal text and placeholder names, so rendering is a
+    single join instead of one full-string replace pass per placeholder.
+    Placeholders without a value are left in the output unchanged.
+    """
+
+    def __init__(self, text, mtime=None, parts=None):
+        self.text = text
+        self.mtime = mtime
+        self.parts = parts if parts is not None else PLACEHOLDER_PATTERN.split(text)
+        self.placeholders = set(self.parts[1::2])
+
+    def partial(self, values):
+        """
+        Returns a new template with the given placeholders baked in.
+
+        Used to fill campaign-wide values once so only the per-recipient
+        placeholders remain to be rendered for each email.
+        """
+        parts = [self.parts[0]]
+        for i in range(1, len(self.parts), 2):
+            name = self.parts[i]
+            if name in values:
+                parts[-1] += values[name] + self.parts[i + 1]
+            else:
+                parts.append(name)
+                parts.append(self.parts[i + 1])
+        return CompiledTemplate(self.text, self.mtime, parts)
+
+    def render(self, values):
+        parts = self.parts[:]
+        get = values.get
+        for i in range(1, len(parts), 2):
+            parts[i] = get(parts[i], parts[i])
+        return ''.join(parts)
+
+
+class TemplateCache:
+    """
+    Loads each template file once and reuses the compiled form.
+
+    The file's mtime is re-checked at most once per check_interval seconds, so
+    edits made during a running campaign are still picked up.
+    """
+
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, path):
+        now = time.monotonic()
+        entry = self.entries.get(path)
+        if entry is not None and now - entry[1] < self.check_interval:
+            return entry[0]
+
+        with self.lock:
+            mtime = os.stat(path).st_mtime_ns
+            entry = self.entries.get(path)
+            if entry is not None and entry[0].mtime == mtime:
+                self.entries[path] = (entry[0], now)
+                return entry[0]
+            with open(path, 'r', encoding='utf-8') as f:
+                template = CompiledTemplate(f.read(), mtime)
+            self.entries[path] = (template, now)
+            return template
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()